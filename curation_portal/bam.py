@@ -0,0 +1,421 @@
+"""
+Minimal reading and writing of BAM files and their BAI indexes.
+
+See the SAM/BAM format specification (https://samtools.github.io/hts-specs/SAMv1.pdf) for
+details of the BGZF, BAM, and BAI formats.
+"""
+
+import io
+import struct
+import zlib
+from collections import namedtuple
+
+BGZF_HEADER = struct.Struct("<BBBBIBBH")
+BGZF_FOOTER = struct.Struct("<II")
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+BGZF_MAX_BLOCK_DATA_SIZE = 0xFF00
+
+BAM_MAGIC = b"BAM\x01"
+BAI_MAGIC = b"BAI\x01"
+
+# Size of the linear index windows
+BAI_LINEAR_SHIFT = 14
+
+# CIGAR operations that consume the reference: M, D, N, =, X
+CIGAR_REFERENCE_OPS = {0, 2, 3, 7, 8}
+
+BamHeader = namedtuple("BamHeader", ["text", "references"])
+
+Chunk = namedtuple("Chunk", ["start", "end"])
+
+
+class BamError(ValueError):
+    pass
+
+
+class BgzfReader:
+    """Read decompressed data from a BGZF file using virtual file offsets."""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.block_offset = None
+        self.block_size = 0
+        self.block_data = b""
+        self.position = 0
+
+    def _load_block(self, offset):
+        self.handle.seek(offset)
+        header = self.handle.read(BGZF_HEADER.size)
+        self.block_offset = offset
+        self.position = 0
+
+        if not header:
+            self.block_size = 0
+            self.block_data = b""
+            return
+
+        if len(header) < BGZF_HEADER.size:
+            raise BamError("Truncated BGZF block")
+
+        id1, id2, _, flags, _, _, _, extra_length = BGZF_HEADER.unpack(header)
+        if id1 != 31 or id2 != 139 or not flags & 4:
+            raise BamError("Invalid BGZF block")
+
+        extra = self.handle.read(extra_length)
+        block_size = None
+        i = 0
+        while i + 4 <= len(extra):
+            subfield_id, subfield_length = (
+                extra[i : i + 2],
+                struct.unpack_from("<H", extra, i + 2)[0],
+            )
+            if subfield_id == b"BC" and subfield_length == 2:
+                block_size = struct.unpack_from("<H", extra, i + 4)[0] + 1
+            i += 4 + subfield_length
+
+        if block_size is None:
+            raise BamError("Missing BGZF block size")
+
+        compressed_data = self.handle.read(block_size - BGZF_HEADER.size - extra_length)
+        self.block_size = block_size
+        self.block_data = zlib.decompress(compressed_data[: -BGZF_FOOTER.size], -15)
+
+    def seek(self, virtual_offset):
+        block_offset, position = virtual_offset >> 16, virtual_offset & 0xFFFF
+        if block_offset != self.block_offset:
+            self._load_block(block_offset)
+
+        self.position = position
+
+    def tell(self):
+        return (self.block_offset << 16) | self.position
+
+    def read(self, size):
+        chunks = []
+        while size > 0:
+            if self.position >= len(self.block_data):
+                if self.block_offset is None:
+                    self._load_block(0)
+                elif self.block_size:
+                    self._load_block(self.block_offset + self.block_size)
+                else:
+                    break
+
+                continue
+
+            chunk = self.block_data[self.position : self.position + size]
+            self.position += len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+
+        return b"".join(chunks)
+
+    def read_exactly(self, size):
+        data = self.read(size)
+        if len(data) != size:
+            raise BamError("Unexpected end of file")
+        return data
+
+
+class BgzfWriter:
+    """Write data to BGZF blocks in memory, tracking virtual file offsets."""
+
+    def __init__(self):
+        self.output = io.BytesIO()
+        self.buffer = bytearray()
+
+    def tell(self):
+        return (self.output.tell() << 16) | len(self.buffer)
+
+    def _flush_block(self):
+        data = bytes(self.buffer[:BGZF_MAX_BLOCK_DATA_SIZE])
+        del self.buffer[:BGZF_MAX_BLOCK_DATA_SIZE]
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        compressed_data = compressor.compress(data) + compressor.flush()
+        # Block size minus one, including the 6 byte extra field
+        block_size = BGZF_HEADER.size + 6 + len(compressed_data) + BGZF_FOOTER.size - 1
+
+        self.output.write(BGZF_HEADER.pack(31, 139, 8, 4, 0, 0, 255, 6))
+        self.output.write(struct.pack("<2sHH", b"BC", 2, block_size))
+        self.output.write(compressed_data)
+        self.output.write(BGZF_FOOTER.pack(zlib.crc32(data), len(data)))
+
+    def write(self, data, start_new_block_if_needed=True):
+        # Avoid splitting records across blocks when possible.
+        if (
+            start_new_block_if_needed
+            and self.buffer
+            and len(self.buffer) + len(data) > BGZF_MAX_BLOCK_DATA_SIZE
+        ):
+            self._flush_block()
+
+        self.buffer += data
+        while len(self.buffer) >= BGZF_MAX_BLOCK_DATA_SIZE:
+            self._flush_block()
+
+    def close(self):
+        while self.buffer:
+            self._flush_block()
+
+        self.output.write(BGZF_EOF)
+        return self.output.getvalue()
+
+
+def reg2bin(start, end):
+    """Return the smallest BAI bin containing the 0-based half open region [start, end)."""
+    end -= 1
+    for shift, offset in ((14, 4681), (17, 585), (20, 73), (23, 9), (26, 1)):
+        if start >> shift == end >> shift:
+            return offset + (start >> shift)
+    return 0
+
+
+def reg2bins(start, end):
+    """Return the BAI bins that may contain alignments overlapping [start, end)."""
+    end -= 1
+    bins = [0]
+    for shift, offset in ((26, 1), (23, 9), (20, 73), (17, 585), (14, 4681)):
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+    return bins
+
+
+def read_header(reader):
+    reader.seek(0)
+    if reader.read_exactly(4) != BAM_MAGIC:
+        raise BamError("Not a BAM file")
+
+    (text_length,) = struct.unpack("<i", reader.read_exactly(4))
+    text = reader.read_exactly(text_length)
+
+    (num_references,) = struct.unpack("<i", reader.read_exactly(4))
+    references = []
+    for _ in range(num_references):
+        (name_length,) = struct.unpack("<i", reader.read_exactly(4))
+        name = reader.read_exactly(name_length).rstrip(b"\x00").decode("ascii")
+        (length,) = struct.unpack("<i", reader.read_exactly(4))
+        references.append((name, length))
+
+    return BamHeader(text, references)
+
+
+def serialize_header(header):
+    parts = [BAM_MAGIC, struct.pack("<i", len(header.text)), header.text]
+    parts.append(struct.pack("<i", len(header.references)))
+    for name, length in header.references:
+        encoded_name = name.encode("ascii") + b"\x00"
+        parts.append(
+            struct.pack("<i", len(encoded_name)) + encoded_name + struct.pack("<i", length)
+        )
+    return b"".join(parts)
+
+
+def _skip_reference_index(index_data, offset):
+    """Return the offset of the end of the index for a reference starting at offset."""
+    (num_bins,) = struct.unpack_from("<i", index_data, offset)
+    offset += 4
+    for _ in range(num_bins):
+        (num_chunks,) = struct.unpack_from("<i", index_data, offset + 4)
+        offset += 8 + 16 * num_chunks
+    (num_intervals,) = struct.unpack_from("<i", index_data, offset)
+    return offset + 4 + 8 * num_intervals
+
+
+def _read_bin_chunks(index_data, offset, bins):
+    """
+    Return the chunks in the given bins of the index for a reference starting at offset, and the
+    offset of the reference's linear index.
+    """
+    chunks = []
+    (num_bins,) = struct.unpack_from("<i", index_data, offset)
+    offset += 4
+    for _ in range(num_bins):
+        bin_number, num_chunks = struct.unpack_from("<Ii", index_data, offset)
+        offset += 8
+        if bin_number in bins:
+            chunks.extend(
+                Chunk(*struct.unpack_from("<QQ", index_data, offset + 16 * i))
+                for i in range(num_chunks)
+            )
+        offset += 16 * num_chunks
+
+    return chunks, offset
+
+
+def _merge_chunks(chunks):
+    merged_chunks = []
+    for chunk in sorted(chunks):
+        if merged_chunks and chunk.start <= merged_chunks[-1].end:
+            merged_chunks[-1] = Chunk(
+                merged_chunks[-1].start, max(chunk.end, merged_chunks[-1].end)
+            )
+        else:
+            merged_chunks.append(chunk)
+
+    return merged_chunks
+
+
+def query_index(index_data, reference_id, start, end):
+    """
+    Return the merged chunks of virtual file offsets that may contain alignments overlapping
+    [start, end) on a reference from a BAI index.
+    """
+    if index_data[:4] != BAI_MAGIC:
+        raise BamError("Not a BAI file")
+
+    (num_references,) = struct.unpack_from("<i", index_data, 4)
+    if not 0 <= reference_id < num_references:
+        return []
+
+    offset = 8
+    # Skip indexes for previous references
+    for _ in range(reference_id):
+        offset = _skip_reference_index(index_data, offset)
+
+    chunks, offset = _read_bin_chunks(index_data, offset, set(reg2bins(start, end)))
+
+    (num_intervals,) = struct.unpack_from("<i", index_data, offset)
+    offset += 4
+    window = start >> BAI_LINEAR_SHIFT
+    min_offset = (
+        struct.unpack_from("<Q", index_data, offset + 8 * window)[0]
+        if window < num_intervals
+        else 0
+    )
+
+    return _merge_chunks(chunk for chunk in chunks if chunk.end > min_offset)
+
+
+def alignment_span(record):
+    """Return the reference ID and 0-based half open reference span of an alignment record."""
+    reference_id, position, read_name_length, _, _, num_cigar_ops = struct.unpack_from(
+        "<iiBBHH", record, 4
+    )
+    cigar_offset = 36 + read_name_length
+    reference_length = sum(
+        op >> 4
+        for op in struct.unpack_from(f"<{num_cigar_ops}I", record, cigar_offset)
+        if op & 0xF in CIGAR_REFERENCE_OPS
+    )
+    return reference_id, position, position + max(reference_length, 1)
+
+
+def iter_alignments(reader, chunks, reference_id, start, end):
+    """
+    Yield raw alignment records (including their block_size prefix) overlapping [start, end) on
+    a reference from the given chunks of a coordinate sorted BAM file.
+    """
+    for chunk in chunks:
+        reader.seek(chunk.start)
+        while reader.tell() < chunk.end:
+            size_data = reader.read(4)
+            if len(size_data) < 4:
+                break
+
+            (record_size,) = struct.unpack("<i", size_data)
+            record = size_data + reader.read_exactly(record_size)
+
+            record_reference_id, record_start, record_end = alignment_span(record)
+            if record_reference_id != reference_id or record_start >= end:
+                break
+
+            if record_end > start:
+                yield record
+
+
+class BamIndexBuilder:
+    """Build a BAI index for alignments as they are written to a BAM file."""
+
+    def __init__(self, num_references):
+        self.num_references = num_references
+        self.bins = [{} for _ in range(num_references)]
+        self.intervals = [[] for _ in range(num_references)]
+
+    def add(self, reference_id, start, end, start_offset, end_offset):
+        if reference_id < 0:
+            return
+
+        bin_chunks = self.bins[reference_id].setdefault(reg2bin(start, end), [])
+        if bin_chunks and bin_chunks[-1][1] == start_offset:
+            bin_chunks[-1] = (bin_chunks[-1][0], end_offset)
+        else:
+            bin_chunks.append((start_offset, end_offset))
+
+        intervals = self.intervals[reference_id]
+        last_window = (end - 1) >> BAI_LINEAR_SHIFT
+        if len(intervals) <= last_window:
+            intervals.extend([None] * (last_window + 1 - len(intervals)))
+        for window in range(start >> BAI_LINEAR_SHIFT, last_window + 1):
+            if intervals[window] is None:
+                intervals[window] = start_offset
+
+    def serialize(self):
+        parts = [BAI_MAGIC, struct.pack("<i", self.num_references)]
+        for bins, intervals in zip(self.bins, self.intervals):
+            parts.append(struct.pack("<i", len(bins)))
+            for bin_number, chunks in sorted(bins.items()):
+                parts.append(struct.pack("<Ii", bin_number, len(chunks)))
+                parts.extend(struct.pack("<QQ", *chunk) for chunk in chunks)
+
+            # Windows without alignments use the offset of the previous window.
+            filled_intervals = []
+            for interval in intervals:
+                filled_intervals.append(
+                    interval if interval is not None else (filled_intervals or [0])[-1]
+                )
+
+            parts.append(struct.pack("<i", len(filled_intervals)))
+            parts.extend(struct.pack("<Q", interval) for interval in filled_intervals)
+
+        return b"".join(parts)
+
+
+def write_bam(header, records):
+    """Return the contents of a BAM file and its BAI index for a header and alignment records."""
+    writer = BgzfWriter()
+    writer.write(serialize_header(header), start_new_block_if_needed=False)
+
+    index_builder = BamIndexBuilder(len(header.references))
+    for record in records:
+        start_offset = writer.tell()
+        writer.write(record)
+        reference_id, start, end = alignment_span(record)
+        index_builder.add(reference_id, start, end, start_offset, writer.tell())
+
+    return writer.close(), index_builder.serialize()
+
+
+def find_reference_id(header, chrom):
+    """Return the index of a chromosome in a BAM header, allowing for "chr" prefixes."""
+    chrom = chrom[3:] if chrom.startswith("chr") else chrom
+    names = [chrom, f"chr{chrom}"]
+    if chrom in ("M", "MT"):
+        names.extend(["M", "MT", "chrM", "chrMT"])
+
+    reference_names = [name for name, _ in header.references]
+    for name in names:
+        if name in reference_names:
+            return reference_names.index(name)
+
+    return None
+
+
+def slice_bam(bam_handle, index_data, chrom, start, end):
+    """
+    Return a BAM file and its BAI index containing only the alignments from a coordinate sorted
+    and indexed BAM file that overlap a region. start and end are 0-based and half open.
+
+    Only the BGZF blocks containing the header and chunks of the index that overlap the region
+    are read from bam_handle.
+    """
+    reader = BgzfReader(bam_handle)
+    header = read_header(reader)
+
+    reference_id = find_reference_id(header, chrom)
+    if reference_id is None:
+        records = []
+    else:
+        chunks = query_index(index_data, reference_id, start, end)
+        records = iter_alignments(reader, chunks, reference_id, start, end)
+
+    return write_bam(header, records)
@@ -0,0 +1,53 @@
+import uuid
+
+from django.core.cache import cache
+
+
+def _version_key(namespace, key):
+    return f"{namespace}:version:{key}"
+
+
+def get_cache_version(namespace, key):
+    """
+    Return the current version of cached values in a namespace for a key.
+
+    Cached values should include the version in their cache key, so that invalidating the
+    version makes all previously cached values for the key unreachable.
+    """
+    version_key = _version_key(namespace, key)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+
+    return version
+
+
+def invalidate_cache_version(namespace, key):
+    cache.set(_version_key(namespace, key), uuid.uuid4().hex, None)
+
+
+ASSIGNMENT_NAVIGATION_CACHE_NAMESPACE = "assignment-navigation"
+
+
+def invalidate_assignment_navigation(curator_ids):
+    """Invalidate cached assignment order for curators whose assignments or results changed."""
+    for curator_id in set(curator_ids):
+        invalidate_cache_version(ASSIGNMENT_NAVIGATION_CACHE_NAMESPACE, curator_id)
+
+
+PROJECT_PERMISSIONS_CACHE_NAMESPACE = "project-permissions"
+
+
+def invalidate_project_permissions(user_ids):
+    """Invalidate cached permissions for users whose project ownership or assignments changed."""
+    for user_id in set(user_ids):
+        invalidate_cache_version(PROJECT_PERMISSIONS_CACHE_NAMESPACE, user_id)
+
+
+CUSTOM_FLAGS_CACHE_NAMESPACE = "custom-flags"
+
+
+def invalidate_custom_flags():
+    """Invalidate the registry of custom flags held by each app server process."""
+    invalidate_cache_version(CUSTOM_FLAGS_CACHE_NAMESPACE, "registry")
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+
+from curation_portal.caching import CUSTOM_FLAGS_CACHE_NAMESPACE, get_cache_version
+from curation_portal.models import CustomFlag
+
+
+class CustomFlagRegistry:  # pylint: disable=too-few-public-methods
+    """Custom flags, in the order they were created, indexed by ID, key, and shortcut."""
+
+    def __init__(self, flags):
+        self.flags = flags
+        self.by_id = {flag.id: flag for flag in flags}
+        self.by_key = {flag.key: flag for flag in flags}
+        self.by_shortcut = {flag.shortcut: flag for flag in flags}
+
+
+# (version, expiration time, registry)
+_cached_registry = None  # pylint: disable=invalid-name
+
+
+def get_custom_flag_registry(refresh=False):
+    """
+    Return the registry of custom flags, loading it from the database if it has changed.
+
+    The registry is held in memory by each process. Saving or deleting a custom flag changes the
+    cache version, so with a shared cache, all processes reload flags on their next request. The
+    registry is also reloaded after CURATION_PORTAL_CUSTOM_FLAGS_CACHE_TIMEOUT seconds, for
+    processes that do not share a cache with the process that changed flags.
+    """
+    global _cached_registry  # pylint: disable=global-statement,invalid-name
+
+    # Get the version before loading flags, so that flags changed while loading are reloaded
+    # on the next call.
+    version = get_cache_version(CUSTOM_FLAGS_CACHE_NAMESPACE, "registry")
+    cached_registry = _cached_registry
+    if (
+        refresh
+        or cached_registry is None
+        or cached_registry[0] != version
+        or cached_registry[1] <= time.monotonic()
+    ):
+        registry = CustomFlagRegistry(list(CustomFlag.objects.order_by("id")))
+        cached_registry = (
+            version,
+            time.monotonic() + settings.CURATION_PORTAL_CUSTOM_FLAGS_CACHE_TIMEOUT,
+            registry,
+        )
+        _cached_registry = cached_registry
+
+    return cached_registry[2]
+
+
+def get_custom_flags_by_key(flag_keys):
+    """
+    Return a dictionary of custom flags for the given keys.
+
+    If any key is not in the registry, the registry is reloaded in case the flag was created
+    by another process. Keys that do not match any flag are omitted from the result.
+    """
+    registry = get_custom_flag_registry()
+    if any(flag_key not in registry.by_key for flag_key in flag_keys):
+        registry = get_custom_flag_registry(refresh=True)
+
+    return {
+        flag_key: registry.by_key[flag_key] for flag_key in flag_keys if flag_key in registry.by_key
+    }
@@ -0,0 +1,144 @@
+import csv
+import json
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
+
+from curation_portal.custom_flags import get_custom_flag_registry
+from curation_portal.ingest import chunked
+from curation_portal.models import (
+    CustomFlagCurationResult,
+    VariantAnnotation,
+    FLAG_FIELDS,
+    FLAG_LABELS,
+)
+
+# Number of rows fetched from the database cursor (and prefetched together) at a time.
+EXPORT_CHUNK_SIZE = 2000
+
+# These are the curation result fields included in exported result files
+RESULT_FIELDS = ["notes", "curator_comments", "should_revisit", "verdict", *FLAG_FIELDS]
+
+
+def get_result_field_label(field):
+    return FLAG_LABELS.get(field, " ".join(word.capitalize() for word in field.split("_")))
+
+
+def iterate_in_chunks(queryset, prefetch_lookups=(), chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield objects from queryset without loading the entire queryset into memory.
+
+    Rows are read from the database with a server side cursor. Since QuerySet.iterator ignores
+    prefetch_related, related objects are prefetched for each chunk of rows instead.
+    """
+    for chunk in chunked(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        prefetch_related_objects(chunk, *prefetch_lookups)
+        yield from chunk
+
+
+class _Echo:  # pylint: disable=too-few-public-methods
+    """File-like object that returns written values instead of buffering them."""
+
+    def write(self, value):  # pylint: disable=no-self-use
+        return value
+
+
+def stream_csv(header_row, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header_row)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_json_array(items):
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + json.dumps(item)
+    yield "]"
+
+
+ANNOTATIONS_PREFETCH = Prefetch(
+    "variant__annotations",
+    queryset=VariantAnnotation.objects.only(
+        "variant_id", "gene_id", "gene_symbol", "transcript_id"
+    ),
+)
+
+CUSTOM_FLAGS_PREFETCH = Prefetch(
+    "result__custom_flags",
+    queryset=CustomFlagCurationResult.objects.only("result_id", "flag_id", "checked"),
+)
+
+
+def get_assignment_genes(assignment):
+    return ";".join(
+        set(
+            f"{annotation.gene_id}:{annotation.gene_symbol}"
+            for annotation in assignment.variant.annotations.all()
+        )
+    )
+
+
+def get_assignment_transcripts(assignment):
+    return ";".join(
+        set(annotation.transcript_id for annotation in assignment.variant.annotations.all())
+    )
+
+
+def results_csv_response(assignments_qs, columns, filename):
+    """
+    Return a streaming CSV response containing the results for a queryset of assignments.
+
+    columns is a list of (header, function) pairs for the columns that precede the result fields.
+    Each function is called with an assignment and returns that column's value.
+
+    Custom flags are read from the registry once and annotations and custom flag results are
+    prefetched for each chunk of assignments, so the number of queries does not depend on the
+    number of rows.
+    """
+    custom_flags = get_custom_flag_registry().flags
+
+    header_row = (
+        [header for header, _ in columns]
+        + [get_result_field_label(f) for f in RESULT_FIELDS]
+        # Custom flag headers
+        + [f.label for f in custom_flags]
+    )
+
+    def get_rows():
+        for assignment in iterate_in_chunks(
+            assignments_qs, [ANNOTATIONS_PREFETCH, CUSTOM_FLAGS_PREFETCH]
+        ):
+            # Only checked custom flags are stored.
+            checked_flag_ids = {
+                flag_result.flag_id
+                for flag_result in assignment.result.custom_flags.all()
+                if flag_result.checked
+            }
+
+            yield (
+                [get_value(assignment) for _, get_value in columns]
+                + [getattr(assignment.result, f) for f in RESULT_FIELDS]
+                # Custom flag results
+                + [flag.id in checked_flag_ids for flag in custom_flags]
+            )
+
+    response = StreamingHttpResponse(stream_csv(header_row, get_rows()), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def results_json_response(assignments_qs, serializer, filename):
+    """
+    Return a streaming JSON response containing serialized results for a queryset of assignments.
+    """
+    assignments = iterate_in_chunks(assignments_qs, [CUSTOM_FLAGS_PREFETCH])
+
+    response = StreamingHttpResponse(
+        stream_json_array(
+            serializer.to_representation(assignment.result) for assignment in assignments
+        ),
+        content_type="application/json",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
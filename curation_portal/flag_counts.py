@@ -0,0 +1,71 @@
+from collections import Counter, namedtuple
+from itertools import combinations
+
+from django.db.models import Count
+
+from curation_portal.models import FLAG_FIELDS
+from curation_portal.verdict import allowed_verdicts_for_flags
+
+FlagCounts = namedtuple(
+    "FlagCounts", ["num_results", "flags", "co_occurrence", "num_invalid_verdicts"]
+)
+
+
+def get_flag_indices(flags_bitmask):
+    """Return the positions in FLAG_FIELDS of the flags checked in a bitmask."""
+    indices = []
+    while flags_bitmask:
+        lowest_bit = flags_bitmask & -flags_bitmask
+        indices.append(lowest_bit.bit_length() - 1)
+        flags_bitmask ^= lowest_bit
+
+    return indices
+
+
+def get_flag_counts(results):
+    """
+    Count checked flags in a queryset of curation results.
+
+    Returns the number of results, the number of results with each flag checked, the number of
+    results with each pair of flags checked (keyed by pairs of flags in the order of
+    FLAG_FIELDS), and the number of results with a verdict that is not allowed for their flags.
+
+    Results are counted by flags bitmask and verdict in a single query, so flags are only
+    unpacked once for each distinct combination of flags.
+    """
+    rows = (
+        results.order_by().values_list("flags_bitmask", "verdict").annotate(num_results=Count("id"))
+    )
+
+    num_invalid_verdicts = 0
+    bitmask_counts = Counter()
+    for flags_bitmask, verdict, count in rows:
+        bitmask_counts[flags_bitmask] += count
+        if verdict and verdict not in allowed_verdicts_for_flags(flags_bitmask):
+            num_invalid_verdicts += count
+
+    # Count flags and pairs of flags by their positions in FLAG_FIELDS.
+    num_flags = len(FLAG_FIELDS)
+    flag_counts = [0] * num_flags
+    co_occurrence_counts = [0] * (num_flags * num_flags)
+    for flags_bitmask, count in bitmask_counts.items():
+        indices = get_flag_indices(flags_bitmask)
+        for position, index in enumerate(indices):
+            flag_counts[index] += count
+            for other_index in indices[position + 1 :]:
+                co_occurrence_counts[index * num_flags + other_index] += count
+
+    return FlagCounts(
+        sum(bitmask_counts.values()),
+        Counter({flag: count for flag, count in zip(FLAG_FIELDS, flag_counts) if count}),
+        Counter(
+            {
+                (flag, other_flag): co_occurrence_counts[index * num_flags + other_index]
+                for (index, flag), (other_index, other_flag) in combinations(
+                    enumerate(FLAG_FIELDS), 2
+                )
+                if co_occurrence_counts[index * num_flags + other_index]
+            }
+        ),
+        num_invalid_verdicts,
+    )
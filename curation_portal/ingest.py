@@ -0,0 +1,78 @@
+import gzip
+import io
+import itertools
+import json
+
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Raw stream that replays bytes already read from the start of another stream."""
+
+    def __init__(self, prefix, stream):
+        super().__init__()
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            n = min(len(buffer), len(self.prefix))
+            buffer[:n] = self.prefix[:n]
+            self.prefix = self.prefix[n:]
+            return n
+
+        data = self.stream.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
+
+def open_upload_stream(stream):
+    """
+    Wrap a binary stream so that it can be read line by line.
+
+    Gzip compressed streams are detected by their magic number and decompressed on the fly.
+    """
+    prefix = stream.read(len(GZIP_MAGIC_NUMBER)) if stream else b""
+    buffered_stream = io.BufferedReader(_PrefixedStream(prefix, stream or io.BytesIO()))
+    if prefix == GZIP_MAGIC_NUMBER:
+        return gzip.GzipFile(fileobj=buffered_stream, mode="rb")
+
+    return buffered_stream
+
+
+class NDJSONDecodeError(ValueError):
+    def __init__(self, line_number, message):
+        super().__init__(message)
+        self.line_number = line_number
+
+
+def iter_ndjson(stream):
+    """
+    Yield (line number, value) pairs for each non-blank line in a newline delimited JSON stream.
+
+    Lines that are not valid JSON are yielded as NDJSONDecodeError instances instead of raising,
+    so that callers can report all invalid lines in a chunk.
+    """
+    for line_number, line in enumerate(open_upload_stream(stream), 1):
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            yield line_number, NDJSONDecodeError(line_number, f"Invalid JSON: {error}")
+
+
+def chunked(iterable, chunk_size):
+    """Yield lists of up to chunk_size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        yield chunk
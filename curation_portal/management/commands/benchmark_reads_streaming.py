@@ -0,0 +1,149 @@
+import math
+import threading
+import time
+import urllib.request
+from urllib.error import URLError
+
+from django.core.management import BaseCommand, CommandError
+
+BLOCK_SIZE = 64 * 1024
+
+
+def percentile(values, n):
+    """Return the nearest-rank nth percentile of a list of values."""
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[max(math.ceil(n / 100 * len(values)) - 1, 0)]
+
+
+def summarize_results(results, concurrency, elapsed):
+    """
+    Return a row of the results table for one level of concurrency. results contains a
+    (time to first byte, latency, number of bytes, error) tuple for each request.
+    """
+    completed = [result for result in results if result[3] is None]
+    num_errors = len(results) - len(completed)
+    times_to_first_byte = [result[0] for result in completed]
+    latencies = [result[1] for result in completed]
+    total_bytes = sum(result[2] for result in completed)
+
+    return (
+        f"{concurrency:>11} {len(completed):>9} {num_errors:>7} "
+        f"{len(completed) / elapsed:>7.1f} {total_bytes / elapsed / 1024 / 1024:>8.2f} "
+        f"{percentile(times_to_first_byte, 50):>9.3f} {percentile(times_to_first_byte, 95):>9.3f} "
+        f"{percentile(latencies, 95):>12.3f}"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many curators can stream reads files concurrently from a running server. "
+        "Each simulated curator repeatedly downloads a URL (for example, a reads file from "
+        "api/project/<id>/variant/<id>/reads/) at a limited rate for the given duration."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", type=str, help="URL to download")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4, 8, 16, 32],
+            help="Numbers of concurrent curators to simulate",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Number of seconds to run each level of concurrency for",
+        )
+        parser.add_argument(
+            "--header",
+            type=str,
+            action="append",
+            default=[],
+            help=(
+                "Header to send with requests, in the format 'Name: value'. "
+                "For example, 'Remote-User: curator@example.com'. Can be repeated."
+            ),
+        )
+        parser.add_argument(
+            "--read-rate",
+            type=int,
+            default=1024 * 1024,
+            help=(
+                "Rate in bytes per second at which each curator reads responses, "
+                "to simulate browsers on slow connections. 0 for no limit. Defaults to 1 MiB/s."
+            ),
+        )
+
+    def run_curator(self, request, deadline, read_rate, results):  # pylint: disable=no-self-use
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            time_to_first_byte = None
+            num_bytes = 0
+            try:
+                with urllib.request.urlopen(request) as response:
+                    while True:
+                        block = response.read(BLOCK_SIZE)
+                        if time_to_first_byte is None:
+                            time_to_first_byte = time.perf_counter() - started_at
+                        if not block:
+                            break
+
+                        num_bytes += len(block)
+                        if read_rate:
+                            # Wait until the time at which this many bytes would have been read
+                            delay = (
+                                started_at
+                                + time_to_first_byte
+                                + num_bytes / read_rate
+                                - time.perf_counter()
+                            )
+                            if delay > 0:
+                                time.sleep(delay)
+            except (URLError, OSError) as error:
+                results.append((None, None, 0, error))
+                continue
+
+            results.append((time_to_first_byte, time.perf_counter() - started_at, num_bytes, None))
+
+    def run_benchmark(self, request, concurrency, duration, read_rate):
+        results = []
+        started_at = time.perf_counter()
+        deadline = started_at + duration
+
+        threads = [
+            threading.Thread(target=self.run_curator, args=(request, deadline, read_rate, results))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - started_at
+        errors = [result[3] for result in results if result[3] is not None]
+        if errors:
+            self.stderr.write(f"{len(errors)} requests failed, for example: {errors[0]}")
+
+        return summarize_results(results, concurrency, elapsed)
+
+    def handle(self, *args, **options):
+        headers = {}
+        for header in options["header"]:
+            name, separator, value = header.partition(":")
+            if not separator:
+                raise CommandError(f"Invalid header '{header}'")
+            headers[name.strip()] = value.strip()
+
+        request = urllib.request.Request(options["url"], headers=headers)
+
+        self.stdout.write(
+            "concurrency  requests  errors   req/s    MiB/s  TTFB p50  TTFB p95  latency p95"
+        )
+        for concurrency in options["concurrency"]:
+            self.stdout.write(
+                self.run_benchmark(request, concurrency, options["duration"], options["read_rate"])
+            )
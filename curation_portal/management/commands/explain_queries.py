@@ -0,0 +1,198 @@
+import random
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from curation_portal.constants import RANKED_CONSEQUENCE_TERMS, VERDICTS
+from curation_portal.filters import AssignmentFilter
+from curation_portal.models import (
+    CurationAssignment,
+    CurationResult,
+    Project,
+    User,
+    Variant,
+    VariantAnnotation,
+)
+from curation_portal.serializers import BULK_CREATE_BATCH_SIZE, get_xpos
+
+BASES = ["A", "C", "G", "T"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Record query plans for frequently used queries in a project with synthetic data. "
+        "To compare plans before and after a migration, run this command, migrate, and run it "
+        "again with the same project. Use a separate database, since the synthetic project "
+        "contains about a million variants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            type=str,
+            default="query-benchmark",
+            help="Name of project with synthetic data",
+        )
+        parser.add_argument(
+            "--create-fixture",
+            action="store_true",
+            help="Create the project with synthetic data. Refused if the database has other projects.",
+        )
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic variants to create with --create-fixture",
+        )
+        parser.add_argument(
+            "--curators",
+            type=int,
+            default=5,
+            help="Number of curators to assign synthetic variants to with --create-fixture",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Path to file to write query plans to. Defaults to standard output.",
+        )
+
+    def create_synthetic_batch(self, project, batch, curators, rng):  # pylint: disable=no-self-use
+        variants = []
+        for i in batch:
+            chrom = str(i % 22 + 1)
+            pos = 10_000 + i * 10
+            ref = rng.choice(BASES)
+            alt = rng.choice([base for base in BASES if base != ref])
+            variants.append(
+                Variant(
+                    project=project,
+                    variant_id=f"{chrom}-{pos}-{ref}-{alt}",
+                    chrom=chrom,
+                    pos=pos,
+                    xpos=get_xpos(chrom, pos),
+                    ref=ref,
+                    alt=alt,
+                )
+            )
+        Variant.objects.bulk_create(variants)
+
+        VariantAnnotation.objects.bulk_create(
+            VariantAnnotation(
+                variant=variant,
+                consequence=rng.choice(RANKED_CONSEQUENCE_TERMS),
+                gene_id=f"ENSG{i // 50:011}",
+                gene_symbol=f"GENE{i // 50}",
+                transcript_id=f"ENST{i:011}",
+            )
+            for i, variant in zip(batch, variants)
+        )
+
+        # Give about half of the assignments a result
+        results = {
+            i: CurationResult(verdict=rng.choice([None, *VERDICTS]))
+            for i in batch
+            if rng.random() < 0.5
+        }
+        CurationResult.objects.bulk_create(results.values())
+
+        CurationAssignment.objects.bulk_create(
+            CurationAssignment(
+                curator=curators[i % len(curators)], variant=variant, result=results.get(i)
+            )
+            for i, variant in zip(batch, variants)
+        )
+
+    def create_synthetic_data(self, project, num_variants, num_curators):
+        rng = random.Random(0)
+
+        curators = [
+            User.objects.get_or_create(username=f"{project.name}-curator-{i}")[0]
+            for i in range(num_curators)
+        ]
+
+        for batch_start in range(0, num_variants, BULK_CREATE_BATCH_SIZE):
+            batch = range(batch_start, min(batch_start + BULK_CREATE_BATCH_SIZE, num_variants))
+            with transaction.atomic():
+                self.create_synthetic_batch(project, batch, curators, rng)
+
+            self.stderr.write(f"Created {batch.stop} / {num_variants} variants")
+
+        with connection.cursor() as cursor:
+            for model in [Variant, VariantAnnotation, CurationAssignment, CurationResult]:
+                table = model._meta.db_table  # pylint: disable=protected-access
+                cursor.execute(f"ANALYZE {table}")
+
+    def get_queries(self, project):  # pylint: disable=no-self-use
+        curator = User.objects.filter(curation_assignment__variant__project=project).first()
+        variant = Variant.objects.filter(project=project).order_by("?").first()
+        annotation = variant.annotations.first()
+
+        curator_assignments = curator.curation_assignments.filter(variant__project=project)
+
+        def filtered_assignments(**params):
+            return AssignmentFilter(params, curator_assignments).qs.order_by(
+                "variant__xpos", "variant__ref", "variant__alt"
+            )
+
+        return [
+            ("Variant by ID", Variant.objects.filter(variant_id=variant.variant_id)),
+            (
+                "Assignments for variant ID",
+                CurationAssignment.objects.filter(variant__variant_id=variant.variant_id),
+            ),
+            ("Project variants", Variant.objects.filter(project=project).order_by("xpos")[:100]),
+            (
+                "Curator assignments",
+                filtered_assignments().values_list("variant", "variant__variant_id"),
+            ),
+            ("Assignments without verdict", filtered_assignments(result__verdict__isnull=True)),
+            (
+                "Assignments by gene",
+                filtered_assignments(variant__annotation__gene_symbol=annotation.gene_symbol),
+            ),
+            (
+                "Assignments by consequence",
+                filtered_assignments(variant__annotation__consequence=annotation.consequence),
+            ),
+            (
+                "Assignments containing consequence",
+                filtered_assignments(variant__annotation__consequence__contains="frameshift"),
+            ),
+        ]
+
+    def get_query_plans(self, project):
+        """Return the label, SQL, and analyzed query plan of each query."""
+        return [
+            (label, str(queryset.query), queryset.explain(analyze=True, buffers=True))
+            for label, queryset in self.get_queries(project)
+        ]
+
+    def handle(self, *args, **options):
+        if options["create_fixture"]:
+            if Project.objects.exists():
+                raise CommandError(
+                    "Database already contains projects. "
+                    "Synthetic data should only be created in a separate database."
+                )
+
+            project = Project.objects.create(name=options["project"])
+            self.create_synthetic_data(project, options["variants"], options["curators"])
+        else:
+            try:
+                project = Project.objects.get(name=options["project"])
+            except Project.DoesNotExist as error:
+                raise CommandError(
+                    f"Project '{options['project']}' does not exist. "
+                    "Use --create-fixture to create it with synthetic data."
+                ) from error
+
+        query_plans = self.get_query_plans(project)
+
+        output = options["output"].open("w") if options["output"] else self.stdout
+        try:
+            for label, query, plan in query_plans:
+                output.write(f"# {label}\n\n{query}\n\n{plan}\n\n")
+        finally:
+            if options["output"]:
+                output.close()
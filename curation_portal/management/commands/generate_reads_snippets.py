@@ -0,0 +1,128 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from curation_portal.models import Project
+from curation_portal.reads_snippets import SnippetTask, create_snippet
+
+# Report progress after this many snippets.
+PROGRESS_INTERVAL = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Create snippets of the BAM files listed for a project's variants, containing only the "
+        "alignments around each variant. Snippets are served instead of the full BAM files. "
+        "Existing snippets are skipped, so an interrupted run can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int, help="ID of project to create snippets for")
+        parser.add_argument(
+            "--snippets-dir",
+            type=str,
+            default=settings.CURATION_PORTAL_READS_SNIPPETS_DIR,
+            help=(
+                "Local path or cloud storage URL to write snippets to. "
+                "Defaults to CURATION_PORTAL_READS_SNIPPETS_DIR."
+            ),
+        )
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=settings.CURATION_PORTAL_READS_SLICE_WINDOW,
+            help=(
+                "Number of bases on either side of each variant to include. "
+                "Defaults to CURATION_PORTAL_READS_SLICE_WINDOW."
+            ),
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes to use. Defaults to the number of CPUs.",
+        )
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Recreate existing snippets",
+        )
+
+    def get_tasks(self, project, snippets_dir, window):  # pylint: disable=no-self-use
+        variants = (
+            project.variants.exclude(reads__isnull=True)
+            .order_by("xpos", "ref", "alt")
+            .values_list("variant_id", "chrom", "pos", "ref", "reads")
+        )
+
+        return [
+            SnippetTask(snippets_dir, variant_id, chrom, pos, ref, reads_file, window)
+            for variant_id, chrom, pos, ref, reads in variants.iterator()
+            for reads_file in reads
+            if reads_file.endswith(".bam")
+        ]
+
+    def report_progress(self, num_tasks, counts, total_size, started_at):
+        elapsed = time.perf_counter() - started_at
+        num_processed = sum(counts.values())
+        self.stderr.write(
+            f"Processed {num_processed} / {num_tasks} snippets "
+            f"({counts['created']} created, {counts['skipped']} skipped, "
+            f"{counts['failed']} failed) in {elapsed:.1f}s, "
+            f"{num_processed / elapsed if elapsed else 0:.1f} snippets/s, "
+            f"{total_size / elapsed / 1024 / 1024 if elapsed else 0:.2f} MiB/s written"
+        )
+
+    def handle(self, *args, **options):
+        if not options["snippets_dir"]:
+            raise CommandError(
+                "Either --snippets-dir or CURATION_PORTAL_READS_SNIPPETS_DIR must be set."
+            )
+
+        if options["processes"] < 1:
+            raise CommandError("--processes must be at least 1.")
+
+        try:
+            project = Project.objects.get(id=options["project_id"])
+        except Project.DoesNotExist as error:
+            raise CommandError(f"Project {options['project_id']} does not exist.") from error
+
+        tasks = self.get_tasks(project, options["snippets_dir"], options["window"])
+
+        started_at = time.perf_counter()
+        counts = Counter()
+        total_size = 0
+
+        process_task = partial(create_snippet, overwrite=options["overwrite"])
+        if options["processes"] == 1:
+            results = map(process_task, tasks)
+            executor = None
+        else:
+            # Database connections must not be shared with worker processes.
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options["processes"])
+            results = executor.map(process_task, tasks, chunksize=16)
+
+        try:
+            for result in results:
+                counts[result.status] += 1
+                total_size += result.size
+                if result.error:
+                    self.stderr.write(
+                        f"Failed to create snippet of {result.task.reads_file} "
+                        f"for {result.task.variant_id}: {result.error}"
+                    )
+
+                if sum(counts.values()) % PROGRESS_INTERVAL == 0:
+                    self.report_progress(len(tasks), counts, total_size, started_at)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        self.report_progress(len(tasks), counts, total_size, started_at)
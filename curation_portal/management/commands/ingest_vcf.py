@@ -0,0 +1,323 @@
+import io
+import json
+import os
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from curation_portal.models import Project, Variant, VariantAnnotation, VariantTag
+from curation_portal.serializers import VariantSerializer, variant_id_parts
+from curation_portal.vcf import VcfError, VcfVariantReader, open_vcf, read_header
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def format_array(values):
+    """Format a list as a PostgreSQL array literal."""
+    items = []
+    for value in values:
+        if value is None:
+            items.append("NULL")
+        elif isinstance(value, (list, tuple)):
+            items.append(format_array(value))
+        elif isinstance(value, (int, float)):
+            items.append(str(value))
+        else:
+            items.append('"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"')
+
+    return "{" + ",".join(items) + "}"
+
+
+def format_copy_value(value):
+    """Format a value for PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+
+    if isinstance(value, bool):
+        return "t" if value else "f"
+
+    if isinstance(value, (list, tuple)):
+        value = format_array(value)
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_objects(cursor, model, objects):
+    """Insert model instances using COPY. Primary keys must already be set."""
+    fields = model._meta.concrete_fields  # pylint: disable=protected-access
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+    data = io.StringIO()
+    for obj in objects:
+        data.write("\t".join(format_copy_value(getattr(obj, field.attname)) for field in fields))
+        data.write("\n")
+
+    data.seek(0)
+    cursor.copy_expert(
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN",
+        data,
+    )
+
+
+def reserve_ids(cursor, model, count):
+    """Reserve primary keys from a model's ID sequence."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        [model._meta.db_table, count],  # pylint: disable=protected-access
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def iter_batches(positions, batch_size):
+    """
+    Group variants into batches of at least batch_size variants. Variants at the same position
+    are always in the same batch, so that a batch's last line number can be used as a checkpoint.
+    """
+    batch = []
+    for last_line_number, variants in positions:
+        batch.extend(variants)
+        if len(batch) >= batch_size:
+            yield last_line_number, batch
+            batch = []
+
+    if batch:
+        yield last_line_number, batch  # pylint: disable=undefined-loop-variable
+
+
+def parse_tag_fields(values):
+    """Parse --tag-field arguments into a map of INFO fields to tag labels."""
+    tag_fields = {}
+    for value in values:
+        field, _, label = value.partition("=")
+        tag_fields[field] = label or field
+
+    return tag_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Import LoF variants from a VCF file annotated with VEP into a project, without first "
+        "converting it to JSON. Variants are validated the same way as uploaded variants and "
+        "inserted in batches, each in its own transaction. Liftover variant IDs are only read "
+        "from the liftover_38 (or for GRCh38 files, liftover_37) INFO field. Variants are not "
+        "lifted over with a chain file, so variants without that field are imported without a "
+        "liftover variant ID; use scripts/convert_vcf_to_json.py to lift them over."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int, help="ID of project to add variants to")
+        parser.add_argument("vcf_path", help="Path to VCF file. May be gzip or bgzip compressed.")
+        parser.add_argument(
+            "--reference-genome",
+            choices=("GRCh37", "GRCh38"),
+            default="GRCh37",
+            help="Reference genome of the VCF file. Defaults to GRCh37.",
+        )
+        parser.add_argument(
+            "--tag-field",
+            action="append",
+            default=[],
+            help=(
+                "INFO field to import as a variant tag, as FIELD or FIELD=LABEL. "
+                "May be given multiple times."
+            ),
+        )
+        parser.add_argument(
+            "--max-samples",
+            type=int,
+            default=100,
+            help="Maximum number of carriers to list for each variant. Defaults to 100.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=(
+                "Number of variants to insert in each transaction. "
+                f"Defaults to {DEFAULT_BATCH_SIZE}."
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "Path to a file to record progress in after each batch. If the file exists, "
+                "rows up to the recorded line are skipped, so that an interrupted import can "
+                "be resumed."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Read and validate variants without saving them",
+        )
+
+    def read_checkpoint(self, checkpoint_path, project, vcf_path):  # pylint: disable=no-self-use
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return 0
+
+        with open(checkpoint_path, encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+
+        if checkpoint["project"] != project.id or checkpoint["vcf"] != os.path.abspath(vcf_path):
+            raise CommandError(
+                f"Checkpoint {checkpoint_path} is for a different project or VCF file."
+            )
+
+        return checkpoint["line"]
+
+    def write_checkpoint(  # pylint: disable=no-self-use
+        self, checkpoint_path, project, vcf_path, line_number
+    ):
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(
+                {"project": project.id, "vcf": os.path.abspath(vcf_path), "line": line_number},
+                checkpoint_file,
+            )
+
+        os.replace(temp_path, checkpoint_path)
+
+    def validate_batch(self, project, batch):  # pylint: disable=no-self-use
+        serializer = VariantSerializer(
+            data=[variant for _, variant in batch], context={"project": project}, many=True
+        )
+        if serializer.is_valid():
+            return serializer.validated_data
+
+        if isinstance(serializer.errors, dict):
+            # Errors for the batch as a whole, such as duplicate variants.
+            raise CommandError(f"Invalid variants: {serializer.errors}")
+
+        line_errors = [
+            f"Line {line_number} ({variant['variant_id']}): {item_errors}"
+            for (line_number, variant), item_errors in zip(batch, serializer.errors)
+            if item_errors
+        ]
+        raise CommandError("Invalid variants:\n" + "\n".join(line_errors))
+
+    def save_batch(self, project, validated_data):  # pylint: disable=no-self-use
+        with transaction.atomic(), connection.cursor() as cursor:
+            variant_pks = reserve_ids(cursor, Variant, len(validated_data))
+
+            variants = []
+            annotations = []
+            tags = []
+            for item, variant_pk in zip(validated_data, variant_pks):
+                item = dict(item)
+                annotations.extend(
+                    VariantAnnotation(**annotation, variant_id=variant_pk)
+                    for annotation in item.pop("annotations", None) or []
+                )
+                tags.extend(
+                    VariantTag(**tag, variant_id=variant_pk) for tag in item.pop("tags", None) or []
+                )
+                variants.append(
+                    Variant(
+                        **item,
+                        **variant_id_parts(item["variant_id"]),
+                        id=variant_pk,
+                        project=project,
+                    )
+                )
+
+            for model, objects in ((VariantAnnotation, annotations), (VariantTag, tags)):
+                for obj, obj_id in zip(objects, reserve_ids(cursor, model, len(objects))):
+                    obj.id = obj_id
+
+            copy_objects(cursor, Variant, variants)
+            copy_objects(cursor, VariantAnnotation, annotations)
+            copy_objects(cursor, VariantTag, tags)
+
+    def report_progress(self, counts, started_at, verb):
+        elapsed = time.perf_counter() - started_at
+        self.stderr.write(
+            f"{verb} {counts['variants']} variants ({counts['annotations']} annotations, "
+            f"{counts['tags']} tags) from {counts['rows']} rows in {elapsed:.1f}s, "
+            f"{counts['rows'] / elapsed if elapsed else 0:.0f} rows/s, "
+            f"{counts['variants'] / elapsed if elapsed else 0:.0f} variants/s"
+        )
+
+    def import_batches(self, project, reader, positions, options):
+        """Validate and save variants in batches. Returns counts of the imported objects."""
+        dry_run = options["dry_run"]
+        verb = "Validated" if dry_run else "Imported"
+
+        started_at = time.perf_counter()
+        counts = {"rows": 0, "variants": 0, "annotations": 0, "tags": 0, "missing_liftovers": 0}
+        for last_line_number, batch in iter_batches(positions, options["batch_size"]):
+            validated_data = self.validate_batch(project, batch)
+
+            counts["rows"] = reader.num_rows
+            counts["variants"] += len(validated_data)
+            counts["annotations"] += sum(
+                len(item.get("annotations") or []) for item in validated_data
+            )
+            counts["tags"] += sum(len(item.get("tags") or []) for item in validated_data)
+            counts["missing_liftovers"] += sum(
+                1 for item in validated_data if not item.get("liftover_variant_id")
+            )
+
+            if not dry_run:
+                self.save_batch(project, validated_data)
+                if options["checkpoint"]:
+                    self.write_checkpoint(
+                        options["checkpoint"], project, options["vcf_path"], last_line_number
+                    )
+
+            self.report_progress(counts, started_at, verb)
+
+        counts["rows"] = reader.num_rows
+        self.report_progress(counts, started_at, verb)
+        return counts
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        try:
+            project = Project.objects.get(id=options["project_id"])
+        except Project.DoesNotExist as error:
+            raise CommandError(f"Project {options['project_id']} does not exist.") from error
+
+        vcf_path = options["vcf_path"]
+        checkpoint_line = self.read_checkpoint(options["checkpoint"], project, vcf_path)
+        if checkpoint_line:
+            self.stderr.write(f"Resuming after line {checkpoint_line}")
+
+        try:
+            with open_vcf(vcf_path) as vcf_file:
+                header_line_number, header = read_header(vcf_file)
+                reader = VcfVariantReader(
+                    header,
+                    reference_genome=options["reference_genome"],
+                    tag_fields=parse_tag_fields(options["tag_field"]),
+                    max_samples=options["max_samples"],
+                )
+
+                # Rows up to the checkpoint were imported by a previous run.
+                first_line_number = max(header_line_number, checkpoint_line) + 1
+                for _ in range(first_line_number - header_line_number - 1):
+                    if not vcf_file.readline():
+                        break
+
+                positions = reader.iter_positions(vcf_file, first_line_number)
+                counts = self.import_batches(project, reader, positions, options)
+        except (OSError, EOFError, VcfError) as error:
+            raise CommandError(f"Unable to read {vcf_path}: {error}") from error
+
+        if counts["variants"] and not options["dry_run"]:
+            project.save()  # Save project to set updated_at timestamp
+
+        self.stderr.write(f"Skipped {reader.num_skipped_rows} rows without LoF annotations")
+        if counts["missing_liftovers"]:
+            self.stderr.write(
+                f"{counts['missing_liftovers']} variants have no {reader.liftover_field} INFO "
+                "field and have no liftover variant ID"
+            )
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.28 on 2026-10-17 11:27
+
+from django.db import migrations, models
+
+
+def create_consequence_trigram_index(apps, schema_editor):  # pylint: disable=unused-argument
+    # Creating extensions may require privileges that the database user does not have, so the
+    # index is only created if the pg_trgm extension has already been installed.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if not cursor.fetchone():
+            return
+
+    schema_editor.execute(
+        "CREATE INDEX curation_annot_csq_trgm_idx ON curation_variant_annotation "
+        "USING gin (consequence gin_trgm_ops)"
+    )
+
+
+def drop_consequence_trigram_index(apps, schema_editor):  # pylint: disable=unused-argument
+    schema_editor.execute("DROP INDEX IF EXISTS curation_annot_csq_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("curation_portal", "0021_auto_20240108_0355"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="curationassignment",
+            index=models.Index(fields=["curator", "variant"], name="curation_assign_cur_var_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="curationresult",
+            index=models.Index(
+                condition=models.Q(verdict__isnull=True),
+                fields=["id"],
+                name="curation_result_no_verdict_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="variant",
+            index=models.Index(fields=["variant_id"], name="curation_variant_vid_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="variant",
+            index=models.Index(
+                fields=["project", "xpos", "ref", "alt"], name="curation_variant_pos_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="variantannotation",
+            index=models.Index(fields=["gene_symbol"], name="curation_annot_gene_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="variantannotation",
+            index=models.Index(fields=["consequence"], name="curation_annot_csq_idx"),
+        ),
+        migrations.RunPython(create_consequence_trigram_index, drop_consequence_trigram_index),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("curation_portal", "0022_add_query_indexes"),
+    ]
+
+    operations = [
+        # Only checked custom flags are stored.
+        migrations.RunSQL(
+            "DELETE FROM custom_flag_curation_result WHERE NOT checked",
+            reverse_sql=(
+                "INSERT INTO custom_flag_curation_result "
+                "(created_at, updated_at, flag_id, result_id, checked) "
+                "SELECT now(), now(), custom_flag.id, curation_result.id, false "
+                "FROM custom_flag CROSS JOIN curation_result "
+                "ON CONFLICT (flag_id, result_id) DO NOTHING"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="customflagcurationresult",
+            name="checked",
+            field=models.BooleanField(default=True),
+        ),
+    ]
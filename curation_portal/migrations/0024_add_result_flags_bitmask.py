@@ -0,0 +1,64 @@
+from django.db import migrations, models
+
+# FLAG_FIELDS at the time of this migration. Each flag's bit is its position in this list.
+FLAG_FIELDS = [
+    "flag_no_read_data",
+    "flag_reference_error",
+    "flag_mapping_error",
+    "flag_self_chain",
+    "flag_str_or_low_complexity",
+    "flag_low_umap_m50",
+    "flag_dubious_read_alignment",
+    "flag_mismapped_read",
+    "flag_complex_event",
+    "flag_stutter",
+    "flag_repetitive_sequence",
+    "flag_dubious_other",
+    "flag_genotyping_error",
+    "flag_low_genotype_quality",
+    "flag_low_read_depth",
+    "flag_allele_balance",
+    "flag_gc_rich",
+    "flag_homopolymer_or_str",
+    "flag_strand_bias",
+    "flag_inconsequential_transcript",
+    "flag_multiple_annotations",
+    "flag_pext_less_than_half_max",
+    "flag_uninformative_pext",
+    "flag_minority_of_transcripts",
+    "flag_minor_protein_isoform",
+    "flag_weak_exon_conservation",
+    "flag_untranslated_transcript",
+    "flag_rescue",
+    "flag_mnp",
+    "flag_frame_restoring_indel",
+    "flag_first_150_bp",
+    "flag_in_frame_sai",
+    "flag_methionine_resuce",
+    "flag_escapes_nmd",
+    "flag_low_truncated",
+    "flag_complex_splicing",
+    "flag_complex_other",
+    "flag_second_opinion_required",
+    "flag_flow_chart_overridden",
+    "flag_sanger_confirmation_recommended",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("curation_portal", "0023_sparse_custom_flag_results"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="curationresult",
+            name="flags_bitmask",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            "UPDATE curation_result SET flags_bitmask = "
+            + " | ".join(f"({flag}::int::bigint << {i})" for i, flag in enumerate(FLAG_FIELDS)),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,10 +1,16 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
-from django.db.models.signals import post_delete, pre_save, post_save
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, pre_delete, pre_save, post_save
 from django.dispatch.dispatcher import receiver
 from django.core.validators import RegexValidator
 
+from curation_portal.caching import (
+    invalidate_assignment_navigation,
+    invalidate_custom_flags,
+    invalidate_project_permissions,
+)
+
 
 class User(AbstractUser):
     assigned_variants = models.ManyToManyField(
@@ -37,6 +43,56 @@ class Project(models.Model):
         db_table = "curation_project"
 
 
+def _invalidate_project_permissions_on_m2m_change(instance, action, pk_set, get_user_ids):
+    """
+    Invalidate cached permissions for users added to or removed from a many to many relation.
+
+    Permissions are invalidated after the change is made, so that they are not reloaded and
+    cached before the change. Since cleared users are no longer related to the instance after
+    it is cleared, they are looked up before the relation is cleared.
+    """
+    if action == "pre_clear":
+        instance._cleared_user_ids = list(get_user_ids())  # pylint: disable=protected-access
+    elif action == "post_clear":
+        invalidate_project_permissions(instance.__dict__.pop("_cleared_user_ids", []))
+    elif action in ("post_add", "post_remove"):
+        invalidate_project_permissions(pk_set)
+
+
+@receiver(m2m_changed, sender=Project.owners.through)
+def invalidate_project_permissions_on_owners_change(
+    sender, instance, action, reverse, pk_set, *args, **kwargs
+):  # pylint: disable=unused-argument
+    if reverse:
+        # Projects were added to or removed from a user's owned projects.
+        if action.startswith("post_"):
+            invalidate_project_permissions([instance.id])
+    else:
+        _invalidate_project_permissions_on_m2m_change(
+            instance, action, pk_set, lambda: instance.owners.values_list("id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_project_permissions_on_user_permissions_change(
+    sender, instance, action, reverse, pk_set, *args, **kwargs
+):  # pylint: disable=unused-argument
+    if reverse:
+        _invalidate_project_permissions_on_m2m_change(
+            instance, action, pk_set, lambda: instance.user_set.values_list("id", flat=True)
+        )
+    elif action.startswith("post_"):
+        # Permissions were added to or removed from a user.
+        invalidate_project_permissions([instance.id])
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_project_permissions_on_project_delete(
+    sender, instance, *args, **kwargs
+):  # pylint: disable=unused-argument
+    invalidate_project_permissions(instance.owners.values_list("id", flat=True))
+
+
 class Variant(models.Model):
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name="variants", related_query_name="variant"
@@ -96,6 +152,12 @@ class Variant(models.Model):
         db_table = "curation_variant"
         unique_together = ("project", "variant_id")
         ordering = ("xpos", "ref", "alt")
+        indexes = [
+            # Look up variants by ID across projects
+            models.Index(fields=["variant_id"], name="curation_variant_vid_idx"),
+            # Sort variants within a project
+            models.Index(fields=["project", "xpos", "ref", "alt"], name="curation_variant_pos_idx"),
+        ]
 
 
 class VariantAnnotation(models.Model):
@@ -124,6 +186,12 @@ class VariantAnnotation(models.Model):
     class Meta:
         db_table = "curation_variant_annotation"
         unique_together = ("variant", "transcript_id")
+        indexes = [
+            models.Index(fields=["gene_symbol"], name="curation_annot_gene_idx"),
+            models.Index(fields=["consequence"], name="curation_annot_csq_idx"),
+            # A trigram index for consequence__contains filters is created by migration 0022
+            # if the pg_trgm extension is available.
+        ]
 
 
 class VariantTag(models.Model):
@@ -158,6 +226,11 @@ class CurationAssignment(models.Model):
     class Meta:
         db_table = "curation_assignment"
         unique_together = ("variant", "curator")
+        indexes = [
+            # The unique constraint's index leads with variant, but assignments are usually
+            # queried by curator.
+            models.Index(fields=["curator", "variant"], name="curation_assign_cur_var_idx")
+        ]
 
 
 @receiver(post_delete, sender=CurationAssignment)
@@ -166,6 +239,24 @@ def delete_assignment_result(sender, instance, *args, **kwargs):  # pylint: disa
         instance.result.delete()
 
 
+@receiver(post_save, sender=CurationAssignment)
+@receiver(post_delete, sender=CurationAssignment)
+def invalidate_assignment_navigation_on_assignment_change(
+    sender, instance, *args, **kwargs
+):  # pylint: disable=unused-argument
+    invalidate_assignment_navigation([instance.curator_id])
+
+
+@receiver(post_save, sender=CurationAssignment)
+@receiver(post_delete, sender=CurationAssignment)
+def invalidate_project_permissions_on_assignment_change(
+    sender, instance, *args, created=True, **kwargs
+):  # pylint: disable=unused-argument
+    # Saving an existing assignment does not change its curator or variant.
+    if created:
+        invalidate_project_permissions([instance.curator_id])
+
+
 class CurationResult(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -231,6 +322,10 @@ class CurationResult(models.Model):
     flag_flow_chart_overridden = models.BooleanField(default=False)
     flag_sanger_confirmation_recommended = models.BooleanField(default=False)
 
+    # Checked flags packed into a single column, with one bit per flag in FLAG_BITS. This is set
+    # from the flag columns by set_additional_flags and is used to count flags in SQL.
+    flags_bitmask = models.BigIntegerField(default=0)
+
     # Notes
     notes = models.TextField(null=True, blank=True)
     curator_comments = models.TextField(null=True, blank=True)
@@ -241,16 +336,24 @@ class CurationResult(models.Model):
 
     class Meta:
         db_table = "curation_result"
+        indexes = [
+            # Find results without a verdict
+            models.Index(
+                fields=["id"],
+                name="curation_result_no_verdict_idx",
+                condition=models.Q(verdict__isnull=True),
+            )
+        ]
 
 
 @receiver(post_save, sender=CurationResult)
-def init_custom_flags_on_new_instance(
+def invalidate_assignment_navigation_on_result_change(
     sender, instance, created, *args, **kwargs
 ):  # pylint: disable=unused-argument
-    if instance and created:
-        CustomFlagCurationResult.objects.bulk_create(
-            CustomFlagCurationResult(result=instance, flag=flag)
-            for flag in CustomFlag.objects.all()
+    # New results are not linked to an assignment until the assignment is saved.
+    if not created:
+        invalidate_assignment_navigation(
+            CurationAssignment.objects.filter(result=instance).values_list("curator", flat=True)
         )
 
 
@@ -267,6 +370,7 @@ def set_additional_flags(sender, instance, *args, **kwargs):  # pylint: disable=
                 "flag_dubious_other",
             ]
         )
+        instance.flags_bitmask = encode_flags(instance)
 
 
 class CustomFlag(models.Model):
@@ -309,17 +413,18 @@ class CustomFlag(models.Model):
 
 
 @receiver(post_save, sender=CustomFlag)
-def add_new_custom_flag_to_existing_curation_results(
-    sender, instance, created, *args, **kwargs
+@receiver(post_delete, sender=CustomFlag)
+def invalidate_custom_flags_on_flag_change(
+    sender, *args, **kwargs
 ):  # pylint: disable=unused-argument
-    if instance and created:
-        CustomFlagCurationResult.objects.bulk_create(
-            CustomFlagCurationResult(flag=instance, result=result, checked=False)
-            for result in CurationResult.objects.all()
-        )
+    invalidate_custom_flags()
+    # Other processes may reload flags before the change is committed.
+    transaction.on_commit(invalidate_custom_flags)
 
 
 class CustomFlagCurationResult(models.Model):
+    # Only checked flags are stored. Flags without a row for a result are unchecked, so that
+    # creating a flag or a result does not create a row for every result or flag.
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -333,7 +438,7 @@ class CustomFlagCurationResult(models.Model):
         related_name="custom_flags",
         on_delete=models.CASCADE,
     )
-    checked = models.BooleanField(default=False, null=False)
+    checked = models.BooleanField(default=True, null=False)
 
     class Meta:
         db_table = "custom_flag_curation_result"
@@ -392,6 +497,24 @@ FLAG_FIELDS = [
     "flag_sanger_confirmation_recommended",
 ]
 
+# Each flag's bit in CurationResult.flags_bitmask is its position in FLAG_FIELDS. Adding, removing,
+# or reordering flags requires a migration that recomputes flags_bitmask for existing results.
+FLAG_BITS = {flag: 1 << i for i, flag in enumerate(FLAG_FIELDS)}
+
+
+def encode_flags(curation_result):
+    """Return the bitmask of checked flags in a CurationResult or a dict of flag values."""
+    if not isinstance(curation_result, dict):
+        curation_result = {flag: getattr(curation_result, flag) for flag in FLAG_FIELDS}
+
+    return sum(bit for flag, bit in FLAG_BITS.items() if curation_result.get(flag))
+
+
+def decode_flags(bitmask):
+    """Return a dict of flag values for a bitmask of checked flags."""
+    return {flag: bool(bitmask & bit) for flag, bit in FLAG_BITS.items()}
+
+
 # FLAG_SHORTCUTS is so far only used to validate an incoming custom flag to make sure that we don't
 # re-assign pre-existing keyboard shortcuts.
 FLAG_SHORTCUTS = {
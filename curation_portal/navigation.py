@@ -0,0 +1,157 @@
+import bisect
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.http import urlencode
+
+from curation_portal.caching import ASSIGNMENT_NAVIGATION_CACHE_NAMESPACE, get_cache_version
+from curation_portal.filters import AssignmentFilter
+
+NavigationEntry = namedtuple("NavigationEntry", ["xpos", "ref", "alt", "variant", "variant_id"])
+
+AssignmentNavigation = namedtuple("AssignmentNavigation", ["index", "previous", "next"])
+
+# Assignments are navigated in variant order. variant_id breaks any ties between variants with
+# the same position and alleles.
+SORT_FIELDS = ("variant__xpos", "variant__ref", "variant__alt", "variant__variant_id")
+
+# Cache backends that are not shared between app server processes. Invalidating a cached list
+# in one process would leave other processes with a stale copy.
+UNSHARED_CACHE_BACKENDS = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+def _get_filtered_assignments(curator, project_id, filter_params):
+    filtered_assignments = AssignmentFilter(
+        filter_params, curator.curation_assignments.filter(variant__project=project_id)
+    )
+    # Filtering on annotations may return a variant more than once.
+    return filtered_assignments.qs.distinct()
+
+
+def _sort_key(variant):
+    return (variant.xpos, variant.ref, variant.alt, variant.variant_id)
+
+
+def _compare_to_variant(variant, lookup):
+    """Return a filter for assignments that sort before ("lt") or after ("gt") a variant."""
+    condition = Q()
+    preceding_fields = {}
+    for field, value in zip(SORT_FIELDS, _sort_key(variant)):
+        condition |= Q(**preceding_fields, **{f"{field}__{lookup}": value})
+        preceding_fields[field] = value
+
+    # The bound on position is implied by the condition above, but allows the database to use
+    # it to limit a scan of the index on variant position.
+    return Q(**{f"variant__xpos__{lookup}e": variant.xpos}) & condition
+
+
+def _query_assignment_navigation(curator, variant, filter_params):
+    filtered_assignments = _get_filtered_assignments(curator, variant.project_id, filter_params)
+
+    previous_entry = (
+        filtered_assignments.filter(_compare_to_variant(variant, "lt"))
+        .order_by(*(f"-{field}" for field in SORT_FIELDS))
+        .values_list(*SORT_FIELDS[:3], "variant", "variant__variant_id")
+        .first()
+    )
+    next_entry = (
+        filtered_assignments.filter(_compare_to_variant(variant, "gt"))
+        .order_by(*SORT_FIELDS)
+        .values_list(*SORT_FIELDS[:3], "variant", "variant__variant_id")
+        .first()
+    )
+
+    if filtered_assignments.filter(variant=variant).exists():
+        index = filtered_assignments.filter(_compare_to_variant(variant, "lt")).count()
+    else:
+        index = None
+
+    return AssignmentNavigation(
+        index=index,
+        previous=NavigationEntry(*previous_entry) if previous_entry else None,
+        next=NavigationEntry(*next_entry) if next_entry else None,
+    )
+
+
+def _load_sorted_assignments(curator, project_id, filter_params):
+    rows = (
+        _get_filtered_assignments(curator, project_id, filter_params)
+        .order_by(*SORT_FIELDS)
+        .values_list(*SORT_FIELDS[:3], "variant", "variant__variant_id")
+    )
+
+    entries = [NavigationEntry(*row) for row in rows]
+    positions = {entry.variant: index for index, entry in enumerate(entries)}
+    return (entries, positions)
+
+
+def _get_sorted_assignments(curator, project_id, filter_params):
+    # Only include parameters used by AssignmentFilter in the cache key.
+    filter_key = hashlib.sha1(
+        urlencode(
+            sorted(
+                (param, value)
+                for param in AssignmentFilter.base_filters  # pylint: disable=no-member
+                for value in filter_params.getlist(param)
+            )
+        ).encode("utf-8")
+    ).hexdigest()
+    version = get_cache_version(ASSIGNMENT_NAVIGATION_CACHE_NAMESPACE, curator.id)
+    cache_key = (
+        f"{ASSIGNMENT_NAVIGATION_CACHE_NAMESPACE}:{curator.id}:{project_id}:{version}:{filter_key}"
+    )
+
+    sorted_assignments = cache.get(cache_key)
+    if sorted_assignments is None:
+        sorted_assignments = _load_sorted_assignments(curator, project_id, filter_params)
+        cache.set(cache_key, sorted_assignments, settings.CURATION_PORTAL_NAVIGATION_CACHE_TIMEOUT)
+
+    return sorted_assignments
+
+
+def _get_cached_assignment_navigation(curator, variant, filter_params):
+    entries, positions = _get_sorted_assignments(curator, variant.project_id, filter_params)
+
+    index = positions.get(variant.id)
+    if index is None:
+        # The variant does not match the filter (for example, if it was curated after the list
+        # was filtered on verdict). Find its neighbors by its position in the sort order.
+        position = bisect.bisect_left([_sort_key(e) for e in entries], _sort_key(variant))
+        previous_entry = entries[position - 1] if position > 0 else None
+        next_entry = entries[position] if position < len(entries) else None
+    else:
+        previous_entry = entries[index - 1] if index > 0 else None
+        next_entry = entries[index + 1] if index + 1 < len(entries) else None
+
+    return AssignmentNavigation(index=index, previous=previous_entry, next=next_entry)
+
+
+def is_navigation_cache_enabled():
+    return (
+        settings.CURATION_PORTAL_NAVIGATION_CACHE_TIMEOUT > 0
+        and settings.CACHES["default"]["BACKEND"] not in UNSHARED_CACHE_BACKENDS
+    )
+
+
+def get_assignment_navigation(curator, variant, filter_params):
+    """
+    Return the index of a variant in a curator's sorted and filtered assignments for its project,
+    along with the previous and next variants.
+
+    By default, the previous and next variants are found with queries for the neighboring
+    assignments in sort order, which use the index on variant position. If a navigation cache
+    timeout is configured and the cache is shared between app server processes, the sorted list
+    of assignments is cached per curator, project, and filter instead, and invalidated when the
+    curator's assignments or results change. Finding a variant's neighbors is then a dictionary
+    lookup.
+    """
+    if is_navigation_cache_enabled():
+        return _get_cached_assignment_navigation(curator, variant, filter_params)
+
+    return _query_assignment_navigation(curator, variant, filter_params)
@@ -0,0 +1,220 @@
+import io
+import logging
+import re
+import time
+
+from cloudpathlib import GSPath
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_BYTE_RANGE_PATTERN = re.compile(r"^(\d*)-(\d*)$")
+
+
+def _parse_byte_range(byte_range, size):
+    """
+    Parse one range from a Range header into a (start, end) pair of inclusive byte positions.
+
+    Returns None if the range cannot be satisfied and raises ValueError if it is invalid.
+    """
+    match = _BYTE_RANGE_PATTERN.match(byte_range.strip())
+    if not match:
+        raise ValueError(f"Invalid byte range: {byte_range}")
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            raise ValueError(f"Invalid byte range: {byte_range}")
+    elif last:
+        # Suffix range for the last N bytes of the file
+        if int(last) == 0:
+            return None
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        raise ValueError(f"Invalid byte range: {byte_range}")
+
+    if start >= size:
+        return None
+
+    return (start, min(end, size - 1))
+
+
+def _coalesce_ranges(ranges):
+    coalesced_ranges = []
+    for start, end in sorted(ranges):
+        if coalesced_ranges and start <= coalesced_ranges[-1][1] + 1:
+            coalesced_ranges[-1] = (coalesced_ranges[-1][0], max(end, coalesced_ranges[-1][1]))
+        else:
+            coalesced_ranges.append((start, end))
+
+    return coalesced_ranges
+
+
+def parse_range_header(header, size):
+    """
+    Parse a Range header into a list of (start, end) pairs of inclusive byte positions.
+
+    Returns None if the header is missing or invalid, in which case the whole file should be
+    returned, and an empty list if none of the requested ranges can be satisfied.
+
+    Overlapping and adjacent ranges are coalesced, so that the number of bytes returned for a
+    request is never more than the size of the file.
+    """
+    if not header:
+        return None
+
+    unit, _, range_set = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+
+    ranges = []
+    for byte_range in range_set.split(","):
+        try:
+            parsed_range = _parse_byte_range(byte_range, size)
+        except ValueError:
+            return None
+
+        if parsed_range:
+            ranges.append(parsed_range)
+
+    if len(ranges) <= 1:
+        return ranges
+
+    return _coalesce_ranges(ranges)
+
+
+def get_variant_region(pos, ref, window):
+    """
+    Return the 0-based, half open region of reads to show for a variant, including window bases
+    on either side of the variant's reference allele.
+    """
+    return max(pos - 1 - window, 0), pos - 1 + len(ref) + window
+
+
+def open_reads_file(path, buffer_size=None):
+    """
+    Open a reads file for random access.
+
+    cloudpathlib downloads an entire file to its local cache when the file is opened. Files in
+    Google Cloud Storage are instead read with a blob reader, which downloads only the bytes
+    that are read.
+    """
+    buffer_size = buffer_size or settings.CURATION_PORTAL_READS_BUFFER_SIZE
+
+    if isinstance(path, GSPath):
+        blob = path.client.client.bucket(path.bucket).blob(path.blob)
+        return blob.open(mode="rb", chunk_size=buffer_size)
+
+    return path.open(mode="rb", buffering=buffer_size)
+
+
+class StreamMetrics:
+    """Record time to first byte and throughput for a streamed file."""
+
+    def __init__(self, label, started_at=None):
+        self.label = label
+        self.started_at = started_at or time.perf_counter()
+        self.first_byte_at = None
+        self.bytes_sent = 0
+
+    def record(self, num_bytes):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.perf_counter()
+
+        self.bytes_sent += num_bytes
+
+    def finish(self, sendfile=False):
+        elapsed = time.perf_counter() - self.started_at
+        if sendfile:
+            logger.info(
+                "Sent %d bytes of %s with sendfile in %.3fs", self.bytes_sent, self.label, elapsed
+            )
+        else:
+            time_to_first_byte = (
+                self.first_byte_at - self.started_at if self.first_byte_at is not None else None
+            )
+            logger.info(
+                "Streamed %d bytes of %s in %.3fs (%.0f bytes/s, time to first byte %s)",
+                self.bytes_sent,
+                self.label,
+                elapsed,
+                self.bytes_sent / elapsed if elapsed else 0,
+                f"{time_to_first_byte:.3f}s" if time_to_first_byte is not None else "n/a",
+            )
+
+
+class FileRange(io.RawIOBase):
+    """
+    File-like object for a byte range (start to end, inclusive) of an open file.
+
+    When passed to a FileResponse, WSGI servers that provide wsgi.file_wrapper (such as gunicorn)
+    send local files with sendfile, starting at the file's current position and sending the
+    number of bytes in the response's Content-Length header. Otherwise, the server reads the
+    range in blocks of the response's block_size.
+    """
+
+    def __init__(self, handle, start, end, metrics=None):
+        super().__init__()
+        handle.seek(start)
+        self.handle = handle
+        self.length = end - start + 1
+        self.remaining = self.length
+        self.metrics = metrics
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+
+        if not size:
+            return b""
+
+        chunk = self.handle.read(size)
+        self.remaining -= len(chunk)
+        if self.metrics:
+            self.metrics.record(len(chunk))
+
+        return chunk
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+    def fileno(self):
+        return self.handle.fileno()
+
+    def close(self):
+        if not self.closed:
+            if self.metrics:
+                # If nothing was read, the server sent the file with sendfile.
+                sent_with_sendfile = 0 < self.length == self.remaining
+                if sent_with_sendfile:
+                    self.metrics.record(self.length)
+                self.metrics.finish(sendfile=sent_with_sendfile)
+
+            self.handle.close()
+
+        super().close()
+
+
+def iter_file_range(handle, start, end, buffer_size=None, metrics=None):
+    """Yield the bytes from start to end (inclusive) of a file handle in fixed size blocks."""
+    buffer_size = buffer_size or settings.CURATION_PORTAL_READS_BUFFER_SIZE
+    handle.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = handle.read(min(buffer_size, remaining))
+        if not chunk:
+            break
+
+        remaining -= len(chunk)
+        if metrics:
+            metrics.record(len(chunk))
+
+        yield chunk
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import os
+import tempfile
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+from curation_portal.reads import iter_file_range, open_reads_file
+
+logger = logging.getLogger(__name__)
+
+READS_FILE_INFO_CACHE_NAMESPACE = "reads-file-info"
+
+# Log a summary of cache hits and misses after this many lookups.
+STATS_LOG_INTERVAL = 100
+
+FileInfo = namedtuple("FileInfo", ["exists", "size", "mtime", "etag"])
+
+
+class ReadsCache:
+    """
+    Least recently used cache of remote reads file contents on local disk.
+
+    Entries are keyed by a file's path, size, modification time, and etag (for cloud storage
+    paths), so that a changed file is never served from the cache. Entries are evicted in order
+    of last access once the total size of cached files exceeds max_size bytes.
+
+    File metadata, which is used to check whether a file exists, is cached in Django's cache
+    for info_timeout seconds.
+    """
+
+    def __init__(self, directory, max_size, header_size, info_timeout):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.header_size = header_size
+        self.info_timeout = info_timeout
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def record(self, kind, hit):
+        (self.hits if hit else self.misses)[kind] += 1
+        logger.debug("Reads cache %s for %s", "hit" if hit else "miss", kind)
+
+        if (sum(self.hits.values()) + sum(self.misses.values())) % STATS_LOG_INTERVAL == 0:
+            logger.info("Reads cache statistics: %s", self.stats())
+
+    def stats(self):
+        return {
+            kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+            for kind in sorted(set(self.hits) | set(self.misses))
+        }
+
+    def get_file_info(self, path):
+        info_key = hashlib.sha256(str(path).encode("utf-8")).hexdigest()
+        cache_key = f"{READS_FILE_INFO_CACHE_NAMESPACE}:{info_key}"
+
+        info = cache.get(cache_key)
+        self.record("info", info is not None)
+        if info is None:
+            if path.exists():
+                stat = path.stat()
+                info = FileInfo(True, stat.st_size, stat.st_mtime, getattr(path, "etag", None))
+            else:
+                info = FileInfo(False, None, None, None)
+
+            cache.set(cache_key, info, self.info_timeout)
+
+        return info
+
+    def _entry_path(self, path, info, length):
+        entry_key = f"{path}\0{info.size}\0{info.mtime}\0{info.etag}\0{length}"
+        return self.directory / hashlib.sha256(entry_key.encode("utf-8")).hexdigest()
+
+    def get_cached_file(self, kind, path, info, end):
+        """
+        Return the path to a local copy of the first end + 1 bytes of a file.
+
+        Whole index files are cached. For other files, only ranges within the first header_size
+        bytes (which contain the file header) are cached. Returns None for other ranges.
+        """
+        if kind == "index":
+            length = info.size
+            if length > self.max_size // 4:
+                return None
+        elif end < self.header_size:
+            length = min(self.header_size, info.size)
+        else:
+            return None
+
+        entry_path = self._entry_path(path, info, length)
+        try:
+            # Track last access using the entry's modification time.
+            os.utime(entry_path)
+            self.record(kind, True)
+            return entry_path
+        except FileNotFoundError:
+            self.record(kind, False)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=".", delete=False) as temp_file:
+            try:
+                with open_reads_file(path) as handle:
+                    for chunk in iter_file_range(handle, 0, length - 1):
+                        temp_file.write(chunk)
+            except Exception:
+                os.unlink(temp_file.name)
+                raise
+
+        os.replace(temp_file.name, entry_path)
+        self.evict()
+        return entry_path
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            # Skip temporary files for entries that are being written
+            if entry.name.startswith("."):
+                continue
+
+            try:
+                entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.unlink(entry_path)
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
+
+
+_reads_cache = None  # pylint: disable=invalid-name
+
+
+def get_reads_cache():
+    """Return the reads cache, or None if CURATION_PORTAL_READS_CACHE_DIR is not set."""
+    global _reads_cache  # pylint: disable=global-statement,invalid-name
+
+    if not settings.CURATION_PORTAL_READS_CACHE_DIR:
+        return None
+
+    if _reads_cache is None or str(_reads_cache.directory) != str(
+        Path(settings.CURATION_PORTAL_READS_CACHE_DIR)
+    ):
+        _reads_cache = ReadsCache(
+            settings.CURATION_PORTAL_READS_CACHE_DIR,
+            max_size=settings.CURATION_PORTAL_READS_CACHE_SIZE,
+            header_size=settings.CURATION_PORTAL_READS_CACHE_HEADER_SIZE,
+            info_timeout=settings.CURATION_PORTAL_READS_CACHE_INFO_TIMEOUT,
+        )
+
+    return _reads_cache
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from cloudpathlib import CloudPath
+from cloudpathlib.anypath import to_anypath
+from django.conf import settings
+
+from curation_portal.bam import slice_bam
+from curation_portal.reads import get_variant_region, open_reads_file
+from curation_portal.reads_cache import get_reads_cache
+
+SnippetTask = namedtuple(
+    "SnippetTask", ["snippets_dir", "variant_id", "chrom", "pos", "ref", "reads_file", "window"]
+)
+
+SnippetResult = namedtuple("SnippetResult", ["task", "status", "size", "error"])
+
+
+def get_snippet_path(snippets_dir, variant_id, reads_file):
+    """
+    Return the path of the snippet of a BAM file for a variant.
+
+    Snippets are stored in subdirectories of snippets_dir, keyed by the BAM file's path and the
+    variant's ID. Each snippet's index is stored next to it with a .bai extension.
+    """
+    snippet_key = hashlib.sha256(f"{to_anypath(reads_file)}\0{variant_id}".encode("utf-8"))
+    snippet_name = snippet_key.hexdigest()
+    return to_anypath(snippets_dir) / snippet_name[:2] / f"{snippet_name}.bam"
+
+
+def find_snippet(variant_id, file_path):
+    """
+    Return the path to the precomputed snippet of a BAM file, or a BAM file's index, for a variant.
+
+    Returns None if CURATION_PORTAL_READS_SNIPPETS_DIR is not set, the file is not a BAM file or
+    index, or no snippet has been created for the file.
+    """
+    if not settings.CURATION_PORTAL_READS_SNIPPETS_DIR:
+        return None
+
+    file_path = str(file_path)
+    is_index_file = file_path.endswith(".bai")
+    reads_file = file_path[: -len(".bai")] if is_index_file else file_path
+    if not reads_file.endswith(".bam"):
+        return None
+
+    snippet_path = get_snippet_path(
+        settings.CURATION_PORTAL_READS_SNIPPETS_DIR, variant_id, reads_file
+    )
+
+    # Use the reads cache to avoid checking cloud storage on every request.
+    reads_cache = get_reads_cache() if isinstance(snippet_path, CloudPath) else None
+    if reads_cache:
+        snippet_exists = reads_cache.get_file_info(snippet_path).exists
+    else:
+        snippet_exists = snippet_path.exists()
+
+    if not snippet_exists:
+        return None
+
+    return snippet_path.with_name(snippet_path.name + ".bai") if is_index_file else snippet_path
+
+
+def _write_file(path, data):
+    if isinstance(path, CloudPath):
+        # Objects in cloud storage are only visible once an upload is complete.
+        path.write_bytes(data)
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".", delete=False) as temp_file:
+        temp_file.write(data)
+
+    os.replace(temp_file.name, path)
+
+
+def create_snippet(task, overwrite=False):
+    """
+    Create the snippet of a BAM file for a variant, containing alignments within task.window bases
+    of the variant.
+
+    Existing snippets are skipped unless overwrite is True. Returns a SnippetResult with the total
+    size of the created snippet and its index.
+    """
+    snippet_path = get_snippet_path(task.snippets_dir, task.variant_id, task.reads_file)
+
+    try:
+        if not overwrite and snippet_path.exists():
+            return SnippetResult(task, "skipped", 0, None)
+
+        reads_file = to_anypath(task.reads_file)
+        with open_reads_file(reads_file.with_name(reads_file.name + ".bai")) as handle:
+            index_data = handle.read()
+
+        start, end = get_variant_region(task.pos, task.ref, task.window)
+        with open_reads_file(reads_file) as handle:
+            snippet_data, snippet_index_data = slice_bam(handle, index_data, task.chrom, start, end)
+
+        # The snippet is written after its index, so that it is only served once both exist.
+        _write_file(snippet_path.with_name(snippet_path.name + ".bai"), snippet_index_data)
+        _write_file(snippet_path, snippet_data)
+    except Exception as error:  # pylint: disable=broad-except
+        return SnippetResult(task, "failed", 0, str(error))
+
+    return SnippetResult(task, "created", len(snippet_data) + len(snippet_index_data), None)
@@ -1,18 +1,73 @@
 # pylint: disable=unsupported-binary-operation
 
 import rules
+from django.conf import settings
+from django.core.cache import cache
 
+from curation_portal.caching import PROJECT_PERMISSIONS_CACHE_NAMESPACE, get_cache_version
 from curation_portal.models import CurationAssignment
 
 
+class UserProjectPermissions:  # pylint: disable=too-few-public-methods
+    """Projects a user owns or is assigned variants in, loaded once for all permission checks."""
+
+    def __init__(self, user, version=None):
+        self.version = version
+
+        self.owned_project_ids = set()
+        self.assigned_project_ids = set()
+        self.can_add_variants = False
+
+        if not user.is_authenticated:
+            return
+
+        self.owned_project_ids.update(user.owned_projects.values_list("id", flat=True))
+
+        self.assigned_project_ids.update(
+            CurationAssignment.objects.filter(curator=user)
+            .values_list("variant__project", flat=True)
+            .distinct()
+        )
+
+        self.can_add_variants = user.user_permissions.filter(codename="add_variant").exists()
+
+
+def get_user_project_permissions(user):
+    """
+    Return a user's project permissions.
+
+    Permissions are cached on the user object for the rest of the request and, if
+    CURATION_PORTAL_PERMISSIONS_CACHE_TIMEOUT is set, in Django's cache across requests.
+    Cached permissions are invalidated when the user's owned projects, assignments, or
+    permissions change.
+    """
+    version = get_cache_version(PROJECT_PERMISSIONS_CACHE_NAMESPACE, user.id)
+
+    permissions = getattr(user, "_project_permissions", None)
+    if permissions is not None and permissions.version == version:
+        return permissions
+
+    timeout = settings.CURATION_PORTAL_PERMISSIONS_CACHE_TIMEOUT
+    cache_key = f"{PROJECT_PERMISSIONS_CACHE_NAMESPACE}:{user.id}:{version}"
+
+    permissions = cache.get(cache_key) if timeout else None
+    if permissions is None:
+        permissions = UserProjectPermissions(user, version=version)
+        if timeout:
+            cache.set(cache_key, permissions, timeout)
+
+    user._project_permissions = permissions  # pylint: disable=protected-access
+    return permissions
+
+
 @rules.predicate
 def is_project_owner(user, project):
-    return project.owners.filter(id=user.id).exists()
+    return project.id in get_user_project_permissions(user).owned_project_ids
 
 
 @rules.predicate
 def is_project_curator(user, project):
-    return CurationAssignment.objects.filter(curator=user, variant__project=project).exists()
+    return project.id in get_user_project_permissions(user).assigned_project_ids
 
 
 rules.add_perm("curation_portal.view_project", is_project_owner | is_project_curator)
@@ -21,7 +76,7 @@ rules.add_perm("curation_portal.change_project", is_project_owner)
 
 @rules.predicate
 def can_add_variants(user):
-    return user.user_permissions.filter(codename="add_variant").exists()
+    return get_user_project_permissions(user).can_add_variants
 
 
 rules.add_perm("curation_portal.add_variant_to_project", is_project_owner & can_add_variants)
@@ -1,7 +1,11 @@
+import logging
+import time
 from collections import Counter, defaultdict
 
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.validators import MaxLengthValidator
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework.fields import CharField
 from rest_framework.serializers import (
     ChoiceField,
@@ -13,6 +17,7 @@ from rest_framework.serializers import (
     ValidationError,
 )
 
+from curation_portal.caching import invalidate_assignment_navigation, invalidate_project_permissions
 from curation_portal.models import (
     CurationAssignment,
     CurationResult,
@@ -26,12 +31,19 @@ from curation_portal.models import (
     VariantTag,
     FLAG_FIELDS,
     FLAG_SHORTCUTS,
+    set_additional_flags,
 )
 from curation_portal.constants import RANKED_CONSEQUENCE_TERMS
+from curation_portal.custom_flags import get_custom_flag_registry, get_custom_flags_by_key
 from curation_portal.verdict import validate_result_verdict
 
+logger = logging.getLogger(__name__)
+
 VARIANT_ID_REGEX = r"^(\d+|X|Y)[-:]([0-9]+)[-:]([ACGT]+)[-:]([ACGT]+)$"
 
+# Number of rows inserted per INSERT statement when bulk creating objects.
+BULK_CREATE_BATCH_SIZE = 1000
+
 
 class UserSettingsSerializer(ModelSerializer):
     class Meta:
@@ -45,6 +57,12 @@ class UserField(RelatedField):
 
     queryset = User.objects.all()
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # When used in a list serializer, the same field instance validates every item in the list.
+        # Remember users by username so that each user is only looked up once.
+        self._users = {}
+
     def to_internal_value(self, data):
         # These match the validators applied to Django's default User model's username field.
         for validator in [
@@ -53,11 +71,15 @@ class UserField(RelatedField):
         ]:
             validator(data)
 
+        if data in self._users:
+            return self._users[data]
+
         try:
             if self.fail_if_not_found:
                 user = self.get_queryset().get(username=data)
             else:
                 user, _ = self.get_queryset().get_or_create(username=data)
+            self._users[data] = user
             return user
         except (TypeError, ValueError, User.DoesNotExist):
             self.fail("invalid")
@@ -130,6 +152,25 @@ class VariantTagSerializer(ModelSerializer):
 
 
 class VariantListSerializer(ListSerializer):  # pylint: disable=abstract-method
+    existing_variant_ids = None
+
+    def to_internal_value(self, data):
+        # Look up which of the uploaded variants already exist in the project with a single query
+        # so that each item's validation does not have to query the database.
+        if isinstance(data, list):
+            variant_ids = set(
+                item["variant_id"]
+                for item in data
+                if isinstance(item, dict) and isinstance(item.get("variant_id"), str)
+            )
+            self.existing_variant_ids = set(
+                Variant.objects.filter(
+                    project=self.context["project"], variant_id__in=variant_ids
+                ).values_list("variant_id", flat=True)
+            )
+
+        return super().to_internal_value(data)
+
     def validate(self, attrs):
         # Check that all variant IDs in the list are unique
         variant_id_counts = Counter(variant_data["variant_id"] for variant_data in attrs)
@@ -139,6 +180,51 @@ class VariantListSerializer(ListSerializer):  # pylint: disable=abstract-method
 
         return attrs
 
+    def create(self, validated_data):
+        start_time = time.perf_counter()
+
+        project = self.context["project"]
+
+        variants = []
+        annotations_data = []
+        tags_data = []
+        for item in validated_data:
+            item = dict(item)
+            annotations_data.append(item.pop("annotations", None) or [])
+            tags_data.append(item.pop("tags", None) or [])
+            variants.append(
+                Variant(**item, **variant_id_parts(item["variant_id"]), project=project)
+            )
+
+        # On PostgreSQL, bulk_create sets the primary key on each variant.
+        Variant.objects.bulk_create(variants, batch_size=BULK_CREATE_BATCH_SIZE)
+
+        annotations = [
+            VariantAnnotation(**annotation, variant=variant)
+            for variant, variant_annotations in zip(variants, annotations_data)
+            for annotation in variant_annotations
+        ]
+        VariantAnnotation.objects.bulk_create(annotations, batch_size=BULK_CREATE_BATCH_SIZE)
+
+        tags = [
+            VariantTag(**tag, variant=variant)
+            for variant, variant_tags in zip(variants, tags_data)
+            for tag in variant_tags
+        ]
+        VariantTag.objects.bulk_create(tags, batch_size=BULK_CREATE_BATCH_SIZE)
+
+        elapsed_time = time.perf_counter() - start_time
+        logger.info(
+            "Created %d variants (%d annotations, %d tags) in %.2fs (%.0f variants/s)",
+            len(variants),
+            len(annotations),
+            len(tags),
+            elapsed_time,
+            len(variants) / elapsed_time if elapsed_time else 0,
+        )
+
+        return variants
+
 
 class VariantSerializer(ModelSerializer):
     variant_id = RegexField(VARIANT_ID_REGEX, required=True)
@@ -154,7 +240,17 @@ class VariantSerializer(ModelSerializer):
     def validate(self, attrs):
         variant_id = attrs["variant_id"]
 
-        if Variant.objects.filter(variant_id=variant_id, project=self.context["project"]).exists():
+        # When uploading a list of variants, existing variants are looked up in bulk by the
+        # list serializer.
+        existing_variant_ids = getattr(self.parent, "existing_variant_ids", None)
+        if existing_variant_ids is not None:
+            variant_exists = variant_id in existing_variant_ids
+        else:
+            variant_exists = Variant.objects.filter(
+                variant_id=variant_id, project=self.context["project"]
+            ).exists()
+
+        if variant_exists:
             raise ValidationError("Variant already exists in project")
 
         return attrs
@@ -218,55 +314,117 @@ class CustomFlagSerializer(ModelSerializer):
 
 
 class CustomFlagCurationResultSerializer(DictField):
-    custom_flags = CustomFlag.objects.all()
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.error_messages[
-            "not_found"
-        ] = "A flag with identifier '{flag_identifier}' does not exist."
+        self.error_messages["not_found"] = (
+            "A flag with identifier '{flag_identifier}' does not exist."
+        )
+
+    @cached_property
+    def custom_flags(self):
+        # Fields are copied for each serializer instance, so all fields in a request use the same
+        # flags.
+        return get_custom_flag_registry()
 
     def get_default(self):
         default = super().get_default()
         if not default:
-            return {f.key: False for f in self.custom_flags}
+            return {f.key: False for f in self.custom_flags.flags}
         return default
 
     def get_initial(self):
         initial = super().get_initial()
         if not initial:
-            return {f.key: False for f in self.custom_flags}
+            return {f.key: False for f in self.custom_flags.flags}
         return initial
 
     def to_representation(self, value):
-        flags_related_to_curation_result = getattr(value, "all", lambda: [])()
-        flags = {c.flag.key: c.checked for c in flags_related_to_curation_result}
+        # Only checked flags are stored, so other flags default to unchecked.
+        flags = {f.key: False for f in self.custom_flags.flags}
+        for flag_result in getattr(value, "all", lambda: [])():
+            flag = self.custom_flags.by_id.get(flag_result.flag_id)
+            if flag:
+                flags[flag.key] = flag_result.checked
 
-        for flag in self.custom_flags:
-            if flag.key not in flags:
-                flags[flag.key] = False
         return flags
 
     def create(self, result, data):
-        for flag, checked in data.items():
-            if not CustomFlag.objects.filter(key=flag).exists():
-                self.fail("not_found", flag_identifier=flag)
-
-            flag = result.custom_flags.filter(flag__key=flag).first()
-            if flag:
-                flag.checked = checked
-                flag.save()
-            else:
-                CustomFlagCurationResult.objects.create(
-                    flag=CustomFlag.objects.get(key=flag),
-                    result=result,
-                    checked=checked,
-                )
+        flags = get_custom_flags_by_key(list(data))
+        for flag_key in data:
+            if flag_key not in flags:
+                self.fail("not_found", flag_identifier=flag_key)
+
+        # Only checked flags are stored, so unchecking a flag deletes its row.
+        unchecked_flag_ids = [
+            flags[flag_key].id for flag_key, checked in data.items() if not checked
+        ]
+        if unchecked_flag_ids:
+            result.custom_flags.filter(flag_id__in=unchecked_flag_ids).delete()
+
+        checked_flag_ids = [flags[flag_key].id for flag_key, checked in data.items() if checked]
+        if checked_flag_ids:
+            CustomFlagCurationResult.objects.bulk_create(
+                [
+                    CustomFlagCurationResult(result=result, flag_id=flag_id)
+                    for flag_id in checked_flag_ids
+                ],
+                ignore_conflicts=True,
+            )
 
         return result
 
 
+def update_imported_result(result, attrs, custom_flags, checked_custom_flags):
+    """
+    Set changed fields on a curation result from imported values and compare imported custom flag
+    values to its stored custom flag results.
+
+    checked_custom_flags maps (result ID, flag ID) pairs to the IDs of stored custom flag results.
+    Returns the names of changed fields, new custom flag results for newly checked flags, and the
+    IDs of stored custom flag results for flags that are now unchecked.
+    """
+    changed_fields = set()
+    for attr, value in attrs.items():
+        if attr in ("curator", "variant_id", "custom_flags"):
+            continue
+
+        if getattr(result, attr) != value:
+            changed_fields.add(attr)
+            setattr(result, attr, value)
+
+    new_custom_flag_results = []
+    unchecked_custom_flag_result_ids = []
+    for flag_key, checked in (attrs.get("custom_flags") or {}).items():
+        flag = custom_flags[flag_key]
+        custom_flag_result_id = checked_custom_flags.get((result.id, flag.id))
+        if checked and custom_flag_result_id is None:
+            new_custom_flag_results.append(CustomFlagCurationResult(result=result, flag=flag))
+        elif not checked and custom_flag_result_id is not None:
+            unchecked_custom_flag_result_ids.append(custom_flag_result_id)
+
+    return changed_fields, new_custom_flag_results, unchecked_custom_flag_result_ids
+
+
 class ImportedResultListSerializer(ListSerializer):  # pylint: disable=abstract-method
+    project_variant_ids = None
+
+    def to_internal_value(self, data):
+        # Look up which variants exist in the project with a single query so that each item's
+        # validation does not have to query the database.
+        if isinstance(data, list):
+            variant_ids = set(
+                item["variant_id"]
+                for item in data
+                if isinstance(item, dict) and isinstance(item.get("variant_id"), str)
+            )
+            self.project_variant_ids = set(
+                Variant.objects.filter(
+                    project=self.context["project"], variant_id__in=variant_ids
+                ).values_list("variant_id", flat=True)
+            )
+
+        return super().to_internal_value(data)
+
     def validate(self, attrs):
         # Check that all curator/variant ID pairs in the list are unique
         assignment_counts = Counter(
@@ -288,16 +446,27 @@ class ImportedResultListSerializer(ListSerializer):  # pylint: disable=abstract-
 
         return attrs
 
-    def get_assignment(self, variant_id, curator):
-        return CurationAssignment.objects.filter(
-            variant__project=self.child.context["project"],
-            variant__variant_id=variant_id,
-            curator__username=curator,
-        ).first()
+    def get_assignments(self, validated_data):
+        """
+        Return existing assignments for the imported results, keyed by (curator ID, variant ID).
+        """
+        assignments = CurationAssignment.objects.filter(
+            variant__project=self.context["project"],
+            variant__variant_id__in=set(attrs["variant_id"] for attrs in validated_data),
+            curator__in=set(attrs["curator"] for attrs in validated_data),
+        ).select_related("variant", "result")
+
+        return {
+            (assignment.curator_id, assignment.variant.variant_id): assignment
+            for assignment in assignments
+        }
 
     def save(self, **kwargs):
         """
         Save and return a list of object instances.
+
+        Assignments, variants and custom flags are loaded up front and results are created and
+        updated in bulk, instead of with several queries for each imported result.
         """
         # Guard against incorrect use of `serializer.save(commit=False)`
         assert "commit" not in kwargs, (
@@ -310,21 +479,154 @@ class ImportedResultListSerializer(ListSerializer):  # pylint: disable=abstract-
         )
 
         validated_data = [{**attrs, **kwargs} for attrs in self.validated_data]
-        instances = []
+
+        # Will throw error unless CustomFlag instances already exist.
+        custom_flags = get_custom_flags_by_key(
+            {flag_key for attrs in validated_data for flag_key in attrs.get("custom_flags") or {}}
+        )
         for attrs in validated_data:
-            instance = self.get_assignment(attrs["variant_id"], attrs["curator"])
-            if instance and instance.result:
-                attrs.pop("created_at", None)
-                attrs.pop("updated_at", None)
-                instance = self.child.update(instance.result, attrs)
-                assert instance is not None, "`update()` did not return an object instance."
+            for flag_key in attrs.get("custom_flags") or {}:
+                if flag_key not in custom_flags:
+                    self.child.fields["custom_flags"].fail("not_found", flag_identifier=flag_key)
+
+        assignments = self.get_assignments(validated_data)
+
+        created = []
+        updated = []
+        for attrs in validated_data:
+            assignment = assignments.get((attrs["curator"].id, attrs["variant_id"]))
+            if assignment and assignment.result:
+                updated.append((assignment, attrs))
             else:
-                instance = self.child.create(attrs)
-                assert instance is not None, "`create()` did not return an object instance."
+                created.append((assignment, attrs))
+
+        instances = {}
+        instances.update(self.create_results(created, custom_flags))
+        instances.update(self.update_results(updated, custom_flags))
+
+        # Bulk operations do not send the signals that invalidate cached navigation and permissions.
+        curator_ids = [attrs["curator"].id for attrs in validated_data]
+        invalidate_assignment_navigation(curator_ids)
+        invalidate_project_permissions(curator_ids)
+
+        return [instances[(attrs["curator"].id, attrs["variant_id"])] for attrs in validated_data]
+
+    def create_results(self, items, custom_flags):
+        results = []
+        for _, attrs in items:
+            result = CurationResult(
+                **{
+                    attr: value
+                    for attr, value in attrs.items()
+                    if attr not in ("curator", "variant_id", "custom_flags")
+                }
+            )
+            # bulk_create does not send pre_save signals.
+            set_additional_flags(sender=CurationResult, instance=result)
+            results.append(result)
+
+        CurationResult.objects.bulk_create(results, batch_size=BULK_CREATE_BATCH_SIZE)
+
+        # Only checked custom flags are stored.
+        CustomFlagCurationResult.objects.bulk_create(
+            [
+                CustomFlagCurationResult(result=result, flag=custom_flags[flag_key])
+                for result, (_, attrs) in zip(results, items)
+                for flag_key, checked in (attrs.get("custom_flags") or {}).items()
+                if checked
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
 
-            instances.append(instance)
+        # Assignments might already exist but a curation result has not yet been created.
+        project_variants = dict(
+            Variant.objects.filter(
+                project=self.context["project"],
+                variant_id__in=set(attrs["variant_id"] for assignment, attrs in items),
+            ).values_list("variant_id", "id")
+        )
 
-        return instances
+        new_assignments = []
+        existing_assignments = []
+        for result, (assignment, attrs) in zip(results, items):
+            if assignment:
+                assignment.result = result
+                existing_assignments.append(assignment)
+            else:
+                new_assignments.append(
+                    CurationAssignment(
+                        curator=attrs["curator"],
+                        variant_id=project_variants[attrs["variant_id"]],
+                        result=result,
+                    )
+                )
+
+        CurationAssignment.objects.bulk_create(new_assignments, batch_size=BULK_CREATE_BATCH_SIZE)
+        CurationAssignment.objects.bulk_update(
+            existing_assignments, ["result"], batch_size=BULK_CREATE_BATCH_SIZE
+        )
+
+        return {
+            (attrs["curator"].id, attrs["variant_id"]): result
+            for result, (_, attrs) in zip(results, items)
+        }
+
+    def update_results(self, items, custom_flags):
+        now = timezone.now()
+        editor = self.context["request"].user
+
+        # Only checked custom flags are stored.
+        checked_custom_flags = {
+            (result_id, flag_id): custom_flag_result_id
+            for custom_flag_result_id, result_id, flag_id in CustomFlagCurationResult.objects.filter(
+                result__in=[assignment.result for assignment, _ in items]
+            ).values_list(
+                "id", "result_id", "flag_id"
+            )
+        }
+
+        changed_results = []
+        changed_fields = set()
+        unchecked_custom_flag_result_ids = []
+        new_custom_flag_results = []
+        for assignment, attrs in items:
+            result_changed_fields, new_flag_results, unchecked_flag_result_ids = (
+                update_imported_result(assignment.result, attrs, custom_flags, checked_custom_flags)
+            )
+            changed_fields.update(result_changed_fields)
+            new_custom_flag_results.extend(new_flag_results)
+            unchecked_custom_flag_result_ids.extend(unchecked_flag_result_ids)
+
+            # Only save the result if any of the fields or custom flags have changed.
+            if result_changed_fields or new_flag_results or unchecked_flag_result_ids:
+                set_additional_flags(sender=CurationResult, instance=assignment.result)
+                assignment.result.updated_at = now
+                # Track which project owner edited another curator's result.
+                if assignment.curator_id != editor.id:
+                    assignment.result.editor = editor
+
+                changed_results.append(assignment.result)
+
+        CurationResult.objects.bulk_update(
+            changed_results,
+            [
+                *changed_fields,
+                "flag_dubious_read_alignment",
+                "flags_bitmask",
+                "updated_at",
+                "editor",
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        CustomFlagCurationResult.objects.filter(id__in=unchecked_custom_flag_result_ids).delete()
+        CustomFlagCurationResult.objects.bulk_create(
+            new_custom_flag_results, batch_size=BULK_CREATE_BATCH_SIZE
+        )
+
+        return {
+            (attrs["curator"].id, attrs["variant_id"]): assignment.result
+            for assignment, attrs in items
+        }
 
 
 class ImportedResultSerializer(ModelSerializer):
@@ -343,11 +645,20 @@ class ImportedResultSerializer(ModelSerializer):
 
     class Meta:
         model = CurationResult
-        exclude = ("id", "editor")
+        exclude = ("id", "editor", "flags_bitmask")
         list_serializer_class = ImportedResultListSerializer
 
     def validate_variant_id(self, value):
-        if not Variant.objects.filter(project=self.context["project"], variant_id=value).exists():
+        # When importing a list of results, variants are looked up in bulk by the list serializer.
+        project_variant_ids = getattr(self.parent, "project_variant_ids", None)
+        if project_variant_ids is not None:
+            variant_exists = value in project_variant_ids
+        else:
+            variant_exists = Variant.objects.filter(
+                project=self.context["project"], variant_id=value
+            ).exists()
+
+        if not variant_exists:
             raise ValidationError("Variant does not exist")
 
         return value
@@ -404,12 +715,14 @@ class ImportedResultSerializer(ModelSerializer):
         if result_changed:
             result.save()
 
-        for flag_key, checked in custom_flags.items():
-            flag = result.custom_flags.get(flag__key__exact=flag_key)
-            if flag.checked != checked:
-                result_changed = True
-                flag.checked = checked
-                flag.save()
+        checked_flag_ids = set(result.custom_flags.values_list("flag_id", flat=True))
+        flags = get_custom_flags_by_key(list(custom_flags))
+        if any(
+            flag_key not in flags or (flags[flag_key].id in checked_flag_ids) != checked
+            for flag_key, checked in custom_flags.items()
+        ):
+            result_changed = True
+            self.fields["custom_flags"].create(result=result, data=custom_flags)
 
         if result_changed and result.assignment.curator != self.context["request"].user:
             result.editor = self.context["request"].user
@@ -431,4 +744,4 @@ class ExportedResultSerializer(ModelSerializer):
 
     class Meta:
         model = CurationResult
-        exclude = ("id",)
+        exclude = ("id", "flags_bitmask")
@@ -93,6 +93,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/ref/settings/#caches
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
 AUTH_USER_MODEL = "curation_portal.User"
 
 AUTHENTICATION_BACKENDS = [
@@ -157,3 +168,35 @@ REST_FRAMEWORK = {"DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.Dja
 CURATION_PORTAL_AUTH_HEADER = os.getenv("CURATION_PORTAL_AUTH_HEADER", "REMOTE_USER")
 
 CURATION_PORTAL_SIGN_OUT_URL = os.getenv("CURATION_PORTAL_SIGN_OUT_URL", None)
+
+CURATION_PORTAL_NAVIGATION_CACHE_TIMEOUT = int(
+    os.getenv("CURATION_PORTAL_NAVIGATION_CACHE_TIMEOUT", "0")
+)
+
+CURATION_PORTAL_READS_BUFFER_SIZE = int(os.getenv("CURATION_PORTAL_READS_BUFFER_SIZE", "262144"))
+
+CURATION_PORTAL_READS_CACHE_DIR = os.getenv("CURATION_PORTAL_READS_CACHE_DIR", None)
+
+CURATION_PORTAL_READS_CACHE_SIZE = int(
+    os.getenv("CURATION_PORTAL_READS_CACHE_SIZE", str(1024 * 1024 * 1024))
+)
+
+CURATION_PORTAL_READS_CACHE_HEADER_SIZE = int(
+    os.getenv("CURATION_PORTAL_READS_CACHE_HEADER_SIZE", str(1024 * 1024))
+)
+
+CURATION_PORTAL_READS_CACHE_INFO_TIMEOUT = int(
+    os.getenv("CURATION_PORTAL_READS_CACHE_INFO_TIMEOUT", "60")
+)
+
+CURATION_PORTAL_READS_SLICE_WINDOW = int(os.getenv("CURATION_PORTAL_READS_SLICE_WINDOW", "500"))
+
+CURATION_PORTAL_READS_SNIPPETS_DIR = os.getenv("CURATION_PORTAL_READS_SNIPPETS_DIR", None)
+
+CURATION_PORTAL_CUSTOM_FLAGS_CACHE_TIMEOUT = int(
+    os.getenv("CURATION_PORTAL_CUSTOM_FLAGS_CACHE_TIMEOUT", "60")
+)
+
+CURATION_PORTAL_PERMISSIONS_CACHE_TIMEOUT = int(
+    os.getenv("CURATION_PORTAL_PERMISSIONS_CACHE_TIMEOUT", "0")
+)
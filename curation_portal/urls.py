@@ -9,14 +9,18 @@ from django.urls import path, register_converter
 from django.views.generic import TemplateView
 
 from curation_portal.views.app_settings import ApplicationSettingsView
-from curation_portal.views.curate_variant import CurateVariantView, ReadsFileView
+from curation_portal.views.curate_variant import (
+    CurateVariantView,
+    ReadsFileView,
+    ReadsSliceView,
+)
 from curation_portal.views.projects import AssignedProjectsView, OwnedProjectsView
 from curation_portal.views.project import ProjectView
 from curation_portal.views.project_assignments import ProjectAssignmentsView
 from curation_portal.views.project_admin import CreateProjectView
-from curation_portal.views.project_results import ProjectResultsView
+from curation_portal.views.project_results import ProjectResultFlagsView, ProjectResultsView
 from curation_portal.views.project_results_export import ExportProjectResultsView
-from curation_portal.views.project_variants import ProjectVariantsView
+from curation_portal.views.project_variants import ProjectVariantsUploadView, ProjectVariantsView
 from curation_portal.views.user import ProfileView
 from curation_portal.views.user_settings import UserSettingsView
 from curation_portal.views.variants import VariantsView
@@ -82,6 +86,11 @@ urlpatterns = [
         ProjectVariantsView.as_view(),
         name="api-project-variants",
     ),
+    path(
+        "api/project/<int:project_id>/variants/upload/",
+        ProjectVariantsUploadView.as_view(),
+        name="api-project-variants-upload",
+    ),
     path(
         "api/project/<int:project_id>/variant/<int:variant_id>/curate/",
         CurateVariantView.as_view(),
@@ -92,11 +101,21 @@ urlpatterns = [
         ReadsFileView.as_view(),
         name="api-curate-variant-view-reads",
     ),
+    path(
+        "api/project/<int:project_id>/variant/<int:variant_id>/reads/slice/",
+        ReadsSliceView.as_view(),
+        name="api-curate-variant-view-reads-slice",
+    ),
     path(
         "api/project/<int:project_id>/results/",
         ProjectResultsView.as_view(),
         name="api-project-results",
     ),
+    path(
+        "api/project/<int:project_id>/results/flags/",
+        ProjectResultFlagsView.as_view(),
+        name="api-project-result-flags",
+    ),
     path(
         "api/project/<int:project_id>/results/export/",
         ExportProjectResultsView.as_view(),
@@ -0,0 +1,318 @@
+import gzip
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from curation_portal.constants import RANKED_CONSEQUENCE_TERMS
+
+CONSEQUENCE_TERM_RANK = {term: rank for rank, term in enumerate(RANKED_CONSEQUENCE_TERMS)}
+
+# Variants are only imported if they have an annotation at least as severe as this.
+LOF_CONSEQUENCE_RANK = CONSEQUENCE_TERM_RANK["frameshift_variant"]
+
+INFO_FIELD_TYPES = {"Integer": int, "Float": float, "String": str, "Character": str}
+
+_INFO_HEADER_PATTERN = re.compile(r"^##INFO=<ID=([^,]+),Number=([^,]+),Type=([^,]+),")
+
+TAB = ord("\t")
+ALLELE_SEPARATORS = np.array([ord("/"), ord("|")], dtype=np.uint8)
+REF_ALLELE, ALT_ALLELE = ord("0"), ord("1")
+
+VcfHeader = namedtuple("VcfHeader", ["info_fields", "csq_fields", "sample_ids"])
+
+
+class VcfError(ValueError):
+    pass
+
+
+def open_vcf(path):
+    """Open a plain text, gzip, or bgzip compressed VCF file."""
+    with open(path, "rb") as f:
+        is_compressed = f.read(2) == b"\x1f\x8b"
+
+    if is_compressed:
+        return gzip.open(path, "rt", encoding="utf-8")
+
+    return open(path, "r", encoding="utf-8")
+
+
+def read_header(vcf_file):
+    """Read a VCF file's header, leaving the file positioned at its first row."""
+    info_fields = {}
+    csq_fields = None
+    line_number = 0
+    for line_number, line in enumerate(vcf_file, 1):
+        if line.startswith("##INFO="):
+            match = _INFO_HEADER_PATTERN.match(line)
+            if match:
+                field, number, field_type = match.groups()
+                info_fields[field] = (number, field_type)
+                if field == "CSQ" and "Format: " in line:
+                    csq_fields = line.split("Format: ")[1].split('"')[0].split("|")
+        elif line.startswith("#CHROM"):
+            sample_ids = line.rstrip("\n").split("\t")[9:]
+            return line_number, VcfHeader(info_fields, csq_fields, sample_ids)
+
+    raise VcfError("VCF file has no header line")
+
+
+def parse_info(info, info_fields, fields_to_parse):
+    """Parse the values of the requested fields from a VCF row's INFO column."""
+    values = {}
+    for entry in info.split(";"):
+        field, _, value = entry.partition("=")
+        if field not in fields_to_parse:
+            continue
+
+        number, field_type = info_fields.get(field, (".", "String"))
+        if field_type == "Flag":
+            values[field] = True
+            continue
+
+        convert = INFO_FIELD_TYPES.get(field_type, str)
+        try:
+            items = [None if item == "." else convert(item) for item in value.split(",")]
+        except ValueError as error:
+            raise VcfError(f"Invalid value for INFO field {field}: {value}") from error
+
+        # Rows are biallelic, so per allele fields (Number=A) have one value
+        values[field] = items[0] if number in ("1", "A") else items
+
+    return values
+
+
+def get_consequence_rank(annotation):
+    return min(
+        CONSEQUENCE_TERM_RANK.get(term, len(CONSEQUENCE_TERM_RANK))
+        for term in annotation["Consequence"].split("&")
+    )
+
+
+def _parse_int(value):
+    return int(value) if value not in ("", ".") else None
+
+
+def _find_carriers(genotypes, sample_ids):
+    """
+    Find samples carrying the alternate allele from the tab separated sample columns of a row.
+
+    Genotype calls are decoded from the row's bytes in NumPy arrays, without creating objects
+    for each sample. Returns the number of homozygous and heterozygous carriers, and a list of
+    (sample ID, sample column) pairs for the carriers.
+    """
+    genotypes = genotypes.encode("utf-8")
+    buffer = np.frombuffer(genotypes + b"\t\0\0", dtype=np.uint8)
+
+    ends = np.flatnonzero(buffer == TAB)[: len(sample_ids)]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Biallelic calls are either haploid ("1") or diploid ("0/1", "1|1")
+    first_allele = buffer[starts]
+    second_allele = buffer[starts + 2]
+    is_diploid = np.isin(buffer[starts + 1], ALLELE_SEPARATORS)
+    is_homozygous = (first_allele == ALT_ALLELE) & (~is_diploid | (second_allele == ALT_ALLELE))
+    is_heterozygous = is_diploid & (
+        ((first_allele == REF_ALLELE) & (second_allele == ALT_ALLELE))
+        | ((first_allele == ALT_ALLELE) & (second_allele == REF_ALLELE))
+    )
+
+    carriers = [
+        (sample_ids[index], genotypes[starts[index] : ends[index]].decode("utf-8"))
+        for index in np.flatnonzero(is_homozygous | is_heterozygous)
+    ]
+    return int(np.count_nonzero(is_homozygous)), int(np.count_nonzero(is_heterozygous)), carriers
+
+
+def _parse_carrier(sample_id, sample, format_fields):
+    values = sample.split(":")
+    values += [""] * (len(format_fields) - len(values))
+    values = dict(zip(format_fields, values))
+
+    allele_depths = values["AD"].split(",") if "AD" in values else []
+    return {
+        "sample_id": sample_id,
+        "GT": values["GT"],
+        "DP": _parse_int(values["DP"]) if "DP" in values else None,
+        "GQ": _parse_int(values["GQ"]) if "GQ" in values else None,
+        "AD": (
+            [_parse_int(depth) for depth in allele_depths[:2]]
+            if len(allele_depths) >= 2 and "." not in allele_depths[:2]
+            else None
+        ),
+    }
+
+
+def summarize_genotypes(genotype_format, genotypes, sample_ids, max_samples):
+    """
+    Count homozygous and heterozygous carriers of the alternate allele, and list the genotype,
+    depth, and quality of each carrier.
+
+    Other FORMAT fields are only parsed for carriers. Per sample fields are limited to the first
+    max_samples carriers, where missing depths and qualities are recorded as 0.
+    """
+    format_fields = genotype_format.split(":")
+    if format_fields[0] != "GT":
+        # The VCF specification requires GT to be the first FORMAT field if present
+        return {}
+
+    n_homozygotes, n_heterozygotes, carrier_samples = _find_carriers(genotypes, sample_ids)
+    carriers = [
+        _parse_carrier(sample_id, sample, format_fields) for sample_id, sample in carrier_samples
+    ]
+
+    summary = {
+        "n_homozygotes": n_homozygotes,
+        "n_heterozygotes": n_heterozygotes,
+        "sample_ids": [carrier["sample_id"] for carrier in carriers[:max_samples]],
+        "GT": [carrier["GT"] for carrier in carriers[:max_samples]],
+    }
+
+    for field in ("DP", "GQ", "AD"):
+        if field in format_fields:
+            missing_value = [0, 0] if field == "AD" else 0
+            summary[field] = [
+                missing_value if carrier[field] is None else carrier[field]
+                for carrier in carriers[:max_samples]
+            ]
+            summary[f"{field}_all"] = [
+                carrier[field] for carrier in carriers if carrier[field] is not None
+            ]
+
+    return summary
+
+
+class VcfVariantReader:
+    """
+    Convert rows of a VCF file annotated with VEP to variants in the format accepted by
+    VariantSerializer.
+
+    Rows without a LoF annotation are skipped. Rows for the same variant are merged.
+    """
+
+    def __init__(self, header, reference_genome="GRCh37", tag_fields=None, max_samples=100):
+        if not header.csq_fields:
+            raise VcfError("VCF file has no CSQ INFO field")
+
+        self.header = header
+        self.reference_genome = reference_genome
+        self.tag_fields = tag_fields or {}
+        self.max_samples = max_samples
+
+        self.fields_to_parse = {"CSQ", "AC", "AN", "AF", self.liftover_field, *self.tag_fields}
+
+        self.num_rows = 0
+        self.num_skipped_rows = 0
+
+    @property
+    def liftover_field(self):
+        return "liftover_37" if self.reference_genome == "GRCh38" else "liftover_38"
+
+    def get_lof_annotations(self, info):
+        annotations = [
+            dict(zip(self.header.csq_fields, value.split("|"))) for value in info.get("CSQ") or []
+        ]
+        lof_annotations = [
+            annotation
+            for annotation in annotations
+            if get_consequence_rank(annotation) <= LOF_CONSEQUENCE_RANK
+        ]
+        return sorted(lof_annotations, key=get_consequence_rank)
+
+    def convert_row(self, line):
+        # Sample columns are left unsplit for summarize_genotypes
+        row = line.rstrip("\n").split("\t", 9)
+        if len(row) < 8:
+            raise VcfError("Row has fewer than 8 columns")
+
+        chrom, pos, _, ref, alt, _, qc_filter, info = row[:8]
+        if "," in alt:
+            raise VcfError("Multiallelic rows are not supported")
+
+        info = parse_info(info, self.header.info_fields, self.fields_to_parse)
+        lof_annotations = self.get_lof_annotations(info)
+        if not lof_annotations:
+            return None
+
+        liftover_variant_id = info.get(self.liftover_field, None)
+        if liftover_variant_id:
+            liftover_variant_id = liftover_variant_id.replace(":", "-")
+
+        variant = {
+            "reference_genome": self.reference_genome,
+            "variant_id": "-".join([re.sub(r"^chr", "", chrom), pos, ref, alt]),
+            "liftover_variant_id": liftover_variant_id,
+            "qc_filter": ",".join(qc_filter.split(";")) if qc_filter != "." else "PASS",
+            "AC": info.get("AC"),
+            "AN": info.get("AN"),
+            "AF": info.get("AF"),
+            "annotations": [
+                {
+                    "consequence": annotation["Consequence"],
+                    "gene_id": annotation["Gene"],
+                    "gene_symbol": annotation["SYMBOL"],
+                    "transcript_id": annotation["Feature"],
+                    "loftee": annotation.get("LoF"),
+                    "loftee_filter": annotation.get("LoF_filter"),
+                    "loftee_flags": annotation.get("LoF_flags"),
+                }
+                for annotation in lof_annotations
+            ],
+            "tags": [
+                {"label": label, "value": str(info[field])}
+                for field, label in self.tag_fields.items()
+                if info.get(field) is not None
+            ],
+        }
+
+        if len(row) == 10:
+            variant.update(
+                summarize_genotypes(row[8], row[9], self.header.sample_ids, self.max_samples)
+            )
+
+        return variant
+
+    def iter_positions(self, lines, first_line_number):
+        """
+        Yield a (last line number, variants) pair for each position with LoF variants, where
+        variants is a list of (line number, variant) pairs.
+
+        Rows for the same variant must be at the same position, and are merged into the variant
+        from the first of those rows.
+        """
+        position = None
+        position_variants = {}
+        last_line_number = first_line_number - 1
+        for line_number, line in enumerate(lines, first_line_number):
+            if not line.strip():
+                continue
+
+            row_position = line.split("\t", 2)[:2]
+            if row_position != position:
+                if position_variants:
+                    yield last_line_number, list(position_variants.values())
+
+                position = row_position
+                position_variants = {}
+
+            try:
+                variant = self.convert_row(line)
+            except VcfError as error:
+                raise VcfError(f"Line {line_number}: {error}") from error
+
+            self.num_rows += 1
+            last_line_number = line_number
+
+            if variant is None:
+                self.num_skipped_rows += 1
+                continue
+
+            existing_variant = position_variants.get(variant["variant_id"])
+            if existing_variant:
+                existing_variant[1]["annotations"].extend(variant["annotations"])
+                existing_variant[1]["tags"].extend(variant["tags"])
+            else:
+                position_variants[variant["variant_id"]] = (line_number, variant)
+
+        if position_variants:
+            yield last_line_number, list(position_variants.values())
@@ -1,46 +1,46 @@
 from rest_framework.exceptions import ValidationError
 
 from curation_portal.constants import VERDICTS
-from curation_portal.models import CurationResult
+from curation_portal.models import CurationResult, FLAG_BITS, encode_flags
 
+NOT_LOF_FLAGS_BITMASK = (
+    FLAG_BITS["flag_mapping_error"]
+    | FLAG_BITS["flag_genotyping_error"]
+    | FLAG_BITS["flag_inconsequential_transcript"]
+    | FLAG_BITS["flag_rescue"]
+)
 
-def allowed_verdicts(curation_result):
-    if isinstance(curation_result, CurationResult):
-        curation_result = {
-            f.name: getattr(curation_result, f.name) for f in curation_result._meta.get_fields()
-        }
 
-    if not isinstance(curation_result, dict):
-        raise TypeError("curation_result must be a dict or CurationResult instance")
-
-    any_flag_checked = any(
-        [value for (key, value) in curation_result.items() if key.startswith("flag_")]
-    )
-
-    if not any_flag_checked:
+def allowed_verdicts_for_flags(flags_bitmask):
+    """Return the verdicts allowed for a bitmask of checked flags."""
+    if not flags_bitmask:
         return ["lof"]
 
-    if curation_result.get("flag_flow_chart_overridden", False):
+    if flags_bitmask & FLAG_BITS["flag_flow_chart_overridden"]:
         return [*VERDICTS]
 
-    if curation_result.get("flag_no_read_data", False):
+    if flags_bitmask & FLAG_BITS["flag_no_read_data"]:
         return ["uncertain"]
 
-    if curation_result.get("flag_reference_error", False):
+    if flags_bitmask & FLAG_BITS["flag_reference_error"]:
         return ["not_lof"]
 
-    if (
-        curation_result.get("flag_mapping_error", False)
-        or curation_result.get("flag_genotyping_error", False)
-        or curation_result.get("flag_inconsequential_transcript", False)
-        or curation_result.get("flag_rescue", False)
-    ):
+    if flags_bitmask & NOT_LOF_FLAGS_BITMASK:
         return ["uncertain", "likely_not_lof", "not_lof"]
 
-    if any_flag_checked:
-        return ["lof", "likely_lof", "uncertain"]
+    return ["lof", "likely_lof", "uncertain"]
+
+
+def allowed_verdicts(curation_result):
+    if isinstance(curation_result, CurationResult):
+        curation_result = {
+            f.name: getattr(curation_result, f.name) for f in curation_result._meta.get_fields()
+        }
+
+    if not isinstance(curation_result, dict):
+        raise TypeError("curation_result must be a dict or CurationResult instance")
 
-    return []
+    return allowed_verdicts_for_flags(encode_flags(curation_result))
 
 
 def verdict_is_valid(curation_result):
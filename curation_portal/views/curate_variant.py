@@ -1,7 +1,13 @@
 # pylint: disable=too-many-locals
 
+import base64
+import time
+import uuid
+
+from cloudpathlib import CloudPath
 from cloudpathlib.anypath import to_anypath
-from django.http.response import FileResponse
+from django.conf import settings
+from django.http.response import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework.exceptions import NotFound, ParseError
@@ -11,7 +17,7 @@ from rest_framework.response import Response
 from rest_framework.serializers import ChoiceField, ModelSerializer
 from rest_framework.views import APIView
 
-from curation_portal.filters import AssignmentFilter
+from curation_portal.bam import BamError, slice_bam
 from curation_portal.models import (
     FLAG_FIELDS,
     CurationAssignment,
@@ -22,6 +28,17 @@ from curation_portal.models import (
     Project,
     User,
 )
+from curation_portal.navigation import get_assignment_navigation
+from curation_portal.reads import (
+    FileRange,
+    StreamMetrics,
+    get_variant_region,
+    iter_file_range,
+    open_reads_file,
+    parse_range_header,
+)
+from curation_portal.reads_cache import get_reads_cache
+from curation_portal.reads_snippets import find_snippet
 from curation_portal.serializers import CustomFlagCurationResultSerializer
 from curation_portal.verdict import validate_result_verdict
 
@@ -105,11 +122,11 @@ class CurationResultSerializer(ModelSerializer):
         return instance
 
 
-def serialize_adjacent_variant(variant_values):
-    if not variant_values:
+def serialize_adjacent_variant(navigation_entry):
+    if not navigation_entry:
         return None
 
-    return {"id": variant_values["variant"], "variant_id": variant_values["variant__variant_id"]}
+    return {"id": navigation_entry.variant, "variant_id": navigation_entry.variant_id}
 
 
 class OwnerAccessible:
@@ -143,6 +160,9 @@ class OwnerAccessible:
         return self.request.user.curation_assignments  # pylint: disable=no-member
 
 
+READS_FILE_CONTENT_TYPE = "application/octet-stream"
+
+
 class ReadsFileView(APIView, OwnerAccessible):
     permission_classes = (IsAuthenticated,)
 
@@ -157,11 +177,9 @@ class ReadsFileView(APIView, OwnerAccessible):
         except CurationAssignment.DoesNotExist as error:
             raise NotFound from error
 
-    @method_decorator(ensure_csrf_cookie)
-    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
-        assignment = self.get_assignment()  # 404 if assignment doesn't exist for a curator
-
-        file = request.GET.get("file")
+    def get_reads_file_path(self, assignment):
+        """Return the path to the reads file, or its index, requested for a variant."""
+        file = self.request.GET.get("file")
         if not file:
             raise ParseError("Missing required query parameter 'file'.")
 
@@ -180,18 +198,190 @@ class ReadsFileView(APIView, OwnerAccessible):
         elif ".crai" in file:
             file_to_read = file_to_read + ".crai"
 
-        file_to_read = to_anypath(file_to_read)
+        return to_anypath(file_to_read)
+
+    @method_decorator(ensure_csrf_cookie)
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        started_at = time.perf_counter()
+        assignment = self.get_assignment()  # 404 if assignment doesn't exist for a curator
+
+        file_to_read = self.get_reads_file_path(assignment)
+        # Serve precomputed snippets of BAM files around the variant when available
+        file_to_read = find_snippet(assignment.variant.variant_id, file_to_read) or file_to_read
+        is_index_file = file_to_read.suffix in (".bai", ".crai")
+
+        # Only files in cloud storage are cached on local disk.
+        reads_cache = get_reads_cache() if isinstance(file_to_read, CloudPath) else None
+        if reads_cache:
+            file_info = reads_cache.get_file_info(file_to_read)
+            if not file_info.exists:
+                raise NotFound("File for variant does not exist.")
+
+            size = file_info.size
+        else:
+            if not file_to_read.exists():
+                raise NotFound("File for variant does not exist.")
+
+            size = file_to_read.stat().st_size
+
+        ranges = parse_range_header(request.META.get("HTTP_RANGE"), size)
+        metrics = StreamMetrics(str(file_to_read), started_at=started_at)
+
+        source = file_to_read
+        if reads_cache and ranges != []:
+            last_byte = max(end for _, end in ranges) if ranges else size - 1
+            cached_file = reads_cache.get_cached_file(
+                "index" if is_index_file else "header", file_to_read, file_info, last_byte
+            )
+            if cached_file:
+                source = cached_file
+
+        if ranges is None:
+            response = self.get_file_range_response(source, 0, size - 1, metrics)
+        elif not ranges:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            response = self.get_file_range_response(source, start, end, metrics)
+            response.status_code = 206
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            response = self.get_multiple_ranges_response(source, size, ranges, metrics)
+
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    def get_file_range_response(
+        self, file_to_read, start, end, metrics
+    ):  # pylint: disable=no-self-use
+        # FileResponse allows the WSGI server to send local files with sendfile.
+        response = FileResponse(
+            FileRange(open_reads_file(file_to_read), start, end, metrics=metrics),
+            content_type=READS_FILE_CONTENT_TYPE,
+        )
+        response.block_size = settings.CURATION_PORTAL_READS_BUFFER_SIZE
+        response["Content-Length"] = end - start + 1
+        return response
+
+    def get_multiple_ranges_response(
+        self, file_to_read, size, ranges, metrics
+    ):  # pylint: disable=no-self-use
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f"\r\n--{boundary}\r\n"
+                f"Content-Type: {READS_FILE_CONTENT_TYPE}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode("ascii")
+            for start, end in ranges
+        ]
+        closing_boundary = f"\r\n--{boundary}--\r\n".encode("ascii")
+
+        def stream_contents():
+            with open_reads_file(file_to_read) as handle:
+                for part_header, (start, end) in zip(part_headers, ranges):
+                    yield part_header
+                    yield from iter_file_range(handle, start, end, metrics=metrics)
+
+            yield closing_boundary
+            metrics.finish()
+
+        response = StreamingHttpResponse(
+            stream_contents(),
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response["Content-Length"] = (
+            sum(len(part_header) for part_header in part_headers)
+            + sum(end - start + 1 for start, end in ranges)
+            + len(closing_boundary)
+        )
+        return response
+
+
+# Maximum number of bases on either side of a variant that can be requested in a reads slice.
+MAX_READS_SLICE_WINDOW = 10000
+
+
+class ReadsSliceView(ReadsFileView):
+    """
+    Return the alignments from a BAM file that overlap a window around a variant.
+
+    Only the BGZF blocks of the BAM file that contain the header and the alignments in the window
+    are read, using the BAM file's index. The response contains a new BAM file with only those
+    alignments and its index, both base64 encoded.
+    """
+
+    def get_window(self):
+        window = self.request.GET.get("window", settings.CURATION_PORTAL_READS_SLICE_WINDOW)
+        try:
+            window = int(window)
+        except ValueError as error:
+            raise ParseError("Invalid window.") from error
+
+        if window < 0 or window > MAX_READS_SLICE_WINDOW:
+            raise ParseError(f"Window must be between 0 and {MAX_READS_SLICE_WINDOW}.")
+
+        return window
+
+    def get_index_data(self, index_file):  # pylint: disable=no-self-use
+        # Only files in cloud storage are cached on local disk.
+        reads_cache = get_reads_cache() if isinstance(index_file, CloudPath) else None
+        if reads_cache:
+            file_info = reads_cache.get_file_info(index_file)
+            if not file_info.exists:
+                raise NotFound("Index for file does not exist.")
+
+            cached_file = reads_cache.get_cached_file(
+                "index", index_file, file_info, file_info.size - 1
+            )
+            if cached_file:
+                return cached_file.read_bytes()
+        elif not index_file.exists():
+            raise NotFound("Index for file does not exist.")
+
+        with open_reads_file(index_file) as handle:
+            return handle.read()
+
+    @method_decorator(ensure_csrf_cookie)
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        started_at = time.perf_counter()
+        assignment = self.get_assignment()  # 404 if assignment doesn't exist for a curator
+        variant = assignment.variant
+
+        file_to_read = self.get_reads_file_path(assignment)
+        if file_to_read.suffix != ".bam":
+            raise ParseError("Only BAM files can be sliced.")
+
+        window = self.get_window()
+
         if not file_to_read.exists():
             raise NotFound("File for variant does not exist.")
 
-        def stream_contents():
-            # Using buffer_size to stream in manageable chunks.
-            buffer_size = 8192
-            with file_to_read.open(mode="rb", buffering=buffer_size) as handle:
-                for chunk in handle:
-                    yield chunk
+        index_data = self.get_index_data(file_to_read.with_name(file_to_read.name + ".bai"))
+
+        start, end = get_variant_region(variant.pos, variant.ref, window)
+
+        try:
+            with open_reads_file(file_to_read) as handle:
+                bam_data, index_data = slice_bam(handle, index_data, variant.chrom, start, end)
+        except BamError as error:
+            raise ParseError(f"Unable to read BAM file: {error}") from error
+
+        metrics = StreamMetrics(f"slice of {file_to_read}", started_at=started_at)
+        metrics.record(len(bam_data) + len(index_data))
+        metrics.finish()
 
-        return FileResponse(stream_contents(), as_attachment=False)
+        return Response(
+            {
+                "chrom": variant.chrom,
+                "start": start + 1,
+                "stop": end,
+                "bam": base64.b64encode(bam_data).decode("ascii"),
+                "bai": base64.b64encode(index_data).decode("ascii"),
+            }
+        )
 
 
 class CurateVariantView(APIView, OwnerAccessible):
@@ -220,44 +410,10 @@ class CurateVariantView(APIView, OwnerAccessible):
             next_variant = None
             previous_variant = None
         else:
-            filtered_assignments = AssignmentFilter(
-                request.GET,
-                request.user.curation_assignments.filter(
-                    variant__project=assignment.variant.project
-                ),
-            )
-
-            previous_site_variants = (
-                filtered_assignments.qs.filter(variant__xpos__lt=assignment.variant.xpos)
-                .order_by("variant__xpos", "variant__ref", "variant__alt")
-                .reverse()
-                .values("variant", "variant__variant_id")
-            )
-            num_previous_site_variants = previous_site_variants.count()
-            previous_site_variant = previous_site_variants.first()
-
-            colocated_variants = (
-                filtered_assignments.qs.filter(variant__xpos=assignment.variant.xpos)
-                .order_by("variant__xpos", "variant__ref", "variant__alt")
-                .values("variant", "variant__variant_id")
-            )
-
-            next_site_variant = (
-                filtered_assignments.qs.filter(variant__xpos__gt=assignment.variant.xpos)
-                .order_by("variant__xpos", "variant__ref", "variant__alt")
-                .values("variant", "variant__variant_id")
-                .first()
-            )
-
-            surrounding_variants = [previous_site_variant, *colocated_variants, next_site_variant]
-            index_in_surrounding_variants = [
-                v["variant__variant_id"] if v is not None else None for v in surrounding_variants
-            ].index(assignment.variant.variant_id)
-
-            previous_variant = surrounding_variants[index_in_surrounding_variants - 1]
-            next_variant = surrounding_variants[index_in_surrounding_variants + 1]
-
-            index = num_previous_site_variants + index_in_surrounding_variants - 1
+            navigation = get_assignment_navigation(request.user, assignment.variant, request.GET)
+            index = navigation.index
+            previous_variant = navigation.previous
+            next_variant = navigation.next
 
         return Response(
             {
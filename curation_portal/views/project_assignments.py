@@ -1,18 +1,24 @@
+import base64
 import itertools
+import json
 from collections import Counter, defaultdict
 
 from django.db import transaction
-from django.db.models import Prefetch
+from django.db.models import Prefetch, Q
 from rest_framework import serializers
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from curation_portal.caching import invalidate_assignment_navigation, invalidate_project_permissions
 from curation_portal.constants import CONSEQUENCE_TERM_RANK
 from curation_portal.filters import AssignmentFilter
-from curation_portal.serializers import CustomFlagCurationResultSerializer
+from curation_portal.serializers import (
+    BULK_CREATE_BATCH_SIZE,
+    CustomFlagCurationResultSerializer,
+)
 from curation_portal.models import (
     CurationAssignment,
     CurationResult,
@@ -22,6 +28,8 @@ from curation_portal.models import (
     VariantAnnotation,
 )
 
+MAX_ASSIGNMENTS_PAGE_SIZE = 1000
+
 
 class VariantSerializer(serializers.ModelSerializer):
     major_consequence = serializers.SerializerMethodField()
@@ -47,7 +55,7 @@ class ResultSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CurationResult
-        fields = "__all__"
+        exclude = ("flags_bitmask",)
 
 
 class AssignmentSerializer(serializers.ModelSerializer):
@@ -60,6 +68,36 @@ class AssignmentSerializer(serializers.ModelSerializer):
 
 
 class NewAssignmentListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    project_variant_ids = None
+    existing_assignments = None
+
+    def to_internal_value(self, data):
+        # Look up the requested variants and any existing assignments with a single query each
+        # so that each item's validation does not have to query the database.
+        if isinstance(data, list):
+            items = [item for item in data if isinstance(item, dict)]
+            variant_ids = set(
+                item["variant_id"] for item in items if isinstance(item.get("variant_id"), str)
+            )
+            curators = set(
+                item["curator"] for item in items if isinstance(item.get("curator"), str)
+            )
+
+            self.project_variant_ids = dict(
+                Variant.objects.filter(
+                    project=self.context["project"], variant_id__in=variant_ids
+                ).values_list("variant_id", "id")
+            )
+            self.existing_assignments = set(
+                CurationAssignment.objects.filter(
+                    variant__project=self.context["project"],
+                    variant__variant_id__in=variant_ids,
+                    curator__username__in=curators,
+                ).values_list("curator__username", "variant__variant_id")
+            )
+
+        return super().to_internal_value(data)
+
     def validate(self, attrs):
         # Check that all curator/variant ID pairs in the list are unique
         assignment_counts = Counter(
@@ -81,6 +119,46 @@ class NewAssignmentListSerializer(serializers.ListSerializer):  # pylint: disabl
 
         return attrs
 
+    def create(self, validated_data):
+        project = self.context["project"]
+
+        # Create any curators that do not yet have an account.
+        usernames = set(item["curator"] for item in validated_data)
+        curators = {user.username: user for user in User.objects.filter(username__in=usernames)}
+        User.objects.bulk_create(
+            [User(username=username) for username in usernames if username not in curators],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        if len(curators) < len(usernames):
+            curators = {user.username: user for user in User.objects.filter(username__in=usernames)}
+
+        variant_ids = self.project_variant_ids
+        if variant_ids is None:
+            variant_ids = dict(
+                Variant.objects.filter(
+                    project=project,
+                    variant_id__in=set(item["variant_id"] for item in validated_data),
+                ).values_list("variant_id", "id")
+            )
+
+        assignments = [
+            CurationAssignment(
+                curator=curators[item["curator"]], variant_id=variant_ids[item["variant_id"]]
+            )
+            for item in validated_data
+        ]
+        CurationAssignment.objects.bulk_create(
+            assignments, batch_size=BULK_CREATE_BATCH_SIZE, ignore_conflicts=True
+        )
+
+        # Bulk operations do not send the signals that invalidate cached navigation and permissions.
+        curator_ids = [curator.id for curator in curators.values()]
+        invalidate_assignment_navigation(curator_ids)
+        invalidate_project_permissions(curator_ids)
+
+        return assignments
+
 
 class NewAssignmentSerializer(serializers.Serializer):
     curator = serializers.CharField(max_length=150)
@@ -90,17 +168,32 @@ class NewAssignmentSerializer(serializers.Serializer):
         list_serializer_class = NewAssignmentListSerializer
 
     def validate_variant_id(self, value):
-        if not Variant.objects.filter(project=self.context["project"], variant_id=value).exists():
+        # When creating a list of assignments, variants are looked up in bulk by the list serializer.
+        project_variant_ids = getattr(self.parent, "project_variant_ids", None)
+        if project_variant_ids is not None:
+            variant_exists = value in project_variant_ids
+        else:
+            variant_exists = Variant.objects.filter(
+                project=self.context["project"], variant_id=value
+            ).exists()
+
+        if not variant_exists:
             raise serializers.ValidationError("Variant does not exist")
 
         return value
 
     def validate(self, attrs):
-        if CurationAssignment.objects.filter(
-            variant__project=self.context["project"],
-            variant__variant_id=attrs["variant_id"],
-            curator__username=attrs["curator"],
-        ).exists():
+        existing_assignments = getattr(self.parent, "existing_assignments", None)
+        if existing_assignments is not None:
+            assignment_exists = (attrs["curator"], attrs["variant_id"]) in existing_assignments
+        else:
+            assignment_exists = CurationAssignment.objects.filter(
+                variant__project=self.context["project"],
+                variant__variant_id=attrs["variant_id"],
+                curator__username=attrs["curator"],
+            ).exists()
+
+        if assignment_exists:
             raise serializers.ValidationError("Duplicate assignment")
 
         return attrs
@@ -116,6 +209,32 @@ class NewAssignmentSerializer(serializers.Serializer):
         raise NotImplementedError
 
 
+def encode_assignments_cursor(assignment):
+    position = [assignment.variant.xpos, assignment.variant.ref, assignment.variant.alt]
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def decode_assignments_cursor(cursor):
+    try:
+        xpos, ref, alt = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(xpos, int) or not isinstance(ref, str) or not isinstance(alt, str):
+            raise ValueError
+    except (TypeError, ValueError) as error:
+        raise ParseError("Invalid cursor.") from error
+
+    return xpos, ref, alt
+
+
+def assignments_after(assignments, cursor):
+    """Filter assignments to those that come after the cursor position in variant order."""
+    xpos, ref, alt = decode_assignments_cursor(cursor)
+    return assignments.filter(
+        Q(variant__xpos__gt=xpos)
+        | Q(variant__xpos=xpos, variant__ref__gt=ref)
+        | Q(variant__xpos=xpos, variant__ref=ref, variant__alt__gt=alt)
+    )
+
+
 class ProjectAssignmentsView(APIView):
     permission_classes = (IsAuthenticated,)
 
@@ -143,10 +262,45 @@ class ProjectAssignmentsView(APIView):
             .order_by("variant__xpos", "variant__ref", "variant__alt")
         )
 
-        filtered_assignments = AssignmentFilter(request.GET, queryset=assignments)
-
-        assignments_serializer = AssignmentSerializer(filtered_assignments.qs, many=True)
-        return Response({"assignments": assignments_serializer.data})
+        # Filters on variant annotations join to a variant's annotations, so an assignment matches
+        # once for each matching annotation.
+        filtered_assignments = AssignmentFilter(request.GET, queryset=assignments).qs.distinct()
+
+        response = {
+            "total": assignments.count(),
+            "filtered": filtered_assignments.count(),
+        }
+
+        # Assignments are paginated if a page size is requested. Pages are selected using
+        # a cursor pointing to the position of the last assignment on the previous page
+        # (keyset pagination), so that the cost of fetching a page does not depend on its
+        # position in the list.
+        page_size = request.GET.get("page_size")
+        if page_size is None:
+            page = filtered_assignments
+        else:
+            try:
+                page_size = int(page_size)
+            except ValueError as error:
+                raise ParseError("Invalid page size.") from error
+
+            if not 1 <= page_size <= MAX_ASSIGNMENTS_PAGE_SIZE:
+                raise ParseError(f"Page size must be between 1 and {MAX_ASSIGNMENTS_PAGE_SIZE}.")
+
+            page = filtered_assignments
+            cursor = request.GET.get("cursor")
+            if cursor:
+                page = assignments_after(page, cursor)
+
+            # Fetch one extra assignment to determine if there is a next page.
+            page = list(page[: page_size + 1])
+            has_next_page = len(page) > page_size
+            page = page[:page_size]
+
+            response["next_cursor"] = encode_assignments_cursor(page[-1]) if has_next_page else None
+
+        response["assignments"] = AssignmentSerializer(page, many=True).data
+        return Response(response)
 
     def post(self, request, *args, **kwargs):  # pylint: disable=unused-argument
         project = self.get_project()
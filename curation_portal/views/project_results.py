@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from django.db import transaction
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.generics import get_object_or_404
@@ -6,6 +8,7 @@ from rest_framework.response import Response
 from rest_framework.serializers import ChoiceField, ModelSerializer, SerializerMethodField
 from rest_framework.views import APIView
 
+from curation_portal.flag_counts import get_flag_counts
 from curation_portal.models import CurationResult, Project, Variant, User, FLAG_FIELDS
 from curation_portal.serializers import ImportedResultSerializer, CustomFlagCurationResultSerializer
 
@@ -85,7 +88,7 @@ class ProjectResultsView(APIView):
 
         results = CurationResult.objects.filter(
             assignment__variant__project=project
-        ).prefetch_related("assignment__curator", "assignment__variant", "custom_flags__flag")
+        ).prefetch_related("assignment__curator", "assignment__variant", "custom_flags")
         serializer = CurationResultSerializer(results, many=True)
         return Response({"results": serializer.data})
 
@@ -102,3 +105,41 @@ class ProjectResultsView(APIView):
             project.save()  # Save project to set updated_at timestamp
 
         return Response({})
+
+
+class ProjectResultFlagsView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get_project(self):
+        project = get_object_or_404(Project, id=self.kwargs["project_id"])
+        if not self.request.user.has_perm("curation_portal.change_project", project):
+            if not self.request.user.has_perm("curation_portal.view_project", project):
+                raise NotFound
+
+            raise PermissionDenied
+
+        return project
+
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        project = self.get_project()
+
+        # Results do not store their project, so most of the time spent counting flags for a large
+        # project goes to joining results to their assignments and variants (about 1s for 1M
+        # results). An index covering flags_bitmask and verdict does not reduce this.
+        flag_counts = get_flag_counts(
+            CurationResult.objects.filter(assignment__variant__project=project)
+        )
+
+        co_occurrence = defaultdict(dict)
+        for (flag, other_flag), count in flag_counts.co_occurrence.items():
+            co_occurrence[flag][other_flag] = count
+            co_occurrence[other_flag][flag] = count
+
+        return Response(
+            {
+                "num_results": flag_counts.num_results,
+                "flags": {flag: flag_counts.flags[flag] for flag in FLAG_FIELDS},
+                "co_occurrence": co_occurrence,
+                "num_invalid_verdicts": flag_counts.num_invalid_verdicts,
+            }
+        )
@@ -1,26 +1,18 @@
-import json
-import csv
 import re
 
-from django.db.models import Prefetch
-from django.http import HttpResponse
 from django_filters import FilterSet
 from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
-from curation_portal.models import (
-    CurationAssignment,
-    Project,
-    VariantAnnotation,
-    CustomFlag,
-    FLAG_FIELDS,
-    FLAG_LABELS,
-    CurationResult,
-    CustomFlagCurationResult,
-    User,
+from curation_portal.export import (
+    get_assignment_genes,
+    get_assignment_transcripts,
+    results_csv_response,
+    results_json_response,
 )
+from curation_portal.models import CurationAssignment, Project
 
 from curation_portal.serializers import ExportedResultSerializer
 
@@ -44,20 +36,9 @@ class ExportProjectResultsView(APIView):
     def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
         project = self.get_project()
 
-        completed_assignments = (
-            CurationAssignment.objects.filter(
-                variant__project=project, result__verdict__isnull=False
-            )
-            .select_related("curator", "variant", "result")
-            .prefetch_related(
-                Prefetch(
-                    "variant__annotations",
-                    queryset=VariantAnnotation.objects.only(
-                        "variant_id", "gene_id", "gene_symbol", "transcript_id"
-                    ),
-                )
-            )
-        )
+        completed_assignments = CurationAssignment.objects.filter(
+            variant__project=project, result__verdict__isnull=False
+        ).select_related("curator", "variant", "result", "result__editor")
 
         # Project owners can download all results for the project and optionally filter them
         # by curator.
@@ -72,18 +53,6 @@ class ExportProjectResultsView(APIView):
             queryset=completed_assignments,
         )
 
-        # Prefetch related objects and annotations
-        filtered_assignments_qs = filtered_assignments.qs.prefetch_related(
-            Prefetch(
-                "result__custom_flags",
-                queryset=CustomFlagCurationResult.objects.select_related("flag"),
-            ),
-            Prefetch(
-                "result__editor",
-                queryset=User.objects.only("username"),
-            ),
-        )
-
         # Include project name and (if applicable) curator name in downloaded file name.
         filename_prefix = f"{project.name}"
         if "curator__username" in filter_params:
@@ -94,78 +63,33 @@ class ExportProjectResultsView(APIView):
         filename_prefix = re.sub(r"(?u)[^-\w]", "-", filename_prefix)
 
         if request.query_params.get("format") == "json":
-            return self.get_json_response(filtered_assignments_qs, filename_prefix)
+            return self.get_json_response(filtered_assignments.qs, filename_prefix)
         else:
-            return self.get_csv_response(filtered_assignments_qs, filename_prefix)
-
-    def get_json_response(self, filtered_assignments_qs, filename_prefix):
-        response = HttpResponse(content_type="application/json")
-        response["Content-Disposition"] = f'attachment; filename="{filename_prefix}_results.json"'
+            return self.get_csv_response(filtered_assignments.qs, filename_prefix)
 
-        project = self.get_project()
-        curation_results = CurationResult.objects.filter(
-            assignment__in=filtered_assignments_qs
-        ).prefetch_related(
-            Prefetch(
-                "custom_flags",
-                queryset=CustomFlagCurationResult.objects.select_related("flag"),
-            ),
+    def get_json_response(  # pylint: disable=no-self-use
+        self, filtered_assignments_qs, filename_prefix
+    ):
+        return results_json_response(
+            filtered_assignments_qs, ExportedResultSerializer(), f"{filename_prefix}_results.json"
         )
-        serializer = ExportedResultSerializer(
-            instance=curation_results,
-            many=True,
-            context={"project": project},
-        )
-        response.write(json.dumps(serializer.data))
-
-        return response
-
-    def get_csv_response(self, filtered_assignments_qs, filename_prefix):
-        result_fields = ["notes", "curator_comments", "should_revisit", "verdict", *FLAG_FIELDS]
-
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{filename_prefix}_results.csv"'
 
-        writer = csv.writer(response)
-
-        header_row = ["Variant ID", "Gene", "Transcript", "Curator", "Editor"] + [
-            FLAG_LABELS.get(f, " ".join(word.capitalize() for word in f.split("_")))
-            for f in result_fields
+    def get_csv_response(  # pylint: disable=no-self-use
+        self, filtered_assignments_qs, filename_prefix
+    ):
+        columns = [
+            ("Variant ID", lambda assignment: assignment.variant.variant_id),
+            ("Gene", get_assignment_genes),
+            ("Transcript", get_assignment_transcripts),
+            ("Curator", lambda assignment: assignment.curator.username),
+            (
+                "Editor",
+                lambda assignment: (
+                    assignment.result.editor.username if assignment.result.editor else None
+                ),
+            ),
         ]
-        # Custom flag headers
-        custom_flags = CustomFlag.objects.all()
-        header_row += [f.label for f in custom_flags]
-
-        writer.writerow(header_row)
-
-        for assignment in filtered_assignments_qs:
-            editor = assignment.result.editor
-            custom_flag_results = {
-                flag.flag.key: flag.checked for flag in assignment.result.custom_flags.all()
-            }
-
-            row = (
-                [
-                    assignment.variant.variant_id,
-                    ";".join(
-                        set(
-                            f"{annotation.gene_id}:{annotation.gene_symbol}"
-                            for annotation in assignment.variant.annotations.all()
-                        )
-                    ),
-                    ";".join(
-                        set(
-                            annotation.transcript_id
-                            for annotation in assignment.variant.annotations.all()
-                        )
-                    ),
-                    assignment.curator.username,
-                    editor.username if editor else None,
-                ]
-                + [getattr(assignment.result, f) for f in result_fields]
-                # Custom flag results
-                + [custom_flag_results.get(flag.key, False) for flag in custom_flags]
-            )
-            writer.writerow(row)
-
-        return response
+
+        return results_csv_response(
+            filtered_assignments_qs, columns, f"{filename_prefix}_results.csv"
+        )
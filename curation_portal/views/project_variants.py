@@ -1,14 +1,20 @@
 from django.db import transaction
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
 from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import BaseParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework.views import APIView
 
+from curation_portal.ingest import NDJSONDecodeError, chunked, iter_ndjson
 from curation_portal.models import Project, Variant
 from curation_portal.serializers import VariantSerializer as UploadedVariantSerializer
 
+DEFAULT_UPLOAD_CHUNK_SIZE = 5000
+
+MAX_UPLOAD_CHUNK_SIZE = 50000
+
 
 class VariantSerializer(ModelSerializer):
     class Meta:
@@ -16,8 +22,8 @@ class VariantSerializer(ModelSerializer):
         fields = ("variant_id",)
 
 
-class ProjectVariantsView(APIView):
-    permission_classes = (IsAuthenticated,)
+class ProjectOwnerMixin:  # pylint: disable=too-few-public-methods
+    """Get the project from the URL, only allowing access by project owners."""
 
     def get_project(self):
         project = get_object_or_404(Project, id=self.kwargs["project_id"])
@@ -29,6 +35,10 @@ class ProjectVariantsView(APIView):
 
         return project
 
+
+class ProjectVariantsView(ProjectOwnerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
     def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
         project = self.get_project()
 
@@ -53,3 +63,104 @@ class ProjectVariantsView(APIView):
             project.save()  # Save project to set updated_at timestamp
 
         return Response({})
+
+
+class UploadStreamParser(BaseParser):  # pylint: disable=too-few-public-methods
+    """
+    Accept request bodies of any content type without reading them.
+
+    The upload view reads the body from request.stream itself. However, session authentication's
+    CSRF check reads request.POST, which would otherwise fail for content types without a parser.
+    """
+
+    media_type = "*/*"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {}
+
+
+class ProjectVariantsUploadView(ProjectOwnerMixin, APIView):
+    """
+    Upload variants as newline delimited JSON (optionally gzip compressed).
+
+    The request body is read line by line, and variants are validated and saved in chunks of a
+    fixed size so that memory use does not depend on the size of the upload. Each chunk is saved
+    in its own transaction. A chunk that fails validation is not saved, but does not prevent
+    other chunks from being saved.
+    """
+
+    parser_classes = (UploadStreamParser,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_chunk_size(self):
+        try:
+            chunk_size = int(self.request.query_params.get("chunk_size", DEFAULT_UPLOAD_CHUNK_SIZE))
+        except ValueError as error:
+            raise ParseError("Invalid chunk size.") from error
+
+        if not 1 <= chunk_size <= MAX_UPLOAD_CHUNK_SIZE:
+            raise ParseError(f"Chunk size must be between 1 and {MAX_UPLOAD_CHUNK_SIZE}.")
+
+        return chunk_size
+
+    def save_chunk(self, project, chunk):
+        line_errors = [
+            {"line": line_number, "errors": [str(value)]}
+            for line_number, value in chunk
+            if isinstance(value, NDJSONDecodeError)
+        ]
+        if line_errors:
+            return {"errors": line_errors}
+
+        serializer = UploadedVariantSerializer(
+            data=[value for _, value in chunk], context={"project": project}, many=True
+        )
+        if not serializer.is_valid():
+            if isinstance(serializer.errors, dict):
+                # Errors for the chunk as a whole, such as duplicate variants.
+                return {"errors": serializer.errors}
+
+            return {
+                "errors": [
+                    {"line": line_number, "errors": item_errors}
+                    for (line_number, _), item_errors in zip(chunk, serializer.errors)
+                    if item_errors
+                ]
+            }
+
+        with transaction.atomic():
+            variants = serializer.save()
+
+        return {"created": len(variants)}
+
+    def post(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        project = self.get_project()
+
+        if not request.user.has_perm("curation_portal.add_variant_to_project", project):
+            raise PermissionDenied
+
+        chunk_size = self.get_chunk_size()
+
+        try:
+            chunks = []
+            for chunk_number, chunk in enumerate(chunked(iter_ndjson(request.stream), chunk_size)):
+                chunks.append(
+                    {
+                        "chunk": chunk_number,
+                        "first_line": chunk[0][0],
+                        "last_line": chunk[-1][0],
+                        **self.save_chunk(project, chunk),
+                    }
+                )
+        except (OSError, EOFError) as error:
+            # Raised by gzip for corrupt or truncated files
+            raise ParseError(f"Unable to read upload: {error}") from error
+
+        num_created = sum(chunk.get("created", 0) for chunk in chunks)
+        if num_created:
+            project.save()  # Save project to set updated_at timestamp
+
+        has_errors = any("errors" in chunk for chunk in chunks)
+        return Response(
+            {"created": num_created, "chunks": chunks}, status=400 if has_errors else 200
+        )
@@ -1,19 +1,14 @@
-import csv
-
-from django.db.models import Prefetch, Q
-from django.http import HttpResponse
+from django.db.models import Q
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
-from curation_portal.models import (
-    CurationAssignment,
-    CustomFlag,
-    Variant,
-    VariantAnnotation,
-    FLAG_FIELDS,
-    FLAG_LABELS,
+from curation_portal.export import (
+    get_assignment_genes,
+    get_assignment_transcripts,
+    results_csv_response,
 )
+from curation_portal.models import CurationAssignment, Variant
 
 
 class ExportVariantResultsView(APIView):
@@ -45,60 +40,16 @@ class ExportVariantResultsView(APIView):
                 & Q(result__verdict__isnull=False)
             )
             .distinct()
-            .select_related("curator", "variant", "result")
-            .prefetch_related(
-                Prefetch(
-                    "variant__annotations",
-                    queryset=VariantAnnotation.objects.only(
-                        "variant_id", "gene_id", "gene_symbol", "transcript_id"
-                    ),
-                )
-            )
+            .select_related("curator", "variant", "variant__project", "result")
         )
 
-        result_fields = ["notes", "curator_comments", "should_revisit", "verdict", *FLAG_FIELDS]
-
-        response = HttpResponse(content_type="text/csv")
-        response[
-            "Content-Disposition"
-        ] = f'attachment; filename="{kwargs["variant_id"]}_results.csv"'
-
-        writer = csv.writer(response)
-
-        header_row = ["Project", "Gene", "Transcript", "Curator"] + [
-            FLAG_LABELS.get(f, " ".join(word.capitalize() for word in f.split("_")))
-            for f in result_fields
+        columns = [
+            ("Project", lambda assignment: assignment.variant.project.name),
+            ("Gene", get_assignment_genes),
+            ("Transcript", get_assignment_transcripts),
+            ("Curator", lambda assignment: assignment.curator.username),
         ]
-        # Custom flag headers
-        header_row += [f.label for f in CustomFlag.objects.all()]
-
-        writer.writerow(header_row)
 
-        for assignment in completed_assignments:
-            row = (
-                [
-                    assignment.variant.project.name,
-                    ";".join(
-                        set(
-                            f"{annotation.gene_id}:{annotation.gene_symbol}"
-                            for annotation in assignment.variant.annotations.all()
-                        )
-                    ),
-                    ";".join(
-                        set(
-                            annotation.transcript_id
-                            for annotation in assignment.variant.annotations.all()
-                        )
-                    ),
-                    assignment.curator.username,
-                ]
-                + [getattr(assignment.result, f) for f in result_fields]
-                # Custom flag results
-                + [
-                    getattr(assignment.result.custom_flags.filter(flag=f).first(), "checked", False)
-                    for f in CustomFlag.objects.all()
-                ]
-            )
-            writer.writerow(row)
-
-        return response
+        return results_csv_response(
+            completed_assignments, columns, f"{kwargs['variant_id']}_results.csv"
+        )
@@ -0,0 +1,22 @@
+"""
+gunicorn configuration.
+
+Streaming reads files holds a thread for the duration of a request, so each worker runs several
+threads. Worker and thread counts can be set with the GUNICORN_WORKERS and GUNICORN_THREADS
+environment variables.
+
+https://docs.gunicorn.org/en/stable/settings.html
+https://docs.gunicorn.org/en/stable/design.html#how-many-workers
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", ":8000")
+
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+errorlog = "-"
@@ -1,182 +1,254 @@
 #!/usr/bin/env python3
 
-# pip install PyVCF==0.6.8 tqdm==4.31.1
+# pip install cloudpathlib[gs] numpy tqdm
 
 import argparse
 import gzip
 import json
-import re
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-import hail as hl
-import vcf
 from tqdm import tqdm
 
-RANKED_CONSEQUENCE_TERMS = [
-    "transcript_ablation",
-    "splice_acceptor_variant",
-    "splice_donor_variant",
-    "stop_gained",
-    "frameshift_variant",
-    "stop_lost",
-    "start_lost",  # new in v81
-    "initiator_codon_variant",  # deprecated
-    "transcript_amplification",
-    "inframe_insertion",
-    "inframe_deletion",
-    "missense_variant",
-    "protein_altering_variant",  # new in v79
-    "splice_region_variant",
-    "incomplete_terminal_codon_variant",
-    "stop_retained_variant",
-    "synonymous_variant",
-    "coding_sequence_variant",
-    "mature_miRNA_variant",
-    "5_prime_UTR_variant",
-    "3_prime_UTR_variant",
-    "non_coding_transcript_exon_variant",
-    "non_coding_exon_variant",  # deprecated
-    "intron_variant",
-    "NMD_transcript_variant",
-    "non_coding_transcript_variant",
-    "nc_transcript_variant",  # deprecated
-    "upstream_gene_variant",
-    "downstream_gene_variant",
-    "TFBS_ablation",
-    "TFBS_amplification",
-    "TF_binding_site_variant",
-    "regulatory_region_ablation",
-    "regulatory_region_amplification",
-    "feature_elongation",
-    "regulatory_region_variant",
-    "feature_truncation",
-    "intergenic_variant",
-]
-
-CONSEQUENCE_TERM_RANK = {term: rank for rank, term in enumerate(RANKED_CONSEQUENCE_TERMS)}
-
-
-def get_rank(annotation):
-    terms = annotation["Consequence"].split("&")
-    return min(CONSEQUENCE_TERM_RANK.get(t) for t in terms)
-
-
-def variant_coordinate_id(locus):
-    return locus.contig.replace("^chr", "") + "-" + hl.str(locus.position)
-
-
-def convert_vcf_to_json(vcf_path, output_path, reference_genome="GRCh37", tag_fields=None):
-    variants = {}
-
-    # Initialise reference genome with liftover information
-    hl_reference_genome = hl.get_reference(reference_genome)
-    if reference_genome == "GRCh37":
-        hl_reference_genome.add_liftover(
-            "gs://hail-common/references/grch37_to_grch38.over.chain.gz",
-            "GRCh38",
-        )
-    else:
-        hl_reference_genome.add_liftover(
-            "gs://hail-common/references/grch38_to_grch37.over.chain.gz",
-            "GRCh37",
-        )
+from liftover import CHAIN_FILES, ChainFile
+
+# VCF parsing is shared with the ingest_vcf management command.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from curation_portal.vcf import (  # pylint: disable=import-error,wrong-import-position
+    VcfError,
+    VcfVariantReader,
+    open_vcf,
+    read_header,
+)
+
 
-    with gzip.open(vcf_path, "rt") as vcf_file:
-        reader = vcf.Reader(vcf_file, compressed=False)
+def open_file(path, mode):
+    if path.endswith((".gz", ".bgz")):
+        return gzip.open(path, mode + "t")
 
-        csq_header = (
-            reader.infos["CSQ"]  # pylint: disable=unsubscriptable-object
-            .desc.split("Format: ")[1]
-            .split("|")
+    return open(path, mode)  # pylint: disable=unspecified-encoding
+
+
+def convert_rows(chunk, header, reference_genome, tag_fields, max_samples):
+    """
+    Convert a chunk of VCF rows, given as a (first line number, lines) pair, to variants.
+
+    Returns the number of rows converted, a list of variants, and the number of rows that were
+    skipped because they have no LoF annotations. Rows for the same variant are merged. Liftover
+    variant IDs are None for variants without a liftover INFO field.
+    """
+    first_line_number, lines = chunk
+    reader = VcfVariantReader(
+        header, reference_genome=reference_genome, tag_fields=tag_fields, max_samples=max_samples
+    )
+    variants = [
+        variant
+        for _, position_variants in reader.iter_positions(lines, first_line_number)
+        for _, variant in position_variants
+    ]
+    return reader.num_rows, variants, reader.num_skipped_rows
+
+
+def iter_chunks(vcf_file, first_line_number, chunk_size):
+    """
+    Split the rows of a VCF file into chunks of about chunk_size rows. Each chunk is a pair of
+    the line number of its first row and a list of its rows.
+
+    Rows at the same position are kept in the same chunk, so that rows for the same variant are
+    merged.
+    """
+    chunk = []
+    chunk_end = None
+    for line_number, line in enumerate(vcf_file, first_line_number):
+        position = line.split("\t", 2)[:2]
+        if len(chunk) >= chunk_size and position != chunk_end:
+            yield line_number - len(chunk), chunk
+            chunk = []
+
+        chunk.append(line)
+        chunk_end = position
+
+    if chunk:
+        yield line_number - len(chunk) + 1, chunk  # pylint: disable=undefined-loop-variable
+
+
+def map_in_order(executor, fn, iterable, max_pending):
+    """
+    Like executor.map, but only submits max_pending items at a time, so that the input does not
+    have to be held in memory.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def add_missing_liftovers(variants, chain_file):
+    """Compute liftover variant IDs for variants without one in a single batch."""
+    variants = [variant for variant in variants if variant["liftover_variant_id"] is None]
+    if not variants:
+        return
+
+    contigs, positions = zip(*(variant["variant_id"].split("-")[:2] for variant in variants))
+    liftover_contigs, liftover_positions = chain_file.lift(contigs, [int(p) for p in positions])
+
+    # Store a chr:pos of liftover variant, since we don't need the allele info
+    for variant, contig, position in zip(variants, liftover_contigs, liftover_positions):
+        variant["liftover_variant_id"] = f"{contig}-{position}" if contig else None
+
+
+class VariantWriter:
+    """Write variants to a newline delimited JSON file, or a JSON array for .json files."""
+
+    def __init__(self, output_file, json_array=False):
+        self.output_file = output_file
+        self.json_array = json_array
+        self.num_variants = 0
+
+        if self.json_array:
+            self.output_file.write("[")
+
+    def write(self, variant):
+        if self.json_array:
+            if self.num_variants:
+                self.output_file.write(",")
+            json.dump(variant, self.output_file)
+        else:
+            self.output_file.write(json.dumps(variant) + "\n")
+
+        self.num_variants += 1
+
+    def close(self):
+        if self.json_array:
+            self.output_file.write("]")
+
+
+def convert_vcf_to_json(  # pylint: disable=too-many-arguments,too-many-locals
+    vcf_path,
+    output_path,
+    reference_genome="GRCh37",
+    tag_fields=None,
+    chain_path=None,
+    max_samples=100,
+    processes=None,
+    chunk_size=5000,
+    liftover_batch_size=50000,
+):
+    """
+    Convert a VCF file to a file of variants that can be uploaded to a project.
+
+    Chunks of rows are converted in parallel and written in order as they are completed.
+    Once a variant without a liftover INFO field is found, variants are buffered until
+    liftover_batch_size of them have been converted, and then lifted over together using the
+    chain file at chain_path.
+    """
+    tag_fields = tag_fields or {}
+    processes = processes or os.cpu_count()
+
+    liftover_genome = "GRCh38" if reference_genome == "GRCh37" else "GRCh37"
+    chain_file = ChainFile.read(chain_path or CHAIN_FILES[(reference_genome, liftover_genome)])
+
+    json_array = output_path.endswith((".json", ".json.gz"))
+    with open_vcf(vcf_path) as vcf_file, open_file(output_path, "w") as output_file:
+        header_line_number, header = read_header(vcf_file)
+        if not header.csq_fields:
+            raise VcfError("VCF file has no CSQ INFO field")
+
+        writer = VariantWriter(output_file, json_array=json_array)
+
+        pending_variants = []
+        num_skipped_rows = 0
+        is_waiting_for_liftover = False
+
+        def write_pending_variants():
+            add_missing_liftovers(pending_variants, chain_file)
+            for variant in pending_variants:
+                writer.write(variant)
+            pending_variants.clear()
+
+        convert_chunk = partial(
+            convert_rows,
+            header=header,
+            reference_genome=reference_genome,
+            tag_fields=tag_fields,
+            max_samples=max_samples,
         )
 
-        for row in tqdm(reader, unit=" rows"):
-            if len(row.ALT) > 1:
-                raise Exception(
-                    "VCF contains multiallelic rows, which are not supported by this script"
+        with ProcessPoolExecutor(max_workers=processes) as executor, tqdm(unit=" rows") as progress:
+            chunks = iter_chunks(vcf_file, header_line_number + 1, chunk_size)
+            results = map_in_order(executor, convert_chunk, chunks, processes * 2)
+            for num_rows, variants, num_chunk_skipped_rows in results:
+                num_skipped_rows += num_chunk_skipped_rows
+                pending_variants.extend(variants)
+                is_waiting_for_liftover = is_waiting_for_liftover or any(
+                    variant["liftover_variant_id"] is None for variant in variants
                 )
 
-            # Parse CSQ field
-            vep_annotations = [dict(zip(csq_header, v.split("|"))) for v in row.INFO.get("CSQ", [])]
-
-            # Filter to only LoF annotations
-            lof_annotations = [
-                annotation
-                for annotation in vep_annotations
-                if get_rank(annotation) <= CONSEQUENCE_TERM_RANK.get("frameshift_variant")
-            ]
-
-            # Sort annotations by severity
-            lof_annotations = sorted(lof_annotations, key=get_rank)
-
-            variant_id = "-".join(
-                map(str, [re.sub(r"^chr", "", row.CHROM), row.POS, row.REF, row.ALT[0]])
-            )
-
-            if not lof_annotations:
-                print(f"Skipping {variant_id}, no LoF annotations")
-                continue
-
-            liftover_field = "liftover_37" if reference_genome == "GRCh38" else "liftover_38"
-            liftover_variant_id = row.INFO.get(liftover_field, None)
-            if liftover_variant_id:
-                liftover_variant_id = liftover_variant_id.replace(":", "-")
-            else:
-                # Compute and store a chr:pos of liftover variant, since we don't need the
-                # allele info
-                liftover_variant_id = hl.eval(
-                    variant_coordinate_id(
-                        hl.liftover(
-                            hl.parse_variant(variant_id.replace("-", ":"), reference_genome)[0],
-                            "GRCh38" if reference_genome == "GRCh37" else "GRCh37",
-                        )
-                    )
-                )
+                # Write variants immediately unless they are waiting for a liftover batch
+                if not is_waiting_for_liftover or len(pending_variants) >= liftover_batch_size:
+                    write_pending_variants()
+                    is_waiting_for_liftover = False
 
-            if variant_id not in variants:
-                variants[variant_id] = {
-                    "reference_genome": reference_genome,
-                    "variant_id": variant_id,
-                    "liftover_variant_id": liftover_variant_id,
-                    "qc_filter": (row.FILTER.join(",") if row.FILTER else "PASS"),
-                    "AC": row.INFO["AC"],
-                    "AN": row.INFO["AN"],
-                    "AF": row.INFO["AF"],
-                    "n_homozygotes": sum(1 for s in list(row.samples) if s["GT"] == "1/1"),
-                    "annotations": [],
-                    "tags": [],
-                }
-
-            variant = variants[variant_id]
-
-            for annotation in lof_annotations:
-                variant["annotations"].append(
-                    {
-                        "consequence": annotation["Consequence"],
-                        "gene_id": annotation["Gene"],
-                        "gene_symbol": annotation["SYMBOL"],
-                        "transcript_id": annotation["Feature"],
-                        "loftee": annotation["LoF"],
-                        "loftee_filter": annotation["LoF_filter"],
-                        "loftee_flags": annotation["LoF_flags"],
-                    }
-                )
+                progress.update(num_rows)
 
-            if tag_fields:
-                for field, label in tag_fields.items():
-                    value = row.INFO.get(field, None)
-                    if value is not None:
-                        variant["tags"].append({"label": label, "value": value})
+        write_pending_variants()
+        writer.close()
 
-    with open(output_path, "w") as output_file:
-        json.dump(list(variants.values()), output_file)
+    print(f"Skipped {num_skipped_rows} rows without LoF annotations")
+    print(f"Wrote {writer.num_variants} variants to {output_path}")
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("vcf_path")
-    parser.add_argument("output_path")
+    parser.add_argument(
+        "output_path",
+        help=(
+            "Path to write variants to. Variants are written as newline delimited JSON, "
+            "unless the path ends with .json. Paths ending with .gz are gzip compressed."
+        ),
+    )
     parser.add_argument("--reference-genome", choices=["GRCh37", "GRCh38"], default="GRCh37")
     parser.add_argument("--tag-field", action="append", default=[])
+    parser.add_argument(
+        "--chain-file",
+        help=(
+            "Path to chain file used to lift over variants without a liftover INFO field. "
+            "Defaults to Hail's chain file for the reference genome."
+        ),
+    )
+    parser.add_argument(
+        "--max-samples",
+        type=int,
+        default=100,
+        help=(
+            "Maximum number of carriers to list sample IDs and genotypes for. "
+            "Depths and qualities of all carriers are included in DP_all, GQ_all, and AD_all."
+        ),
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of processes to convert rows with. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="Number of rows to convert in each process"
+    )
+    parser.add_argument(
+        "--liftover-batch-size",
+        type=int,
+        default=50000,
+        help="Maximum number of variants to buffer for lifting over together",
+    )
 
     args = parser.parse_args()
 
@@ -194,6 +266,11 @@ def main():
         args.output_path,
         reference_genome=args.reference_genome,
         tag_fields=tag_fields,
+        chain_path=args.chain_file,
+        max_samples=args.max_samples,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        liftover_batch_size=args.liftover_batch_size,
     )
 
 
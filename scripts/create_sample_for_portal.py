@@ -4,7 +4,6 @@
 
 import argparse
 import hail as hl
-import random
 
 from cpg_utils.hail_batch import init_batch, output_path
 
@@ -14,6 +13,42 @@ def open_file(path, mode="r"):
     else:
         return open(path, mode)
 
+
+# Expressions for the stratum of a variant, for variants in the format written by
+# get_gnomad_lof_variants.py. Variants are assigned to the stratum of their first annotation.
+STRATA = {
+    "gene": lambda variants: variants.annotations.first().gene_id,
+    "consequence": lambda variants: variants.annotations.first().consequence,
+}
+
+
+def sample_variants(variants, n_variants, seed, stratify_by=None):
+    """
+    Sample n_variants variants from a table (or n_variants from each stratum, if stratify_by is
+    given), returned as a list of JSON strings.
+
+    Each variant is assigned a random key, and the variants with the smallest keys are kept. This
+    is done by an aggregation, which keeps at most n_variants rows per partition (and stratum) in
+    memory, so memory use does not depend on the size of the table.
+    """
+    variants = variants.select(
+        stratum=STRATA[stratify_by](variants) if stratify_by else hl.missing(hl.tstr),
+        json=hl.json(variants.row_value),
+        sort_key=hl.rand_unif(0, 1, seed=seed),
+    ).key_by()
+
+    take_sample = hl.agg.take(variants.json, n_variants, ordering=variants.sort_key)
+    if not stratify_by:
+        return variants.aggregate(take_sample)
+
+    samples = variants.aggregate(hl.agg.group_by(variants.stratum, take_sample))
+    return [
+        row
+        for stratum in sorted(samples, key=lambda stratum: (stratum is None, stratum))
+        for row in samples[stratum]
+    ]
+
+
 def main():
 
     parser = argparse.ArgumentParser(description="Subset a hail table to N random variants and write to JSON.")
@@ -26,7 +61,12 @@ def main():
         "--n-variants",
         type=int,
         default=10,
-        help="Number of variants to sample.",
+        help="Number of variants to sample (from each stratum, if --stratify-by is given).",
+    )
+    parser.add_argument(
+        "--stratify-by",
+        choices=sorted(STRATA),
+        help="Sample --n-variants variants from each gene or consequence.",
     )
     parser.add_argument(
         "--seed",
@@ -46,16 +86,12 @@ def main():
     # Read in the hail table.
     variants = hl.read_table(args.hail_table)
 
-    # Convert to a list of JSON structs.
-    rows = variants.annotate(json=hl.json(variants.row_value)).key_by().select("json").collect()
+    # Sample the requested number of variants within Hail, so that the table is not collected.
+    sample = sample_variants(variants, args.n_variants, args.seed, stratify_by=args.stratify_by)
 
-    # Set the random sampler seed, and extract the requested number of variants.
-    random.seed(args.seed)
-    sample = random.sample(rows, args.n_variants)
-    
     # Write the output to a JSON file.
     with open_file(output_path(args.output, "analysis"), "w") as f:
-        f.write("[" + ",".join([row.json for row in sample]) + "]")
+        f.write("[" + ",".join(sample) + "]")
 
 
 if __name__ == '__main__':
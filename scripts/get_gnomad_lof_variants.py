@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 
 import argparse
-from cloudpathlib import AnyPath
+import gzip
+import json
+import secrets
+import shutil
+import sys
+from cloudpathlib import AnyPath, CloudPath
 
 import hail as hl
 import pandas as pd
+import requests
 
 from cpg_utils.hail_batch import init_batch, dataset_path
 from cpg_utils.config import output_path
 
+# Seconds to wait to connect to the portal, and for its response to each upload. The portal
+# responds once it has saved every variant in a shard.
+UPLOAD_TIMEOUT = (10, 600)
+
 CONSEQUENCE_TERMS = [
     "transcript_ablation",
     "splice_acceptor_variant",
@@ -343,11 +353,128 @@ def get_gnomad_lof_variants(
     return ds
 
 
-def open_file(path, mode="r"):
-    if path.startswith("gs://"):
-        return hl.hadoop_open(path, mode)
+def export_ndjson_shards(variants, path):
+    """
+    Export variants as newline delimited JSON, written in parallel to one shard per partition
+    in the directory at path. Shards are block gzip compressed if path ends with ".bgz".
+    """
+    variants = variants.select(json=hl.json(variants.row_value)).key_by().select("json")
+    variants.export(path, header=False, parallel="header_per_shard")
+
+
+def list_shards(path):
+    """List the shards in a directory written by export_ndjson_shards, in partition order."""
+    return sorted(
+        (
+            shard
+            for shard in AnyPath(path).iterdir()
+            if shard.is_file() and not shard.name.startswith(("_", "."))
+        ),
+        key=lambda shard: shard.name,
+    )
+
+
+def iter_shard_lines(shard):
+    with shard.open("rb") as f:
+        if f.read(2) == b"\x1f\x8b":
+            f.seek(0)
+            f = gzip.GzipFile(fileobj=f)
+        else:
+            f.seek(0)
+
+        for line in f:
+            if line.strip():
+                yield line.rstrip(b"\n")
+
+
+def merge_shards(path, output, json_array=False):
+    """
+    Merge the shards in a directory into one file, either newline delimited JSON or a JSON
+    array. Lines are copied one at a time, so memory use does not depend on the number of
+    variants. The output is gzip compressed if its path ends with ".gz" or ".bgz".
+    """
+    with AnyPath(output).open("wb") as output_file:
+        if output.endswith((".gz", ".bgz")):
+            output_file = gzip.GzipFile(fileobj=output_file, mode="wb")
+
+        with output_file:
+            if json_array:
+                output_file.write(b"[")
+
+            is_first_line = True
+            for shard in list_shards(path):
+                for line in iter_shard_lines(shard):
+                    if json_array and not is_first_line:
+                        output_file.write(b",")
+
+                    output_file.write(line)
+                    if not json_array:
+                        output_file.write(b"\n")
+
+                    is_first_line = False
+
+            if json_array:
+                output_file.write(b"]")
+
+
+def remove_shards(path):
+    """Remove a directory of shards written by export_ndjson_shards, if it exists."""
+    path = AnyPath(path)
+    if not path.exists():
+        return
+
+    if isinstance(path, CloudPath):
+        path.rmtree()
     else:
-        return open(path, mode)
+        shutil.rmtree(path)
+
+
+def upload_shards(path, upload_url, headers=None, timeout=UPLOAD_TIMEOUT):
+    """
+    Upload each shard in a directory to a curation portal project's variant upload endpoint
+    (/api/project/<project_id>/variants/upload/). Shards are streamed as is, since the portal
+    accepts gzip compressed uploads.
+
+    Raises requests.HTTPError if a shard is not accepted. Variants in chunks of earlier shards,
+    and in valid chunks of that shard, have already been saved by then.
+    """
+    # The portal uses session authentication, so requests must include a CSRF token as both
+    # a cookie and a header, and a Referer header for HTTPS requests.
+    csrf_token = secrets.token_hex(32)
+    headers = {
+        "Content-Type": "application/x-ndjson",
+        "Cookie": f"csrftoken={csrf_token}",
+        "Referer": upload_url,
+        "X-CSRFToken": csrf_token,
+        **(headers or {}),
+    }
+
+    num_created = 0
+    try:
+        for shard in list_shards(path):
+            with shard.open("rb") as f:
+                response = requests.post(upload_url, data=f, headers=headers, timeout=timeout)
+
+            if not 200 <= response.status_code < 300:
+                # Invalid variants are rejected with a list of errors for each chunk.
+                if response.headers.get("Content-Type") == "application/json":
+                    result = response.json()
+                    num_created += result.get("created", 0)
+                    errors = [chunk for chunk in result.get("chunks", []) if "errors" in chunk]
+                    print(f"Errors uploading {shard.name}: {json.dumps(errors)}", file=sys.stderr)
+
+                raise requests.HTTPError(
+                    f"Upload of {shard.name} failed with status {response.status_code}",
+                    response=response,
+                )
+
+            result = response.json()
+            num_created += result["created"]
+            print(f"Uploaded {shard.name}: {result['created']} variants created", file=sys.stderr)
+    finally:
+        print(f"Created {num_created} variants", file=sys.stderr)
+
+    return num_created
 
 
 if __name__ == "__main__":
@@ -400,10 +527,41 @@ if __name__ == "__main__":
     parser.add_argument(
         "--output",
         required=True,
-        help="relative dataset path (analysis category) for variants file",
+        help=(
+            "relative dataset path (analysis category) for variants file. Paths ending with .ht "
+            "are written as a Hail table, paths ending with .tsv.bgz as a flattened TSV file, and "
+            "paths ending with .ndjson or .ndjson.bgz as a directory of newline delimited JSON "
+            "shards. Other paths, such as .json or .json.gz, are written as a JSON array, which "
+            "is gzip compressed if the path ends with .gz."
+        ),
+    )
+    parser.add_argument(
+        "--merge-output",
+        help=(
+            "Full path to merge newline delimited JSON shards into, for uploading to the portal. "
+            "Compressed if the path ends with .gz or .bgz."
+        ),
+    )
+    parser.add_argument(
+        "--upload-url",
+        help=(
+            "URL of a curation portal project's variant upload endpoint "
+            "(/api/project/<project_id>/variants/upload/) to upload shards to, one at a time"
+        ),
+    )
+    parser.add_argument(
+        "--upload-header",
+        action="append",
+        default=[],
+        metavar="HEADER",
+        help="Header to send with uploads, for example 'Authorization: Bearer ...'",
     )
     args = parser.parse_args()
 
+    is_ndjson = args.output.endswith((".ndjson", ".ndjson.bgz"))
+    if (args.merge_output or args.upload_url) and not is_ndjson:
+        parser.error("--merge-output and --upload-url require .ndjson or .ndjson.bgz output")
+
     init_batch()
 
     # Select the genes to process.
@@ -435,8 +593,23 @@ if __name__ == "__main__":
         variants = variants.explode("annotations")
         variants = variants.flatten()
         variants.export(output_path(args.output, "analysis"))
-    # A JSON file otherwise.
+    # Newline delimited JSON shards, written in parallel, if extension is ".ndjson" or ".ndjson.bgz";
+    elif is_ndjson:
+        shards_path = output_path(args.output, "analysis")
+        export_ndjson_shards(variants, shards_path)
+        if args.merge_output:
+            merge_shards(shards_path, args.merge_output)
+        if args.upload_url:
+            upload_headers = dict(
+                [part.strip() for part in header.split(":", 1)] for header in args.upload_header
+            )
+            upload_shards(shards_path, args.upload_url, upload_headers)
+    # A JSON file otherwise. Shards are written first and then merged, so that variants are not
+    # collected on the driver.
     else:
-        rows = variants.annotate(json=hl.json(variants.row_value)).key_by().select("json").collect()
-        with open_file(output_path(args.output, "analysis"), "w") as f:
-            f.write("[" + ",".join([row.json for row in rows]) + "]")
+        shards_path = output_path(args.output + ".shards", "tmp")
+        try:
+            export_ndjson_shards(variants, shards_path)
+            merge_shards(shards_path, output_path(args.output, "analysis"), json_array=True)
+        finally:
+            remove_shards(shards_path)
@@ -0,0 +1,154 @@
+"""
+Lift over positions between reference genomes using UCSC chain files, without Hail.
+
+Chain file format: https://genome.ucsc.edu/goldenPath/help/chain.html
+"""
+
+import gzip
+import io
+from collections import defaultdict
+
+import numpy as np
+from cloudpathlib import AnyPath
+
+CHAIN_FILES = {
+    ("GRCh37", "GRCh38"): "gs://hail-common/references/grch37_to_grch38.over.chain.gz",
+    ("GRCh38", "GRCh37"): "gs://hail-common/references/grch38_to_grch37.over.chain.gz",
+}
+
+
+def normalize_contig(contig):
+    return contig[3:] if contig.startswith("chr") else contig
+
+
+class ContigBlocks:
+    """Aligned blocks on one contig of the source genome, sorted by start position."""
+
+    def __init__(self, blocks, query_contig_indices):
+        blocks = sorted(blocks)
+        self.starts = np.array([block[0] for block in blocks], dtype=np.int64)
+        self.ends = np.array([block[0] + block[1] for block in blocks], dtype=np.int64)
+        self.query_contigs = np.array(
+            [query_contig_indices[block[2]] for block in blocks], dtype=np.int32
+        )
+        self.query_starts = np.array([block[3] for block in blocks], dtype=np.int64)
+        self.query_sizes = np.array([block[4] for block in blocks], dtype=np.int64)
+        self.query_reverse = np.array([block[5] for block in blocks], dtype=bool)
+
+        # For each block, the block that ends furthest among it and the blocks that start before
+        # it. If the latest ending block is not unique, the one that starts last is used.
+        max_ends = np.maximum.accumulate(self.ends)
+        self.furthest_blocks = np.maximum.accumulate(
+            np.where(self.ends == max_ends, np.arange(len(blocks)), 0)
+        )
+
+
+class ChainFile:
+    """
+    Index of the aligned blocks in a chain file, for lifting over positions from the chain's
+    target (source) genome to its query (destination) genome.
+
+    Contig names are compared without "chr" prefixes. Where blocks from different chains overlap,
+    positions are lifted over using the block that starts last, unless that block ends before the
+    position. Then the block that ends furthest past the position is used.
+    """
+
+    def __init__(self, blocks):
+        self.query_contigs = np.array(
+            sorted({block[2] for contig_blocks in blocks.values() for block in contig_blocks}),
+            dtype=object,
+        )
+        query_contig_indices = {contig: i for i, contig in enumerate(self.query_contigs)}
+        self.contigs = {
+            contig: ContigBlocks(contig_blocks, query_contig_indices)
+            for contig, contig_blocks in blocks.items()
+        }
+
+    @classmethod
+    def parse(cls, lines):
+        blocks = defaultdict(list)
+        contig = None
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+
+            if fields[0] == "chain":
+                # chain score tName tSize tStrand tStart tEnd qName qSize qStrand qStart qEnd id
+                contig = normalize_contig(fields[2])
+                position = int(fields[5])
+                query_contig = normalize_contig(fields[7])
+                query_size = int(fields[8])
+                query_reverse = fields[9] == "-"
+                query_position = int(fields[10])
+                continue
+
+            # size [dt dq]
+            size = int(fields[0])
+            blocks[contig].append(
+                (position, size, query_contig, query_position, query_size, query_reverse)
+            )
+            if len(fields) == 3:
+                position += size + int(fields[1])
+                query_position += size + int(fields[2])
+
+        return cls(blocks)
+
+    @classmethod
+    def read(cls, path):
+        """Read a chain file from a local path or cloud storage URL. Files ending in .gz are
+        decompressed."""
+        path = AnyPath(path)
+        with path.open("rb") as chain_file:
+            if str(path).endswith(".gz"):
+                chain_file = gzip.GzipFile(fileobj=chain_file)
+
+            return cls.parse(io.TextIOWrapper(chain_file, encoding="ascii"))
+
+    def lift(self, contigs, positions):
+        """
+        Lift over 1-based positions.
+
+        Returns an array of destination contigs, which are None for positions that could not be
+        lifted over, and an array of destination positions, which are 0 for those positions.
+        """
+        contigs = np.array([normalize_contig(contig) for contig in contigs], dtype=object)
+        positions = np.asarray(positions, dtype=np.int64)
+
+        lifted_contigs = np.full(len(positions), None, dtype=object)
+        lifted_positions = np.zeros(len(positions), dtype=np.int64)
+
+        for contig in np.unique(contigs):
+            blocks = self.contigs.get(contig)
+            if blocks is None:
+                continue
+
+            indices = np.flatnonzero(contigs == contig)
+            starts = positions[indices] - 1  # Chain files use 0-based positions
+
+            # Find the last block that starts at or before each position
+            block_indices = np.searchsorted(blocks.starts, starts, side="right") - 1
+            is_mapped = block_indices >= 0
+            candidates = block_indices[is_mapped]
+            # If that block ends before the position, an earlier, longer block may contain it
+            ends_before = starts[is_mapped] >= blocks.ends[candidates]
+            candidates[ends_before] = blocks.furthest_blocks[candidates[ends_before]]
+            block_indices[is_mapped] = candidates
+            is_mapped[is_mapped] = starts[is_mapped] < blocks.ends[candidates]
+
+            block_indices = block_indices[is_mapped]
+            offsets = starts[is_mapped] - blocks.starts[block_indices]
+            query_starts = blocks.query_starts[block_indices] + offsets
+            # Positions on the reverse strand are counted from the end of the query contig
+            query_starts = np.where(
+                blocks.query_reverse[block_indices],
+                blocks.query_sizes[block_indices] - 1 - query_starts,
+                query_starts,
+            )
+
+            lifted_contigs[indices[is_mapped]] = self.query_contigs[
+                blocks.query_contigs[block_indices]
+            ]
+            lifted_positions[indices[is_mapped]] = query_starts + 1
+
+        return lifted_contigs, lifted_positions
@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 
 from curation_portal.serializers import VariantSerializer
 
@@ -12,3 +13,9 @@ def create_variant():
         return serializer.save()
 
     return create_variant_fn
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached values may refer to objects that were rolled back at the end of another test.
+    cache.clear()
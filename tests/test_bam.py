@@ -0,0 +1,120 @@
+import io
+import struct
+import zlib
+
+import pytest
+
+from curation_portal.bam import (
+    BGZF_EOF,
+    BamHeader,
+    BgzfReader,
+    iter_alignments,
+    query_index,
+    read_header,
+    reg2bin,
+    slice_bam,
+    write_bam,
+)
+
+
+def make_record(reference_id, position, name, reference_length, read_length=10):
+    read_name = name.encode("ascii") + b"\x00"
+    cigar = [reference_length << 4]  # M operation
+    data = struct.pack(
+        "<iiBBHHHiiii",
+        reference_id,
+        position,
+        len(read_name),
+        60,
+        reg2bin(position, position + reference_length),
+        len(cigar),
+        0,
+        read_length,
+        -1,
+        -1,
+        0,
+    )
+    data += read_name
+    data += struct.pack(f"<{len(cigar)}I", *cigar)
+    data += b"\x11" * ((read_length + 1) // 2)  # sequence
+    data += b"\xff" * read_length  # qualities
+    return struct.pack("<i", len(data)) + data
+
+
+def read_records(bam_data):
+    reader = BgzfReader(io.BytesIO(bam_data))
+    read_header(reader)
+    records = []
+    while True:
+        size_data = reader.read(4)
+        if not size_data:
+            break
+        (size,) = struct.unpack("<i", size_data)
+        records.append(size_data + reader.read_exactly(size))
+    return records
+
+
+def record_name(record):
+    (read_name_length,) = struct.unpack_from("<B", record, 12)
+    return record[36 : 36 + read_name_length - 1].decode("ascii")
+
+
+@pytest.fixture(name="bam_and_index", scope="module")
+def fixture_bam_and_index():
+    header = BamHeader(b"@HD\tVN:1.6\tSO:coordinate\n", [("chr1", 1_000_000), ("chr2", 500_000)])
+    records = [
+        make_record(0, position, f"read-1-{position}", 100) for position in range(0, 1_000_000, 250)
+    ] + [make_record(1, position, f"read-2-{position}", 100) for position in range(0, 500_000, 250)]
+    bam_data, index_data = write_bam(header, records)
+    return header, records, bam_data, index_data
+
+
+def test_write_bam_creates_valid_bgzf_file(bam_and_index):
+    header, records, bam_data, _ = bam_and_index
+
+    assert bam_data.endswith(BGZF_EOF)
+    # BGZF files are valid multi member gzip files
+    decompressed = zlib.decompress(bam_data, 31)
+    assert decompressed.startswith(b"BAM\x01")
+
+    assert read_header(BgzfReader(io.BytesIO(bam_data))) == header
+    assert read_records(bam_data) == records
+
+
+def test_query_index_returns_chunks_containing_region(bam_and_index):
+    _, _, bam_data, index_data = bam_and_index
+
+    chunks = query_index(index_data, 0, 500_000, 500_200)
+    assert chunks
+
+    reader = BgzfReader(io.BytesIO(bam_data))
+    names = [record_name(record) for record in iter_alignments(reader, chunks, 0, 500_000, 500_200)]
+    assert names == ["read-1-500000"]
+
+
+def test_slice_bam_returns_overlapping_alignments(bam_and_index):
+    header, _, bam_data, index_data = bam_and_index
+
+    sliced_bam, sliced_index = slice_bam(io.BytesIO(bam_data), index_data, "2", 1000, 1300)
+
+    assert read_header(BgzfReader(io.BytesIO(sliced_bam))) == header
+    assert [record_name(record) for record in read_records(sliced_bam)] == [
+        "read-2-1000",
+        "read-2-1250",
+    ]
+
+    # The sliced BAM's index can be queried
+    chunks = query_index(sliced_index, 1, 1200, 1300)
+    reader = BgzfReader(io.BytesIO(sliced_bam))
+    assert [record_name(record) for record in iter_alignments(reader, chunks, 1, 1200, 1300)] == [
+        "read-2-1250"
+    ]
+    assert query_index(sliced_index, 0, 1200, 1300) == []
+
+
+def test_slice_bam_returns_no_alignments_for_unknown_chromosome(bam_and_index):
+    header, _, bam_data, index_data = bam_and_index
+
+    sliced_bam, _ = slice_bam(io.BytesIO(bam_data), index_data, "X", 1000, 1300)
+    assert read_header(BgzfReader(io.BytesIO(sliced_bam))) == header
+    assert read_records(sliced_bam) == []
@@ -0,0 +1,40 @@
+import io
+import os
+import sys
+
+import pytest
+
+from curation_portal.vcf import read_header
+
+pytest.importorskip("tqdm")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from convert_vcf_to_json import convert_rows  # pylint: disable=import-error,wrong-import-position
+
+VCF = """##fileformat=VCFv4.2
+##INFO=<ID=AC,Number=A,Type=Integer,Description="Allele count">
+##INFO=<ID=AN,Number=1,Type=Integer,Description="Allele number">
+##INFO=<ID=AF,Number=A,Type=Float,Description="Allele frequency">
+##INFO=<ID=liftover_38,Number=1,Type=String,Description="Lifted over variant ID">
+##INFO=<ID=CSQ,Number=.,Type=String,Description="Consequence annotations from Ensembl VEP. Format: Allele|Consequence|SYMBOL|Gene|Feature|LoF|LoF_filter|LoF_flags">
+#CHROM	POS	ID	REF	ALT	QUAL	FILTER	INFO
+1	100	.	A	T	.	PASS	AC=1;AN=2;AF=0.5;liftover_38=chr1:200;CSQ=T|not_a_consequence&stop_gained|GENEA|ENSG00000000001|ENST00000000001|HC||,T|not_a_consequence|GENEA|ENSG00000000001|ENST00000000002|||
+1	200	.	C	G	.	PASS	AC=1;AN=2;AF=0.5;liftover_38=chr1:300;CSQ=G|not_a_consequence|GENEA|ENSG00000000001|ENST00000000001|||
+"""
+
+
+def test_convert_rows_ranks_unknown_consequence_terms_last():
+    vcf_file = io.StringIO(VCF)
+    header_line_number, header = read_header(vcf_file)
+
+    num_rows, variants, num_skipped_rows = convert_rows(
+        (header_line_number + 1, list(vcf_file)), header, "GRCh37", {}, 100
+    )
+
+    assert num_rows == 2
+    assert [variant["variant_id"] for variant in variants] == ["1-100-A-T"]
+    assert [annotation["transcript_id"] for annotation in variants[0]["annotations"]] == [
+        "ENST00000000001"
+    ]
+    assert num_skipped_rows == 1
@@ -180,3 +180,60 @@ def test_create_project_assignments_rejects_duplicate_assignments(db_setup):
     assert not CurationAssignment.objects.filter(
         curator__username="user3", variant__variant_id="1-120-G-A"
     ).exists()
+
+
+def test_create_project_assignments_reports_errors_for_each_assignment(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1"))
+    response = client.post(
+        "/api/project/1/assignments/",
+        {
+            "assignments": [
+                {"curator": "user3", "variant_id": "1-150-C-G"},
+                {"curator": "user2", "variant_id": "1-100-A-G"},
+                {"curator": "user3", "variant_id": "1-100-G-T"},
+            ]
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+    assert response.json() == [
+        {},
+        {"non_field_errors": ["Duplicate assignment"]},
+        {"variant_id": ["Variant does not exist"]},
+    ]
+
+
+def test_create_project_assignments_query_count_does_not_depend_on_number_of_assignments(
+    db_setup, django_assert_max_num_queries
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1"))
+
+    variant_ids = ["1-100-A-G", "1-120-G-A", "1-150-C-G", "1-200-A-T"]
+    curators = ["user3", "user5", "user6"]
+
+    with django_assert_max_num_queries(20):
+        response = client.post(
+            "/api/project/1/assignments/",
+            {
+                "assignments": [
+                    {"curator": curator, "variant_id": variant_id}
+                    for curator in curators
+                    for variant_id in variant_ids
+                ]
+            },
+            format="json",
+        )
+
+    assert response.status_code == 200
+
+    for curator in curators:
+        assert set(
+            CurationAssignment.objects.filter(
+                curator__username=curator, variant__project=1
+            ).values_list("variant__variant_id", flat=True)
+        ) == set(variant_ids)
+
+    CurationAssignment.objects.filter(curator__username__in=curators, variant__project=1).delete()
+    User.objects.filter(username__in=["user5", "user6"]).delete()
@@ -292,7 +292,7 @@ def test_curate_variant_stores_custom_flags(db_setup):
     assert assignment.result.custom_flags.first().checked
 
 
-def test_curate_variant_stores_custom_flag_defaults(db_setup):
+def test_curate_variant_does_not_store_unchecked_custom_flags(db_setup):
     flag = CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
 
     client = APIClient()
@@ -308,7 +308,7 @@ def test_curate_variant_stores_custom_flag_defaults(db_setup):
 
     response = client.post(
         f"/api/project/1/variant/{variant1.id}/curate/",
-        {"custom_flags": {}},
+        {"custom_flags": {flag.key: False}},
         format="json",
     )
 
@@ -319,8 +319,7 @@ def test_curate_variant_stores_custom_flag_defaults(db_setup):
     )
 
     assert assignment.result
-    assert assignment.result.custom_flags.first().flag.key == flag.key
-    assert not assignment.result.custom_flags.first().checked
+    assert not assignment.result.custom_flags.exists()
 
 
 def test_curate_variant_fails_if_custom_flag_does_not_exist(db_setup):
@@ -432,6 +431,22 @@ def test_curate_variant_validates_verdict_flag_rules(db_setup, flags, verdict, s
     assert response.status_code == status_code
 
 
+@pytest.fixture(name="navigation_cache", params=[False, True], ids=["queries", "cache"])
+def fixture_navigation_cache(request, settings, tmp_path):
+    # Navigation is only cached with a cache that is shared between app server processes.
+    if request.param:
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            }
+        }
+        settings.CURATION_PORTAL_NAVIGATION_CACHE_TIMEOUT = 300
+
+    return request.param
+
+
+@pytest.mark.usefixtures("navigation_cache")
 def test_curate_variant_orders_multiallelic_variants(db_setup):
     client = APIClient()
     client.force_authenticate(User.objects.get(username="user2@example.com"))
@@ -471,6 +486,7 @@ def test_curate_variant_orders_multiallelic_variants(db_setup):
             assert response["next_variant"] is None
 
 
+@pytest.mark.usefixtures("navigation_cache")
 def test_curate_variant_adjacent_variants_respects_filters(db_setup):
     client = APIClient()
     client.force_authenticate(User.objects.get(username="user2@example.com"))
@@ -489,3 +505,51 @@ def test_curate_variant_adjacent_variants_respects_filters(db_setup):
     assert response["previous_variant"] is None
     assert response["next_variant"]["variant_id"] == "1-100-A-G"
     assert response["index"] == 0
+
+
+@pytest.mark.usefixtures("navigation_cache")
+def test_curate_variant_adjacent_variants_are_updated_when_results_change(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+
+    variant = Variant.objects.get(variant_id="1-100-A-AT", project_id=1)
+    params = {"result__verdict__isnull": True}
+
+    response = client.get(f"/api/project/1/variant/{variant.id}/curate/", params).json()
+    assert response["next_variant"]["variant_id"] == "1-100-A-C"
+
+    next_variant = Variant.objects.get(variant_id="1-100-A-C", project_id=1)
+    response = client.post(
+        f"/api/project/1/variant/{next_variant.id}/curate/", {"verdict": "lof"}, format="json"
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"/api/project/1/variant/{variant.id}/curate/", params).json()
+    assert response["next_variant"]["variant_id"] == "1-100-A-G"
+    assert response["index"] == 1
+
+    # Variants that no longer match the filter are located by their position in the sort order
+    response = client.get(f"/api/project/1/variant/{next_variant.id}/curate/", params).json()
+    assert response["index"] is None
+    assert response["previous_variant"]["variant_id"] == "1-100-A-AT"
+    assert response["next_variant"]["variant_id"] == "1-100-A-G"
+
+
+@pytest.mark.parametrize("navigation_cache", [True], indirect=True)
+def test_curate_variant_adjacent_variants_are_cached(
+    db_setup, django_assert_max_num_queries, navigation_cache
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+
+    variant = Variant.objects.get(variant_id="1-100-A-AT", project_id=1)
+    client.get(f"/api/project/1/variant/{variant.id}/curate/")
+
+    # Once cached, navigation does not query the curator's other assignments
+    other_variant = Variant.objects.get(variant_id="1-100-A-C", project_id=1)
+    with django_assert_max_num_queries(3):
+        response = client.get(f"/api/project/1/variant/{other_variant.id}/curate/").json()
+
+    assert response["index"] == 2
+    assert response["previous_variant"]["variant_id"] == "1-100-A-AT"
+    assert response["next_variant"]["variant_id"] == "1-100-A-G"
@@ -1,22 +1,33 @@
 # pylint: disable=redefined-outer-name,unused-argument
 import pytest
 
-from curation_portal.models import CurationResult, CustomFlag, CustomFlagCurationResult
+from curation_portal.models import (
+    CurationResult,
+    CustomFlag,
+    CustomFlagCurationResult,
+    FLAG_BITS,
+    FLAG_FIELDS,
+    decode_flags,
+    encode_flags,
+)
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
 
-def test_creating_a_new_instance_adds_all_custom_flags(
+def test_creating_a_new_instance_does_not_store_unchecked_custom_flags(
     django_db_setup,
     django_db_blocker,
 ):
     with django_db_blocker.unblock():
-        CustomFlag.objects.create(key="new_flag", label="New Flag", shortcut="NF")
+        flag = CustomFlag.objects.create(key="new_flag", label="New Flag", shortcut="NF")
 
         assert CustomFlagCurationResult.objects.count() == 0
         result = CurationResult.objects.create()
 
-        assert result.custom_flags.count() == 1
+        assert result.custom_flags.count() == 0
+
+        result.delete()
+        flag.delete()
 
 
 def test_deleting_curation_result_deletes_related_custom_curation_result(
@@ -29,7 +40,8 @@ def test_deleting_curation_result_deletes_related_custom_curation_result(
         assert result.custom_flags.count() == 0
         assert CustomFlagCurationResult.objects.count() == 0
 
-        CustomFlag.objects.create(key="new_flag", label="New Flag", shortcut="NF")
+        flag = CustomFlag.objects.create(key="new_flag", label="New Flag", shortcut="NF")
+        CustomFlagCurationResult.objects.create(result=result, flag=flag)
         assert result.custom_flags.count() == 1
         assert CustomFlagCurationResult.objects.count() == 1
 
@@ -37,3 +49,30 @@ def test_deleting_curation_result_deletes_related_custom_curation_result(
 
         assert CustomFlag.objects.count() == 1
         assert CustomFlagCurationResult.objects.count() == 0
+
+        flag.delete()
+
+
+def test_saving_curation_result_sets_flags_bitmask(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        result = CurationResult.objects.create()
+        assert result.flags_bitmask == 0
+
+        result.flag_no_read_data = True
+        result.flag_stutter = True
+        result.save()
+
+        result.refresh_from_db()
+        assert result.flags_bitmask == (
+            FLAG_BITS["flag_no_read_data"]
+            | FLAG_BITS["flag_dubious_read_alignment"]
+            | FLAG_BITS["flag_stutter"]
+        )
+
+        result.delete()
+
+
+def test_flags_bitmask_can_be_decoded():
+    flags = {flag: i % 3 == 0 for i, flag in enumerate(FLAG_FIELDS)}
+    assert decode_flags(encode_flags(flags)) == flags
+    assert decode_flags(0) == {flag: False for flag in FLAG_FIELDS}
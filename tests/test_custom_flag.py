@@ -3,12 +3,14 @@ import pytest
 
 from django.core.exceptions import ValidationError
 
+from curation_portal.custom_flags import get_custom_flag_registry, get_custom_flags_by_key
 from curation_portal.models import CurationResult, CustomFlag, CustomFlagCurationResult
+from curation_portal.serializers import CustomFlagCurationResultSerializer
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
 
-def test_creating_custom_flag_adds_flag_to_existing_curation_results(
+def test_creating_custom_flag_does_not_add_flag_to_existing_curation_results(
     django_db_setup,
     django_db_blocker,
 ):
@@ -19,8 +21,8 @@ def test_creating_custom_flag_adds_flag_to_existing_curation_results(
         assert CustomFlagCurationResult.objects.count() == 0
 
         flag = CustomFlag.objects.create(key="flag_new", label="New Flag", shortcut="NF")
-        assert result.custom_flags.count() == 1
-        assert CustomFlagCurationResult.objects.count() == 1
+        assert result.custom_flags.count() == 0
+        assert CustomFlagCurationResult.objects.count() == 0
 
         result.delete()
         flag.delete()
@@ -37,6 +39,7 @@ def test_deleting_flag_deletes_related_custom_flag_curation_result(
         assert CustomFlagCurationResult.objects.count() == 0
 
         flag = CustomFlag.objects.create(key="flag_new", label="New Flag", shortcut="NF")
+        CustomFlagCurationResult.objects.create(result=result, flag=flag)
         assert result.custom_flags.count() == 1
         assert CustomFlagCurationResult.objects.count() == 1
 
@@ -44,6 +47,8 @@ def test_deleting_flag_deletes_related_custom_flag_curation_result(
 
         assert CustomFlagCurationResult.objects.count() == 0
 
+        result.delete()
+
 
 def test_validation_error_flag_key_does_not_start_with_the_word_flag(
     django_db_setup, django_db_blocker
@@ -95,3 +100,68 @@ def test_validation_error_flag_shortcut_starts_with_a_number(django_db_setup, dj
 
         flag = CustomFlag(key="flag_foo_bar", label="New Flag", shortcut="FN")
         flag.full_clean()
+
+
+def test_custom_flag_registry_is_reloaded_when_flags_change(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        flag = CustomFlag.objects.create(key="flag_new", label="New Flag", shortcut="NF")
+
+        registry = get_custom_flag_registry()
+        assert registry.by_key["flag_new"] == flag
+        assert registry.by_shortcut["NF"] == flag
+        assert get_custom_flag_registry() is registry
+
+        flag.label = "Renamed Flag"
+        flag.save()
+        assert get_custom_flag_registry().by_id[flag.id].label == "Renamed Flag"
+
+        flag.delete()
+        assert get_custom_flag_registry().flags == []
+
+
+def test_custom_flag_registry_does_not_query_database_until_flags_change(
+    django_db_setup, django_db_blocker, django_assert_num_queries
+):
+    with django_db_blocker.unblock():
+        flag = CustomFlag.objects.create(key="flag_new", label="New Flag", shortcut="NF")
+        get_custom_flag_registry()
+
+        with django_assert_num_queries(0):
+            assert get_custom_flags_by_key(["flag_new"]) == {"flag_new": flag}
+
+        # Unknown keys reload flags in case they were created by another process.
+        with django_assert_num_queries(1):
+            assert get_custom_flags_by_key(["flag_new", "flag_other"]) == {"flag_new": flag}
+
+        flag.delete()
+
+
+def test_saving_custom_flags_for_result_uses_constant_number_of_queries(
+    django_db_setup, django_db_blocker, django_assert_num_queries
+):
+    with django_db_blocker.unblock():
+        flags = [
+            CustomFlag.objects.create(key=f"flag_new_{i}", label=f"New Flag {i}", shortcut=f"N{i}")
+            for i in range(5)
+        ]
+        result = CurationResult.objects.create()
+        field = CustomFlagCurationResultSerializer()
+        get_custom_flag_registry()
+
+        with django_assert_num_queries(1):
+            field.create(result, {flag.key: True for flag in flags})
+
+        assert result.custom_flags.count() == 5
+
+        with django_assert_num_queries(2):
+            field.create(result, {flag.key: i % 2 == 0 for i, flag in enumerate(flags)})
+
+        assert set(result.custom_flags.values_list("flag__key", flat=True)) == {
+            "flag_new_0",
+            "flag_new_2",
+            "flag_new_4",
+        }
+
+        result.delete()
+        for flag in flags:
+            flag.delete()
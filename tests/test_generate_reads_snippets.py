@@ -0,0 +1,128 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+from curation_portal.bam import BamHeader, write_bam
+from curation_portal.models import CurationAssignment, Project, User, Variant
+from curation_portal.reads_snippets import find_snippet, get_snippet_path
+from test_bam import make_record, read_records, record_name
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+
+@pytest.fixture(scope="module", autouse=True)
+def db_setup(django_db_setup, django_db_blocker, create_variant):  # pylint: disable=unused-argument
+    with django_db_blocker.unblock():
+        project = Project.objects.create(id=1, name="Test Project")
+        variant1 = create_variant(project, "1-100-A-G")
+        variant2 = create_variant(project, "1-5000-C-T")
+
+        user = User.objects.create(username="user1@example.com")
+        CurationAssignment.objects.create(curator=user, variant=variant1)
+        CurationAssignment.objects.create(curator=user, variant=variant2)
+
+        yield
+
+        project.delete()
+        user.delete()
+
+
+@pytest.fixture(name="bam_file")
+def fixture_bam_file(tmp_path):
+    header = BamHeader(b"@HD\tVN:1.6\tSO:coordinate\n", [("chr1", 10_000)])
+    records = [
+        make_record(0, position, f"read-{position}", 50) for position in range(0, 10_000, 25)
+    ]
+    bam_data, index_data = write_bam(header, records)
+
+    bam_file = tmp_path / "reads.bam"
+    bam_file.write_bytes(bam_data)
+    (tmp_path / "reads.bam.bai").write_bytes(index_data)
+
+    Variant.objects.filter(project__id=1).update(reads=[str(bam_file)])
+
+    return bam_file
+
+
+@pytest.fixture(name="snippets_dir")
+def fixture_snippets_dir(tmp_path, settings):
+    snippets_dir = tmp_path / "snippets"
+    settings.CURATION_PORTAL_READS_SNIPPETS_DIR = str(snippets_dir)
+    return snippets_dir
+
+
+def generate_reads_snippets(**options):
+    output = io.StringIO()
+    call_command("generate_reads_snippets", 1, processes=1, stderr=output, **options)
+    return output.getvalue()
+
+
+def test_generate_reads_snippets_creates_snippets_around_variants(bam_file, snippets_dir):
+    output = generate_reads_snippets(window=0)
+    assert "Processed 2 / 2 snippets (2 created, 0 skipped, 0 failed)" in output
+
+    snippet = get_snippet_path(snippets_dir, "1-100-A-G", bam_file)
+    assert [record_name(record) for record in read_records(snippet.read_bytes())] == [
+        "read-50",
+        "read-75",
+    ]
+    assert snippet.with_name(snippet.name + ".bai").exists()
+
+    snippet = get_snippet_path(snippets_dir, "1-5000-C-T", bam_file)
+    assert [record_name(record) for record in read_records(snippet.read_bytes())] == [
+        "read-4950",
+        "read-4975",
+    ]
+
+
+def test_generate_reads_snippets_skips_existing_snippets(
+    bam_file, snippets_dir
+):  # pylint: disable=unused-argument
+    generate_reads_snippets()
+
+    output = generate_reads_snippets()
+    assert "(0 created, 2 skipped, 0 failed)" in output
+
+    output = generate_reads_snippets(overwrite=True)
+    assert "(2 created, 0 skipped, 0 failed)" in output
+
+
+def test_generate_reads_snippets_reports_failures(tmp_path, snippets_dir):
+    reads_file = tmp_path / "missing.bam"
+    Variant.objects.filter(variant_id="1-100-A-G").update(reads=[str(reads_file)])
+
+    output = generate_reads_snippets()
+    assert f"Failed to create snippet of {reads_file} for 1-100-A-G" in output
+    assert "Processed 1 / 1 snippets (0 created, 0 skipped, 1 failed)" in output
+    assert not list(snippets_dir.glob("**/*.bam"))
+
+
+def test_generate_reads_snippets_requires_snippets_dir(settings):
+    settings.CURATION_PORTAL_READS_SNIPPETS_DIR = None
+    with pytest.raises(CommandError):
+        call_command("generate_reads_snippets", 1)
+
+
+def test_reads_file_view_serves_snippets(bam_file, snippets_dir):  # pylint: disable=unused-argument
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    variant = Variant.objects.get(variant_id="1-100-A-G")
+
+    assert find_snippet("1-100-A-G", bam_file) is None
+    response = client.get(f"/api/project/1/variant/{variant.id}/reads/?file={bam_file}")
+    assert b"".join(response.streaming_content) == bam_file.read_bytes()
+
+    generate_reads_snippets()
+    snippet = find_snippet("1-100-A-G", bam_file)
+    assert snippet is not None
+
+    response = client.get(f"/api/project/1/variant/{variant.id}/reads/?file={bam_file}")
+    assert b"".join(response.streaming_content) == snippet.read_bytes()
+
+    response = client.get(f"/api/project/1/variant/{variant.id}/reads/?file={bam_file}.bai")
+    assert (
+        b"".join(response.streaming_content)
+        == snippet.with_name(snippet.name + ".bai").read_bytes()
+    )
@@ -0,0 +1,166 @@
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from curation_portal.models import Project, Variant, VariantAnnotation, VariantTag
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+VCF_HEADER = """##fileformat=VCFv4.2
+##INFO=<ID=AC,Number=A,Type=Integer,Description="Allele count">
+##INFO=<ID=AN,Number=1,Type=Integer,Description="Allele number">
+##INFO=<ID=AF,Number=A,Type=Float,Description="Allele frequency">
+##INFO=<ID=liftover_38,Number=1,Type=String,Description="Lifted over variant ID">
+##INFO=<ID=cohort,Number=1,Type=String,Description="Cohort">
+##INFO=<ID=CSQ,Number=.,Type=String,Description="Consequence annotations from Ensembl VEP. Format: Allele|Consequence|SYMBOL|Gene|Feature|LoF|LoF_filter|LoF_flags">
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Depth">
+#CHROM	POS	ID	REF	ALT	QUAL	FILTER	INFO	FORMAT	sample1	sample2	sample3
+"""
+
+CSQ = {
+    "stop_gained": "T|stop_gained|GENEA|ENSG00000000001|ENST00000000001|HC||",
+    "splice": "T|splice_donor_variant|GENEA|ENSG00000000001|ENST00000000002|LC|END_TRUNC|",
+    "missense": "T|missense_variant|GENEA|ENSG00000000001|ENST00000000001|||",
+    "unknown": "T|not_a_consequence&stop_gained|GENEA|ENSG00000000001|ENST00000000003|||",
+}
+
+
+def vcf_row(chrom, pos, ref, alt, csq, qc_filter="PASS", info="AC=2;AN=6;AF=0.333"):
+    info = f"{info};CSQ={','.join(CSQ[key].replace('T|', alt + '|', 1) for key in csq)}"
+    return (
+        f"{chrom}\t{pos}\t.\t{ref}\t{alt}\t.\t{qc_filter}\t{info}\tGT:DP\t0/1:20\t0/0:30\t1/1:.\n"
+    )
+
+
+VCF_ROWS = [
+    vcf_row("1", 100, "A", "T", ["stop_gained"], info="AC=3;AN=6;AF=0.5;liftover_38=chr1:200"),
+    vcf_row("1", 100, "A", "T", ["splice"], info="AC=3;AN=6;AF=0.5;cohort=A"),
+    vcf_row("1", 100, "A", "G", ["missense"]),
+    vcf_row("1", 250, "C", "T", ["stop_gained", "missense"], qc_filter="AC0;RF"),
+    vcf_row("chrX", 300, "G", "T", ["splice"]),
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def db_setup(django_db_setup, django_db_blocker):  # pylint: disable=unused-argument
+    with django_db_blocker.unblock():
+        project = Project.objects.create(id=1, name="Test Project")
+
+        yield
+
+        project.delete()
+
+
+@pytest.fixture(name="vcf_path")
+def fixture_vcf_path(tmp_path):
+    path = tmp_path / "variants.vcf.gz"
+    with gzip.open(path, "wt") as vcf_file:
+        vcf_file.write(VCF_HEADER)
+        vcf_file.writelines(VCF_ROWS)
+
+    return path
+
+
+def ingest_vcf(vcf_path, **options):
+    output = io.StringIO()
+    call_command("ingest_vcf", 1, str(vcf_path), stderr=output, **options)
+    return output.getvalue()
+
+
+def test_ingest_vcf_creates_variants(vcf_path):
+    output = ingest_vcf(vcf_path, tag_field=["cohort=Cohort"])
+
+    assert "Imported 3 variants (4 annotations, 1 tags) from 5 rows" in output
+    assert "Skipped 1 rows without LoF annotations" in output
+    assert "2 variants have no liftover_38 INFO field" in output
+
+    variants = Variant.objects.filter(project_id=1).order_by("xpos")
+    assert [variant.variant_id for variant in variants] == ["1-100-A-T", "1-250-C-T", "X-300-G-T"]
+
+    variant = variants[0]
+    assert (variant.chrom, variant.pos, variant.ref, variant.alt) == ("1", 100, "A", "T")
+    assert variant.liftover_variant_id == "chr1-200"
+    assert (variant.AC, variant.AN, variant.AF) == (3, 6, 0.5)
+    assert (variant.n_heterozygotes, variant.n_homozygotes) == (1, 1)
+    assert variant.sample_ids == ["sample1", "sample3"]
+    assert variant.GT == ["0/1", "1/1"]
+    assert variant.DP == [20, 0]
+    assert variant.DP_all == [20]
+
+    assert list(
+        VariantAnnotation.objects.filter(variant=variant)
+        .order_by("transcript_id")
+        .values_list("consequence", "transcript_id", "loftee", "loftee_filter")
+    ) == [
+        ("stop_gained", "ENST00000000001", "HC", ""),
+        ("splice_donor_variant", "ENST00000000002", "LC", "END_TRUNC"),
+    ]
+    assert list(VariantTag.objects.filter(variant__project_id=1).values_list("label", "value")) == [
+        ("Cohort", "A")
+    ]
+
+    assert variants[1].qc_filter == "AC0,RF"
+    assert variants[1].annotations.get().consequence == "stop_gained"
+
+
+def test_ingest_vcf_dry_run_does_not_save_variants(vcf_path):
+    output = ingest_vcf(vcf_path, dry_run=True)
+
+    assert "Validated 3 variants (4 annotations, 0 tags) from 5 rows" in output
+    assert not Variant.objects.filter(project_id=1).exists()
+
+
+def test_ingest_vcf_rejects_existing_variants(vcf_path):
+    ingest_vcf(vcf_path)
+
+    with pytest.raises(CommandError, match="Variant already exists in project"):
+        ingest_vcf(vcf_path)
+
+    assert Variant.objects.filter(project_id=1).count() == 3
+
+
+def test_ingest_vcf_rejects_unsupported_consequence_terms(tmp_path):
+    path = tmp_path / "variants.vcf"
+    path.write_text(
+        VCF_HEADER + VCF_ROWS[0] + vcf_row("1", 400, "A", "T", ["unknown"]) + VCF_ROWS[4]
+    )
+
+    with pytest.raises(CommandError, match="Unsupported VEP consequence term 'not_a_consequence'"):
+        ingest_vcf(path, batch_size=2)
+
+    assert not Variant.objects.filter(project_id=1).exists()
+
+
+def test_ingest_vcf_writes_checkpoint_after_each_batch(vcf_path, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    ingest_vcf(vcf_path, batch_size=1, checkpoint=str(checkpoint_path))
+
+    # Rows for variants at the same position are kept in the same batch.
+    checkpoint = json.loads(checkpoint_path.read_text())
+    assert checkpoint == {"project": 1, "vcf": str(vcf_path), "line": 15}
+
+
+def test_ingest_vcf_resumes_from_checkpoint(vcf_path, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    # The first three rows, for variants at position 1-100, were imported by a previous run.
+    checkpoint_path.write_text(json.dumps({"project": 1, "vcf": str(vcf_path), "line": 13}))
+
+    output = ingest_vcf(vcf_path, checkpoint=str(checkpoint_path))
+
+    assert "Resuming after line 13" in output
+    assert list(
+        Variant.objects.filter(project_id=1).order_by("xpos").values_list("variant_id", flat=True)
+    ) == ["1-250-C-T", "X-300-G-T"]
+    assert json.loads(checkpoint_path.read_text())["line"] == 15
+
+
+def test_ingest_vcf_rejects_checkpoint_for_other_file(vcf_path, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text(json.dumps({"project": 1, "vcf": "/other.vcf", "line": 13}))
+
+    with pytest.raises(CommandError, match="different project or VCF file"):
+        ingest_vcf(vcf_path, checkpoint=str(checkpoint_path))
@@ -2,7 +2,15 @@
 import pytest
 from rest_framework.test import APIClient
 
-from curation_portal.models import CurationAssignment, CurationResult, Project, User, CustomFlag
+from curation_portal.models import (
+    CurationAssignment,
+    CurationResult,
+    Project,
+    User,
+    CustomFlag,
+    Variant,
+    VariantAnnotation,
+)
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
@@ -148,6 +156,18 @@ def test_projects_assignments_list_shows_custom_flags(db_setup):
         assert assignment["result"]["custom_flags"] == {"flag_one": False}
 
 
+def test_projects_assignments_list_does_not_include_flags_bitmask(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+    response = client.get("/api/project/1/assignments/").json()
+
+    results = [a["result"] for a in response["assignments"] if a["result"]]
+    assert len(results) == 2
+    for result in results:
+        assert "verdict" in result
+        assert "flags_bitmask" not in result
+
+
 @pytest.mark.parametrize(
     "query,expected_variants",
     [
@@ -187,3 +207,82 @@ def test_projects_assignments_list_can_be_filtered_on_result_fields(
         assignment["variant"]["variant_id"] for assignment in response["assignments"]
     ]
     assert assigned_variants == expected_variants
+
+
+def test_projects_assignments_list_includes_total_and_filtered_counts(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+    response = client.get("/api/project/1/assignments/?result__verdict__isnull=false").json()
+    assert response["total"] == 3
+    assert response["filtered"] == 2
+
+
+def test_projects_assignments_list_can_be_paginated(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(f"/api/project/1/assignments/?page_size=2&cursor={cursor}").json()
+        assert response["total"] == 3
+        pages.append(
+            [assignment["variant"]["variant_id"] for assignment in response["assignments"]]
+        )
+        cursor = response["next_cursor"]
+
+    assert pages == [["1-100-A-G", "1-120-G-A"], ["1-150-C-G"]]
+
+
+def test_projects_assignments_list_pagination_is_compatible_with_filters(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+
+    response = client.get(
+        "/api/project/1/assignments/?page_size=1&variant__annotation__consequence=frameshift_variant"
+    ).json()
+    assert response["filtered"] == 2
+    assert [a["variant"]["variant_id"] for a in response["assignments"]] == ["1-100-A-G"]
+
+    response = client.get(
+        "/api/project/1/assignments/?page_size=1&variant__annotation__consequence=frameshift_variant"
+        f"&cursor={response['next_cursor']}"
+    ).json()
+    assert [a["variant"]["variant_id"] for a in response["assignments"]] == ["1-150-C-G"]
+    assert response["next_cursor"] is None
+
+
+def test_projects_assignments_list_filters_do_not_repeat_assignments(db_setup):
+    VariantAnnotation.objects.create(
+        variant=Variant.objects.get(project__id=1, variant_id="1-100-A-G"),
+        consequence="frameshift_variant",
+        gene_id="g1",
+        gene_symbol="GENEONE",
+        transcript_id="t4",
+    )
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(
+            "/api/project/1/assignments/?page_size=1&variant__annotation__gene_symbol=GENEONE"
+            f"&cursor={cursor}"
+        ).json()
+        assert response["filtered"] == 2
+        pages.append(
+            [assignment["variant"]["variant_id"] for assignment in response["assignments"]]
+        )
+        cursor = response["next_cursor"]
+
+    assert pages == [["1-100-A-G"], ["1-120-G-A"]]
+
+
+@pytest.mark.parametrize("query", ["page_size=0", "page_size=foo", "page_size=10&cursor=foo"])
+def test_projects_assignments_list_rejects_invalid_pagination_parameters(db_setup, query):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user2@example.com"))
+    response = client.get(f"/api/project/1/assignments/?{query}")
+    assert response.status_code == 400
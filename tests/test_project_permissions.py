@@ -0,0 +1,103 @@
+# pylint: disable=redefined-outer-name,unused-argument
+import pytest
+from django.contrib.auth.models import Permission
+
+from curation_portal.models import CurationAssignment, Project, User
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+
+@pytest.fixture(scope="module")
+def db_setup(django_db_setup, django_db_blocker, create_variant):
+    with django_db_blocker.unblock():
+        project1 = Project.objects.create(id=1, name="Project 1")
+        project2 = Project.objects.create(id=2, name="Project 2")
+        create_variant(project1, "1-100-A-G")
+        create_variant(project2, "1-100-A-G")
+
+        user1 = User.objects.create(username="user1@example.com")
+        user2 = User.objects.create(username="user2@example.com")
+        User.objects.create(username="user3@example.com")
+
+        project1.owners.set([user1])
+        CurationAssignment.objects.create(curator=user2, variant=project1.variants.get())
+
+        yield
+
+        Project.objects.all().delete()
+        User.objects.all().delete()
+
+
+def test_permission_checks_are_cached(db_setup, django_assert_num_queries):
+    user = User.objects.get(username="user1@example.com")
+    project1 = Project.objects.get(id=1)
+    project2 = Project.objects.get(id=2)
+
+    assert user.has_perm("curation_portal.change_project", project1)
+
+    with django_assert_num_queries(0):
+        assert user.has_perm("curation_portal.change_project", project1)
+        assert user.has_perm("curation_portal.view_project", project1)
+        assert not user.has_perm("curation_portal.view_project", project2)
+        assert not user.has_perm("curation_portal.add_variant_to_project", project1)
+
+
+def test_permission_cache_is_invalidated_when_owners_change(db_setup):
+    user = User.objects.get(username="user3@example.com")
+    project = Project.objects.get(id=2)
+
+    assert not user.has_perm("curation_portal.change_project", project)
+
+    project.owners.add(user)
+    assert user.has_perm("curation_portal.change_project", project)
+
+    project.owners.clear()
+    assert not user.has_perm("curation_portal.change_project", project)
+
+    user.owned_projects.add(project)
+    assert user.has_perm("curation_portal.change_project", project)
+
+
+def test_permission_cache_is_invalidated_when_assignments_change(db_setup):
+    user = User.objects.get(username="user3@example.com")
+    project = Project.objects.get(id=2)
+    variant = project.variants.get()
+
+    assert not user.has_perm("curation_portal.view_project", project)
+    assert not user.has_perm("curation_portal.curate_variant", variant)
+
+    assignment = CurationAssignment.objects.create(curator=user, variant=variant)
+    assert user.has_perm("curation_portal.view_project", project)
+    assert user.has_perm("curation_portal.curate_variant", variant)
+
+    assignment.delete()
+    assert not user.has_perm("curation_portal.view_project", project)
+
+
+def test_permission_cache_is_invalidated_when_user_permissions_change(db_setup):
+    user = User.objects.get(username="user1@example.com")
+    project = Project.objects.get(id=1)
+
+    assert not user.has_perm("curation_portal.add_variant_to_project", project)
+
+    user.user_permissions.add(Permission.objects.get(codename="add_variant"))
+    assert user.has_perm("curation_portal.add_variant_to_project", project)
+
+
+def test_permissions_are_cached_across_requests(db_setup, settings, django_assert_num_queries):
+    settings.CURATION_PORTAL_PERMISSIONS_CACHE_TIMEOUT = 60
+    project = Project.objects.get(id=1)
+
+    assert User.objects.get(username="user2@example.com").has_perm(
+        "curation_portal.view_project", project
+    )
+
+    user = User.objects.get(username="user2@example.com")
+    with django_assert_num_queries(0):
+        assert user.has_perm("curation_portal.view_project", project)
+        assert not user.has_perm("curation_portal.change_project", project)
+
+    project.owners.add(user)
+    assert User.objects.get(username="user2@example.com").has_perm(
+        "curation_portal.change_project", project
+    )
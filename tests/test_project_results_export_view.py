@@ -1,9 +1,14 @@
 # pylint: disable=redefined-outer-name,unused-argument
 import csv
+import json
+import os
 import re
 from io import StringIO  # pylint: disable=E0401
 
 import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 from curation_portal.models import CurationAssignment, CurationResult, Project, User
@@ -118,7 +123,9 @@ def get_exported_results(db_setup):
         client = APIClient()
         client.force_authenticate(User.objects.get(username=username))
         response = client.get("/api/project/1/results/export/", query_params)
-        reader = csv.DictReader(StringIO(response.content.decode("utf-8")))
+        assert response.streaming
+        content = b"".join(response.streaming_content).decode("utf-8")
+        reader = csv.DictReader(StringIO(content))
         return [row for row in reader]
 
     return _get_exported_results
@@ -219,3 +226,66 @@ def test_curators_cannot_filter_exported_results(get_exported_results):
         )
     )
     assert results == set([("1-100-A-G", "user2@example.com")])
+
+
+def test_exported_results_can_be_downloaded_as_json(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.get("/api/project/1/results/export/", {"format": "json"})
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == 'attachment; filename="Test-Project_results.json"'
+
+    results = json.loads(b"".join(response.streaming_content))
+    assert set(
+        (result["variant_id"], result["curator"], result["verdict"]) for result in results
+    ) == set(
+        [
+            ("1-100-A-G", "user1@example.com", "likely_lof"),
+            ("1-200-G-T", "user1@example.com", "lof"),
+            ("1-100-A-G", "user2@example.com", "uncertain"),
+        ]
+    )
+
+    result = next(result for result in results if result["variant_id"] == "1-200-G-T")
+    assert result["notes"] == "probs Lof??"
+    assert result["curator_comments"] == "LoF for sure"
+    assert result["editor"] is None
+
+
+def test_exported_json_results_match_results_schema(db_setup):
+    schema_path = os.path.join(settings.BASE_DIR, "assets", "results-schema.json")
+    with open(schema_path, encoding="utf-8") as schema_file:
+        schema = json.load(schema_file)
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.get("/api/project/1/results/export/", {"format": "json"})
+    results = json.loads(b"".join(response.streaming_content))
+
+    # Editors are set from the user who uploads results, so they are not part of the upload schema.
+    for result in results:
+        assert set(result) - {"editor"} == set(schema["items"]["properties"])
+
+
+def test_export_query_count_does_not_depend_on_number_of_results(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+
+    def count_export_queries(query_params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get("/api/project/1/results/export/", query_params)
+            b"".join(response.streaming_content)
+        return len(context.captured_queries)
+
+    # Load the user's permissions before counting queries
+    count_export_queries({})
+
+    queries_for_all_curators = count_export_queries({})
+    queries_for_one_curator = count_export_queries({"curator__username": "user2@example.com"})
+    assert queries_for_all_curators == queries_for_one_curator
+
+    queries_for_all_curators = count_export_queries({"format": "json"})
+    queries_for_one_curator = count_export_queries(
+        {"format": "json", "curator__username": "user2@example.com"}
+    )
+    assert queries_for_all_curators == queries_for_one_curator
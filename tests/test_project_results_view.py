@@ -12,6 +12,7 @@ from curation_portal.models import (
     CustomFlag,
     CustomFlagCurationResult,
     Variant,
+    FLAG_BITS,
 )
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
@@ -335,7 +336,7 @@ def test_upload_results_rejects_results_with_custom_flags_that_do_not_exist(db_s
     assert not CurationResult.objects.filter(assignment__variant__variant_id="1-100-A-G").exists()
 
 
-def test_upload_results_sets_all_custom_flags_as_false_if_not_specified(db_setup):
+def test_upload_results_does_not_store_custom_flags_if_not_specified(db_setup):
     custom_flag = CustomFlag.objects.create(
         key="flag_foo_bar",
         label="Flag Foo Bar",
@@ -355,10 +356,7 @@ def test_upload_results_sets_all_custom_flags_as_false_if_not_specified(db_setup
     assert CurationResult.objects.filter(assignment__variant__variant_id="1-100-A-G").exists()
 
     result = CurationResult.objects.get(assignment__variant__variant_id="1-100-A-G")
-    assert CustomFlagCurationResult.objects.filter(result=result, flag=custom_flag).exists()
-
-    custom_result = CustomFlagCurationResult.objects.get(result=result, flag=custom_flag)
-    assert not custom_result.checked
+    assert not CustomFlagCurationResult.objects.filter(result=result, flag=custom_flag).exists()
 
 
 def test_upload_sets_notes_and_curator_comments_fields(db_setup):
@@ -515,3 +513,183 @@ def test_upload_results_ignores_timestamps_when_updating_existing_result(db_setu
     assert parse_datetime(str(assignment.result.updated_at)) != parse_datetime(
         "2023-09-18T07:24:24.534399"
     )
+
+
+def test_upload_results_updates_custom_flags_on_existing_results(db_setup):
+    custom_flag = CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
+
+    assignment = CurationAssignment.objects.get(
+        curator__username="user2@example.com", variant__variant_id="1-100-A-G"
+    )
+    assignment.result = CurationResult.objects.create()
+    assignment.save()
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.post(
+        "/api/project/1/results/",
+        [
+            {
+                "curator": "user2@example.com",
+                "variant_id": "1-100-A-G",
+                "custom_flags": {"flag_foo_bar": True},
+            }
+        ],
+        format="json",
+    )
+
+    assert response.status_code == 200, response.json()
+
+    assignment.result.refresh_from_db()
+    assert assignment.result.editor.username == "user1@example.com"
+    assert CustomFlagCurationResult.objects.get(result=assignment.result, flag=custom_flag).checked
+
+
+def test_upload_results_unchecking_custom_flag_deletes_it(db_setup):
+    custom_flag = CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
+
+    assignment = CurationAssignment.objects.get(
+        curator__username="user2@example.com", variant__variant_id="1-100-A-G"
+    )
+    assignment.result = CurationResult.objects.create()
+    assignment.save()
+    CustomFlagCurationResult.objects.create(result=assignment.result, flag=custom_flag)
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.post(
+        "/api/project/1/results/",
+        [
+            {
+                "curator": "user2@example.com",
+                "variant_id": "1-100-A-G",
+                "custom_flags": {"flag_foo_bar": False},
+            }
+        ],
+        format="json",
+    )
+
+    assert response.status_code == 200, response.json()
+
+    assignment.result.refresh_from_db()
+    assert assignment.result.editor.username == "user1@example.com"
+    assert not CustomFlagCurationResult.objects.filter(result=assignment.result).exists()
+
+
+def test_upload_results_query_count_does_not_depend_on_number_of_results(
+    db_setup, django_assert_max_num_queries
+):
+    CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+
+    # A mix of new assignments, existing assignments without results and existing results.
+    assignment = CurationAssignment.objects.get(
+        curator__username="user2@example.com", variant__variant_id="1-100-A-G"
+    )
+    assignment.result = CurationResult.objects.create()
+    assignment.save()
+    CurationAssignment.objects.create(
+        curator=User.objects.get(username="user2@example.com"),
+        variant=Variant.objects.get(project=1, variant_id="1-200-G-A"),
+    )
+
+    results = [
+        {
+            "curator": curator,
+            "variant_id": variant_id,
+            "verdict": "likely_lof",
+            "flag_stutter": True,
+            "custom_flags": {"flag_foo_bar": True},
+        }
+        for curator in ["user1@example.com", "user2@example.com", "user3@example.com"]
+        for variant_id in ["1-100-A-G", "1-200-G-A", "1-300-T-C"]
+    ]
+
+    with django_assert_max_num_queries(30):
+        response = client.post("/api/project/1/results/", results, format="json")
+
+    assert response.status_code == 200, response.json()
+
+    results = CurationResult.objects.filter(assignment__variant__project=1)
+    assert results.count() == 9
+    for result in results:
+        assert result.verdict == "likely_lof"
+        assert result.flag_dubious_read_alignment
+        assert result.flags_bitmask == (
+            FLAG_BITS["flag_stutter"] | FLAG_BITS["flag_dubious_read_alignment"]
+        )
+        assert result.custom_flags.get(flag__key="flag_foo_bar").checked
+
+
+@pytest.mark.parametrize(
+    "username,expected_status_code",
+    [("user1@example.com", 200), ("user2@example.com", 403), ("user3@example.com", 404)],
+)
+def test_result_flags_can_only_be_viewed_by_project_owners(
+    db_setup, username, expected_status_code
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username=username))
+    response = client.get("/api/project/1/results/flags/", format="json")
+    assert response.status_code == expected_status_code
+
+
+def test_result_flags_counts_flags_and_pairs_of_flags(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.post(
+        "/api/project/1/results/",
+        [
+            {
+                "curator": "user2@example.com",
+                "variant_id": "1-100-A-G",
+                "flag_mapping_error": True,
+                "flag_self_chain": True,
+                "verdict": "not_lof",
+            },
+            {
+                "curator": "user2@example.com",
+                "variant_id": "1-200-G-A",
+                "flag_mapping_error": True,
+                "flag_self_chain": True,
+                "flag_low_read_depth": True,
+                "verdict": "uncertain",
+            },
+            {"curator": "user2@example.com", "variant_id": "1-300-T-C"},
+        ],
+        format="json",
+    )
+    assert response.status_code == 200, response.json()
+
+    # Results for other projects are not counted.
+    CurationResult.objects.create(flag_mapping_error=True, verdict="lof")
+
+    response = client.get("/api/project/1/results/flags/", format="json").json()
+    assert response["num_results"] == 3
+    assert response["num_invalid_verdicts"] == 0
+    assert response["flags"]["flag_mapping_error"] == 2
+    assert response["flags"]["flag_self_chain"] == 2
+    assert response["flags"]["flag_low_read_depth"] == 1
+    assert response["flags"]["flag_rescue"] == 0
+    assert response["co_occurrence"]["flag_mapping_error"] == {
+        "flag_self_chain": 2,
+        "flag_low_read_depth": 1,
+    }
+    assert response["co_occurrence"]["flag_low_read_depth"] == {
+        "flag_mapping_error": 1,
+        "flag_self_chain": 1,
+    }
+
+    assignment = CurationAssignment.objects.get(
+        curator__username="user2@example.com", variant__variant_id="1-300-T-C"
+    )
+    # Results saved before verdicts were validated may have verdicts that are not allowed.
+    CurationResult.objects.filter(id=assignment.result_id).update(
+        flags_bitmask=FLAG_BITS["flag_rescue"], verdict="lof"
+    )
+
+    response = client.get("/api/project/1/results/flags/", format="json").json()
+    assert response["flags"]["flag_rescue"] == 1
+    assert response["num_invalid_verdicts"] == 1
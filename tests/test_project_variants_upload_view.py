@@ -0,0 +1,164 @@
+# pylint: disable=redefined-outer-name,unused-argument
+import gzip
+import json
+
+import pytest
+from django.contrib.auth.models import Permission
+from rest_framework.test import APIClient
+
+from curation_portal.models import CurationAssignment, Project, User, Variant
+
+pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
+
+
+@pytest.fixture(scope="module")
+def db_setup(django_db_setup, django_db_blocker, create_variant):
+    with django_db_blocker.unblock():
+        project = Project.objects.create(id=1, name="Test Project")
+        variant1 = create_variant(project, "1-100-A-G")
+
+        user1 = User.objects.create(username="user1@example.com")
+        user1.user_permissions.add(Permission.objects.get(codename="add_variant"))
+        user2 = User.objects.create(username="user2@example.com")
+        user2.user_permissions.add(Permission.objects.get(codename="add_variant"))
+        user3 = User.objects.create(username="user3@example.com")
+
+        project.owners.set([user1])
+        CurationAssignment.objects.create(curator=user2, variant=variant1)
+
+        yield
+
+        project.delete()
+
+        user1.delete()
+        user2.delete()
+        user3.delete()
+
+
+def to_ndjson(variants):
+    return "\n".join(json.dumps(variant) for variant in variants).encode("utf-8")
+
+
+def upload_variants(body, username="user1@example.com", query=""):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username=username))
+    return client.post(
+        f"/api/project/1/variants/upload/{query}", data=body, content_type="application/x-ndjson"
+    )
+
+
+def test_upload_variants_requires_authentication(db_setup):
+    client = APIClient()
+    response = client.post(
+        "/api/project/1/variants/upload/",
+        data=to_ndjson([{"variant_id": "1-300-A-G"}]),
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize(
+    "username,expected_status_code",
+    [("user1@example.com", 200), ("user2@example.com", 403), ("user3@example.com", 404)],
+)
+def test_variants_can_only_be_uploaded_by_project_owners(db_setup, username, expected_status_code):
+    response = upload_variants(to_ndjson([{"variant_id": "1-300-T-G"}]), username=username)
+    assert response.status_code == expected_status_code
+
+
+def test_upload_variants_saves_variants_in_chunks(db_setup):
+    variants = [{"variant_id": f"2-{pos}-A-G"} for pos in range(1, 11)]
+    response = upload_variants(to_ndjson(variants), query="?chunk_size=4")
+
+    assert response.status_code == 200
+    response = response.json()
+    assert response["created"] == 10
+    assert [(c["first_line"], c["last_line"], c["created"]) for c in response["chunks"]] == [
+        (1, 4, 4),
+        (5, 8, 4),
+        (9, 10, 2),
+    ]
+
+    assert Variant.objects.filter(project=1, variant_id__startswith="2-").count() == 10
+
+
+def test_upload_variants_accepts_gzip_compressed_upload(db_setup):
+    variants = [
+        {
+            "variant_id": "3-100-C-T",
+            "annotations": [
+                {
+                    "consequence": "stop_gained",
+                    "gene_id": "GENE_1",
+                    "gene_symbol": "SOMEGENE",
+                    "transcript_id": "TRANSCRIPT_1",
+                }
+            ],
+        }
+    ]
+    response = upload_variants(gzip.compress(to_ndjson(variants)))
+
+    assert response.status_code == 200
+    variant = Variant.objects.get(project=1, variant_id="3-100-C-T")
+    assert [a.gene_symbol for a in variant.annotations.all()] == ["SOMEGENE"]
+
+
+def test_upload_variants_with_session_authentication_checks_csrf_token(db_setup):
+    client = APIClient(enforce_csrf_checks=True)
+    body = gzip.compress(to_ndjson([{"variant_id": "4-100-C-T"}]))
+
+    response = client.post(
+        "/api/project/1/variants/upload/",
+        data=body,
+        content_type="application/x-ndjson",
+        REMOTE_USER="user1@example.com",
+    )
+    assert response.status_code == 403
+    assert "CSRF" in response.json()["detail"]
+
+    client.cookies["csrftoken"] = "a" * 64
+    response = client.post(
+        "/api/project/1/variants/upload/",
+        data=body,
+        content_type="application/x-ndjson",
+        HTTP_X_CSRFTOKEN="a" * 64,
+        REMOTE_USER="user1@example.com",
+    )
+    assert response.status_code == 200
+    assert Variant.objects.filter(project=1, variant_id="4-100-C-T").exists()
+
+
+def test_upload_variants_reports_errors_by_chunk(db_setup):
+    body = b"\n".join(
+        [
+            json.dumps({"variant_id": "4-100-A-G"}).encode("utf-8"),
+            json.dumps({"variant_id": "4-200-A-G"}).encode("utf-8"),
+            json.dumps({"variant_id": "4-300-A-G"}).encode("utf-8"),
+            json.dumps({"variant_id": "1-100-A-G"}).encode("utf-8"),
+            b"",
+            b"{not json",
+            json.dumps({"variant_id": "4-400-A-G"}).encode("utf-8"),
+        ]
+    )
+    response = upload_variants(body, query="?chunk_size=2")
+
+    assert response.status_code == 400
+    response = response.json()
+    assert response["created"] == 2
+
+    chunks = response["chunks"]
+    assert chunks[0]["created"] == 2
+    assert chunks[1]["errors"] == [
+        {"line": 4, "errors": {"non_field_errors": ["Variant already exists in project"]}}
+    ]
+    assert chunks[2]["first_line"] == 6
+    assert chunks[2]["errors"][0]["line"] == 6
+
+    assert Variant.objects.filter(project=1, variant_id__in=["4-100-A-G", "4-200-A-G"]).count() == 2
+    assert not Variant.objects.filter(project=1, variant_id__in=["4-300-A-G", "4-400-A-G"]).exists()
+
+
+def test_upload_variants_rejects_invalid_chunk_size(db_setup):
+    response = upload_variants(to_ndjson([{"variant_id": "5-100-A-G"}]), query="?chunk_size=0")
+    assert response.status_code == 400
+    assert not Variant.objects.filter(project=1, variant_id="5-100-A-G").exists()
@@ -245,3 +245,50 @@ def test_upload_variants_creates_no_variants_on_validation_error(db_setup):
 
     assert response.status_code == 400
     assert project.variants.count() == starting_variant_count
+
+
+def test_upload_variants_rejects_variants_that_already_exist_in_list(db_setup):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+    response = client.post(
+        "/api/project/1/variants/",
+        [{"variant_id": "1-1100-A-G"}, {"variant_id": "1-200-G-A"}],
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json() == [{}, {"non_field_errors": ["Variant already exists in project"]}]
+    assert not Variant.objects.filter(variant_id="1-1100-A-G", project=1).exists()
+
+
+def test_upload_variants_query_count_does_not_depend_on_number_of_variants(
+    db_setup, django_assert_max_num_queries
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+
+    variants = [
+        {
+            "variant_id": f"3-{pos}-A-G",
+            "annotations": [
+                {
+                    "consequence": "stop_gained",
+                    "gene_id": "GENE_1",
+                    "gene_symbol": "SOMEGENE",
+                    "transcript_id": f"TRANSCRIPT_{pos}",
+                }
+            ],
+            "tags": [{"label": "tag", "value": str(pos)}],
+        }
+        for pos in range(1, 201)
+    ]
+
+    with django_assert_max_num_queries(20):
+        response = client.post("/api/project/1/variants/", variants, format="json")
+
+    assert response.status_code == 200
+
+    variant = Variant.objects.get(project=1, variant_id="3-150-A-G")
+    assert variant.xpos == 3_000_000_150
+    assert [a.transcript_id for a in variant.annotations.all()] == ["TRANSCRIPT_150"]
+    assert [(t.label, t.value) for t in variant.tags.all()] == [("tag", "150")]
@@ -1,7 +1,21 @@
+import base64
+import io
+import logging
+import os
+from pathlib import Path
+
 import pytest
-from rest_framework.test import APIClient
+from cloudpathlib.anypath import to_anypath
+from cloudpathlib.cloudpath import implementation_registry
+from cloudpathlib.local import LocalGSClient, local_gs_implementation
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 
+from curation_portal.bam import BamHeader, BgzfReader, iter_alignments, query_index, write_bam
 from curation_portal.models import CurationAssignment, Project, User, Variant
+from curation_portal.reads_cache import get_reads_cache
+from curation_portal.views.curate_variant import ReadsFileView
+from test_bam import make_record, read_records, record_name
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
@@ -110,3 +124,304 @@ def test_reads_file_view_can_only_access_file_listed_in_variant_reads_attribute(
     response = client.get(f"/api/project/1/variant/{variant.id}/reads/?file={reads2}")
     assert response.status_code == 404
     assert response.json() == {"detail": "File not listed in variant."}
+
+
+@pytest.fixture(name="reads_file")
+def fixture_reads_file(tmp_path):
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+
+    reads_file = tmp_path / "reads.bam"
+    reads_file.write_bytes(bytes(range(100)))
+
+    variant.reads = [reads_file]
+    variant.save()
+
+    return reads_file
+
+
+def get_reads_file(reads_file, **kwargs):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    return client.get(f"/api/project/1/variant/{variant.id}/reads/?file={reads_file}", **kwargs)
+
+
+def test_reads_file_view_returns_entire_file_without_range(reads_file):
+    response = get_reads_file(reads_file)
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Content-Length"] == "100"
+    assert b"".join(response.streaming_content) == bytes(range(100))
+
+
+@pytest.mark.parametrize(
+    "range_header,expected_content_range,expected_content",
+    [
+        ("bytes=10-19", "bytes 10-19/100", bytes(range(10, 20))),
+        ("bytes=90-", "bytes 90-99/100", bytes(range(90, 100))),
+        ("bytes=-5", "bytes 95-99/100", bytes(range(95, 100))),
+        ("bytes=95-200", "bytes 95-99/100", bytes(range(95, 100))),
+    ],
+)
+def test_reads_file_view_returns_requested_range(
+    reads_file, range_header, expected_content_range, expected_content
+):
+    response = get_reads_file(reads_file, HTTP_RANGE=range_header)
+    assert response.status_code == 206
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Content-Range"] == expected_content_range
+    assert response["Content-Length"] == str(len(expected_content))
+    assert b"".join(response.streaming_content) == expected_content
+
+
+def test_reads_file_view_returns_multiple_ranges(reads_file):
+    response = get_reads_file(reads_file, HTTP_RANGE="bytes=0-1, 50-52, 51-54, -2")
+    assert response.status_code == 206
+    assert response["Content-Type"].startswith("multipart/byteranges; boundary=")
+
+    boundary = response["Content-Type"].split("boundary=")[1]
+    content = b"".join(response.streaming_content)
+    assert response["Content-Length"] == str(len(content))
+
+    parts = content.split(f"--{boundary}".encode())
+    assert parts[-1] == b"--\r\n"
+
+    # Overlapping ranges are combined
+    part_headers_and_contents = [part.strip(b"\r\n").split(b"\r\n\r\n") for part in parts[1:-1]]
+    assert [
+        (headers.split(b"\r\n")[1], part_content)
+        for headers, part_content in part_headers_and_contents
+    ] == [
+        (b"Content-Range: bytes 0-1/100", bytes([0, 1])),
+        (b"Content-Range: bytes 50-54/100", bytes(range(50, 55))),
+        (b"Content-Range: bytes 98-99/100", bytes([98, 99])),
+    ]
+
+
+def test_reads_file_view_rejects_unsatisfiable_range(reads_file):
+    response = get_reads_file(reads_file, HTTP_RANGE="bytes=100-200")
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */100"
+
+
+@pytest.mark.parametrize("range_header", ["bytes=10-5", "bytes=a-b", "items=0-10"])
+def test_reads_file_view_ignores_invalid_range(reads_file, range_header):
+    response = get_reads_file(reads_file, HTTP_RANGE=range_header)
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == bytes(range(100))
+
+
+def test_reads_file_view_streams_fixed_size_blocks(reads_file, settings):
+    settings.CURATION_PORTAL_READS_BUFFER_SIZE = 16
+
+    response = get_reads_file(reads_file, HTTP_RANGE="bytes=0-49")
+    assert [len(chunk) for chunk in response.streaming_content] == [16, 16, 16, 2]
+
+
+def test_reads_file_view_allows_sendfile_for_local_files(reads_file):
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    request = APIRequestFactory().get(
+        f"/api/project/1/variant/{variant.id}/reads/",
+        {"file": reads_file},
+        HTTP_RANGE="bytes=10-19",
+    )
+    force_authenticate(request, User.objects.get(username="user1@example.com"))
+    response = ReadsFileView.as_view()(request, project_id=1, variant_id=variant.id)
+
+    # WSGI servers use the file descriptor and its current position to send the file.
+    assert os.lseek(response.file_to_stream.fileno(), 0, os.SEEK_CUR) == 10
+    assert response["Content-Length"] == "10"
+    response.close()
+
+
+def test_reads_file_view_logs_streaming_metrics(reads_file, caplog):
+    with caplog.at_level(logging.INFO, logger="curation_portal.reads"):
+        response = get_reads_file(reads_file)
+        b"".join(response.streaming_content)
+        response.close()
+
+    assert "Streamed 100 bytes" in caplog.text
+    assert "time to first byte" in caplog.text
+
+
+@pytest.fixture(name="cloud_reads_file")
+def fixture_cloud_reads_file(monkeypatch, settings, tmp_path):
+    monkeypatch.setitem(implementation_registry, "gs", local_gs_implementation)
+    LocalGSClient.reset_default_storage_dir()
+
+    settings.CURATION_PORTAL_READS_CACHE_DIR = str(tmp_path / "cache")
+    settings.CURATION_PORTAL_READS_CACHE_HEADER_SIZE = 50
+
+    reads_file = to_anypath("gs://bucket/reads.bam")
+    reads_file.write_bytes(bytes(range(100)))
+    to_anypath("gs://bucket/reads.bam.bai").write_bytes(bytes(range(10)))
+
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    variant.reads = [str(reads_file)]
+    variant.save()
+
+    yield reads_file
+
+    LocalGSClient.reset_default_storage_dir()
+
+
+def test_reads_file_view_caches_index_files_and_headers(cloud_reads_file):
+    reads_cache = get_reads_cache()
+
+    response = get_reads_file(f"{cloud_reads_file}.bai")
+    assert b"".join(response.streaming_content) == bytes(range(10))
+    response = get_reads_file(cloud_reads_file, HTTP_RANGE="bytes=0-9")
+    assert b"".join(response.streaming_content) == bytes(range(10))
+    assert reads_cache.misses["index"] == 1
+    assert reads_cache.misses["header"] == 1
+
+    response = get_reads_file(f"{cloud_reads_file}.bai", HTTP_RANGE="bytes=2-4")
+    assert b"".join(response.streaming_content) == bytes([2, 3, 4])
+    response = get_reads_file(cloud_reads_file, HTTP_RANGE="bytes=10-19")
+    assert b"".join(response.streaming_content) == bytes(range(10, 20))
+    assert reads_cache.hits["index"] == 1
+    assert reads_cache.hits["header"] == 1
+
+    # Ranges outside the header are not cached
+    response = get_reads_file(cloud_reads_file, HTTP_RANGE="bytes=60-69")
+    assert b"".join(response.streaming_content) == bytes(range(60, 70))
+    assert len(list((Path(reads_cache.directory)).iterdir())) == 2
+
+    # Existence checks are cached
+    assert reads_cache.hits["info"] == 3
+    assert reads_cache.misses["info"] == 2
+
+
+def test_reads_file_view_does_not_serve_changed_files_from_cache(cloud_reads_file):
+    response = get_reads_file(cloud_reads_file, HTTP_RANGE="bytes=0-9")
+    assert b"".join(response.streaming_content) == bytes(range(10))
+
+    cloud_reads_file.write_bytes(bytes(reversed(range(100))))
+    cache.clear()
+
+    response = get_reads_file(cloud_reads_file, HTTP_RANGE="bytes=0-9")
+    assert b"".join(response.streaming_content) == bytes(reversed(range(90, 100)))
+
+
+@pytest.mark.usefixtures("cloud_reads_file")
+def test_reads_cache_evicts_least_recently_used_files(settings):
+    settings.CURATION_PORTAL_READS_CACHE_SIZE = 100
+    settings.CURATION_PORTAL_READS_CACHE_HEADER_SIZE = 40
+    settings.CURATION_PORTAL_READS_CACHE_DIR = str(
+        Path(settings.CURATION_PORTAL_READS_CACHE_DIR) / "lru"
+    )
+    reads_cache = get_reads_cache()
+
+    def get_cached_file(reads_file):
+        return reads_cache.get_cached_file(
+            "header", reads_file, reads_cache.get_file_info(reads_file), 0
+        )
+
+    reads_files = [to_anypath(f"gs://bucket/reads{i}.bam") for i in range(3)]
+    for i, reads_file in enumerate(reads_files):
+        reads_file.write_bytes(bytes([i]) * 100)
+
+    cached_file0 = get_cached_file(reads_files[0])
+    cached_file1 = get_cached_file(reads_files[1])
+    os.utime(cached_file1, (1, 1))
+    os.utime(cached_file0, (2, 2))
+
+    # Caching a third file exceeds the cache size, so the least recently used file is removed
+    cached_file2 = get_cached_file(reads_files[2])
+    assert cached_file0.exists()
+    assert not cached_file1.exists()
+    assert cached_file2.read_bytes() == bytes([2]) * 40
+
+    assert get_cached_file(reads_files[0]) == cached_file0
+    assert reads_cache.hits["header"] == 1
+    assert reads_cache.misses["header"] == 3
+
+
+@pytest.fixture(name="bam_file")
+def fixture_bam_file(tmp_path):
+    header = BamHeader(b"@HD\tVN:1.6\tSO:coordinate\n", [("chr1", 100_000)])
+    records = [
+        make_record(0, position, f"read-{position}", 50) for position in range(0, 100_000, 25)
+    ]
+    bam_data, index_data = write_bam(header, records)
+
+    bam_file = tmp_path / "reads.bam"
+    bam_file.write_bytes(bam_data)
+    (tmp_path / "reads.bam.bai").write_bytes(index_data)
+
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    variant.reads = [str(bam_file)]
+    variant.save()
+
+    return bam_file
+
+
+def get_reads_slice(reads_file, **params):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username="user1@example.com"))
+
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    return client.get(
+        f"/api/project/1/variant/{variant.id}/reads/slice/", {"file": str(reads_file), **params}
+    )
+
+
+def test_reads_slice_view_returns_alignments_around_variant(bam_file):
+    response = get_reads_slice(bam_file, window=20)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert (data["chrom"], data["start"], data["stop"]) == ("1", 80, 120)
+
+    # Alignments overlapping 0-based positions 79 to 119
+    sliced_bam = base64.b64decode(data["bam"])
+    assert [record_name(record) for record in read_records(sliced_bam)] == [
+        "read-50",
+        "read-75",
+        "read-100",
+    ]
+
+    reader = BgzfReader(io.BytesIO(sliced_bam))
+    chunks = query_index(base64.b64decode(data["bai"]), 0, 100, 101)
+    assert [record_name(record) for record in iter_alignments(reader, chunks, 0, 100, 101)] == [
+        "read-75",
+        "read-100",
+    ]
+
+
+def test_reads_slice_view_uses_default_window(bam_file, settings):
+    settings.CURATION_PORTAL_READS_SLICE_WINDOW = 0
+    response = get_reads_slice(bam_file)
+    assert response.status_code == 200
+    assert [
+        record_name(record) for record in read_records(base64.b64decode(response.json()["bam"]))
+    ] == [
+        "read-50",
+        "read-75",
+    ]
+
+
+@pytest.mark.parametrize("window", ["-1", "foo", "1000000"])
+def test_reads_slice_view_rejects_invalid_window(bam_file, window):
+    response = get_reads_slice(bam_file, window=window)
+    assert response.status_code == 400
+
+
+def test_reads_slice_view_only_slices_bam_files(tmp_path):
+    reads_file = tmp_path / "reads.cram"
+    reads_file.write_bytes(b"")
+
+    variant = Variant.objects.get(variant_id="1-100-A-G", project__id=1)
+    variant.reads = [str(reads_file)]
+    variant.save()
+
+    response = get_reads_slice(reads_file)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Only BAM files can be sliced."}
+
+
+def test_reads_slice_view_requires_index(bam_file):
+    os.remove(f"{bam_file}.bai")
+    response = get_reads_slice(bam_file)
+    assert response.status_code == 404
@@ -3,9 +3,19 @@ import csv
 import io  # pylint: disable=E0401
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
-from curation_portal.models import CurationAssignment, CurationResult, Project, User
+from curation_portal.custom_flags import get_custom_flag_registry
+from curation_portal.models import (
+    CurationAssignment,
+    CurationResult,
+    CustomFlag,
+    CustomFlagCurationResult,
+    Project,
+    User,
+)
 
 pytestmark = pytest.mark.django_db  # pylint: disable=invalid-name
 
@@ -74,7 +84,8 @@ def get_exported_results(db_setup):
         client = APIClient()
         client.force_authenticate(User.objects.get(username=username))
         response = client.get(f"/api/variant/{variant_id}/results/export/", query_params)
-        reader = csv.DictReader(io.StringIO(response.content.decode("utf-8")))
+        content = b"".join(response.streaming_content).decode("utf-8")
+        reader = csv.DictReader(io.StringIO(content))
         return [row for row in reader]
 
     return _get_exported_results
@@ -137,3 +148,38 @@ def test_exported_variant_results_includes_only_self_results_for_curators(
 
     results = set((result["Project"], result["Curator"]) for result in results)
     assert results == expected_results
+
+
+def test_exported_variant_results_include_custom_flags(db_setup, get_exported_results):
+    flag = CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
+    CustomFlagCurationResult.objects.bulk_create(
+        CustomFlagCurationResult(flag=flag, result=result)
+        for result in CurationResult.objects.filter(
+            assignment__curator__username="user2", assignment__variant__variant_id="1-100-A-G"
+        )
+    )
+
+    results = get_exported_results("user1", "1-100-A-G")
+    assert set((result["Curator"], result["Flag Foo Bar"]) for result in results) == set(
+        [("user1", "False"), ("user2", "True"), ("user3", "False")]
+    )
+
+
+def test_export_variant_results_query_count_does_not_depend_on_number_of_results(db_setup):
+    CustomFlag.objects.create(key="flag_foo_bar", label="Flag Foo Bar", shortcut="FB")
+    CustomFlag.objects.create(key="flag_foo_baz", label="Flag Foo Baz", shortcut="FZ")
+    # Load custom flags before counting queries so that both exports use the cached registry.
+    get_custom_flag_registry()
+
+    def count_export_queries(username, variant_id):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username=username))
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f"/api/variant/{variant_id}/results/export/")
+            rows = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        return len(rows) - 1, len(context.captured_queries)
+
+    num_rows_1, num_queries_1 = count_export_queries("user3", "1-100-A-G")
+    num_rows_3, num_queries_3 = count_export_queries("user1", "1-100-A-G")
+    assert (num_rows_1, num_rows_3) == (1, 3)
+    assert num_queries_1 == num_queries_3